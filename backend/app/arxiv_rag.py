@@ -1,34 +1,44 @@
 # RAG system: Dynamic arXiv query, lazy vectorization, and retrieval (Class-based)
 
 import requests
-import uuid
 import xml.etree.ElementTree as ET
 from threading import Thread
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
 import time
 import random
 import json
 import urllib.parse
+from functools import wraps
 from typing import Dict, List, Optional, Tuple
 
 from llama_index.core import VectorStoreIndex, ServiceContext
-from llama_index.embeddings.openai import OpenAIEmbedding
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 from llama_index.vector_stores.qdrant import QdrantVectorStore
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import VectorParams, Distance
+from qdrant_client.http.models import VectorParams, Distance, PayloadSchemaType, TextIndexParams, TextIndexType, TokenizerType
+from qdrant_client.http.models import FieldCondition, Filter, FilterSelector, MatchAny, MatchValue, Range
 from llama_index.core.schema import TextNode
 from llama_index.core.node_parser import SentenceSplitter
 from llama_index.core.query_engine import RetrieverQueryEngine
 from llama_index.core.retrievers import VectorIndexRetriever
-from llama_index.core.settings import Settings
 from llama_index.core.schema import TextNode
 from llama_index.core.node_parser import SentenceSplitter
 from PyPDF2 import PdfReader
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 from llama_index.core.llms import LLM
 from app.llm_providers import get_llm
+from app.http_clients import get_http_session
+from app.embeddings import make_embed_model
+from app.context_packing import pack_context
+from app import dedup, metrics, paper_progress, retrieval_cache
+from app.prefetch import is_weak_retrieval, prefetcher, related_queries
+from app.query_filters import extract_filters, to_qdrant_filter
+from app.index_state import load_index_state
+from app.singleflight import KeyedLock, SingleFlight
+from app.cache import ReadThroughCache
+from app.ratelimit import BudgetExhausted, CircuitBreaker, SqliteTokenBucket, TokenBucket
 import io
 import time
 import random
@@ -37,10 +47,7 @@ import os
 #from dotenv import load_dotenv
 # Load environment variables
 #load_dotenv()
-from app.observability import init_observability
 from app.config import local_settings
-# Initialize observability
-init_observability()
 
 QDRANT_HOST = local_settings.QDRANT_HOST
 QDRANT_PORT = local_settings.QDRANT_PORT
@@ -56,6 +63,126 @@ MAX_RETRIES = local_settings.MAX_RETRIES
 RETRY_DELAY_BASE = local_settings.RETRY_DELAY_BASE
 RETRY_JITTER = local_settings.RETRY_JITTER
 
+# Nodes embedded and upserted per call
+EMBED_BATCH_SIZE = local_settings.EMBED_BATCH_SIZE
+
+# Atom feed namespaces used by the arXiv API
+ATOM_NAMESPACES = {
+    'atom': 'http://www.w3.org/2005/Atom',
+    'arxiv': 'http://arxiv.org/schemas/atom'
+}
+ATOM_ENTRY_TAG = f"{{{ATOM_NAMESPACES['atom']}}}entry"
+
+# Coalesce identical concurrent work across requests
+_feed_flight = SingleFlight("arxiv_feed")
+_pdf_flight = SingleFlight("arxiv_pdf")
+_paper_write_lock = KeyedLock("paper_write")
+_tool_flight = SingleFlight("lazy_load_and_query")
+
+# Process-wide (or, with the sqlite backend, host-wide) arXiv request budget
+if local_settings.ARXIV_RATE_LIMIT_BACKEND.lower() == "sqlite":
+    _arxiv_bucket = SqliteTokenBucket(
+        "arxiv_api",
+        rate=local_settings.ARXIV_RATE_LIMIT_PER_SECOND,
+        capacity=local_settings.ARXIV_RATE_LIMIT_BURST,
+        path=local_settings.CACHE_SQLITE_PATH,
+    )
+else:
+    _arxiv_bucket = TokenBucket(
+        "arxiv_api",
+        rate=local_settings.ARXIV_RATE_LIMIT_PER_SECOND,
+        capacity=local_settings.ARXIV_RATE_LIMIT_BURST,
+    )
+_arxiv_breaker = CircuitBreaker(
+    "arxiv_api",
+    failure_threshold=local_settings.ARXIV_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=local_settings.ARXIV_CIRCUIT_RESET_SECONDS,
+)
+_feed_cache = ReadThroughCache("arxiv_feed", ttl=local_settings.ARXIV_FEED_CACHE_TTL)
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a search query, used as the coalescing key."""
+    return " ".join(query.lower().split())
+
+
+def arxiv_id_from_link(link: str) -> str:
+    """
+    Extract the arXiv ID from an abs or pdf link: 2401.12345v1, or for pre-2007
+    papers the archive-prefixed form (hep-th/9901001v2), whose number alone is
+    shared by papers in other archives.
+    """
+    path = link.split('?', 1)[0].rstrip('/')
+    for marker in ('/abs/', '/pdf/'):
+        if marker in path:
+            return path.split(marker, 1)[1].removesuffix('.pdf')
+    return path.split('/')[-1].removesuffix('.pdf')
+
+
+def make_vector_client(host: str = QDRANT_HOST, port: int = QDRANT_PORT):
+    """
+    QdrantClient, or the in-process LocalVectorClient when VECTOR_BACKEND is
+    "local". Both accept the same calls and filter models.
+    """
+    if local_settings.VECTOR_BACKEND.lower() == "local":
+        from app.local_vector_store import LocalVectorClient
+
+        return LocalVectorClient()
+    return QdrantClient(host=host, port=port)
+
+
+def ensure_payload_indexes(qdrant_client: QdrantClient, collection_name: str):
+    """
+    Create the payload indexes used by filtered searches. Qdrant keeps
+    existing indexes, so this is safe to call on every start.
+    """
+    indexes = {
+        "published_ts": PayloadSchemaType.INTEGER,
+        "primary_category": PayloadSchemaType.KEYWORD,
+        "categories": PayloadSchemaType.KEYWORD,
+        "link": PayloadSchemaType.KEYWORD,
+        "arxiv_id": PayloadSchemaType.KEYWORD,
+        "version": PayloadSchemaType.INTEGER,
+        "simhash_bands": PayloadSchemaType.KEYWORD,
+        "content_type": PayloadSchemaType.KEYWORD,
+        # Word-tokenized so a last name matches the full author name
+        "author_list": TextIndexParams(
+            type=TextIndexType.TEXT, tokenizer=TokenizerType.WORD, lowercase=True, min_token_len=2
+        ),
+    }
+    for field_name, schema in indexes.items():
+        try:
+            qdrant_client.create_payload_index(
+                collection_name=collection_name, field_name=field_name, field_schema=schema
+            )
+        except Exception as e:
+            print(f"⚠️ Could not create payload index on '{field_name}': {e}")
+
+
+def rrf_merge(result_lists, top_k: int, k: int = 60):
+    """
+    Reciprocal rank fusion of several retrieval results. Node IDs are
+    content-derived, so the same chunk has the same ID in every collection.
+    """
+    scores: Dict[str, float] = {}
+    nodes = {}
+    for results in result_lists:
+        for rank, node in enumerate(results):
+            scores[node.node_id] = scores.get(node.node_id, 0.0) + 1.0 / (k + rank + 1)
+            nodes.setdefault(node.node_id, node)
+    merged = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    for node_id in merged:
+        nodes[node_id].score = scores[node_id]
+    return [nodes[node_id] for node_id in merged]
+
+
+def split_arxiv_version(arxiv_id: str) -> Tuple[str, int]:
+    """Split 2401.12345v2 into ("2401.12345", 2); IDs without a version count as v1."""
+    base, sep, version = arxiv_id.rpartition('v')
+    if sep and base and version.isdigit():
+        return base, int(version)
+    return arxiv_id, 1
+
 class ArxivRAG:
     def __init__(self,
                  qdrant_host=QDRANT_HOST,
@@ -63,7 +190,8 @@ class ArxivRAG:
                  collection_name=COLLECTION_NAME,
                  embed_model_name=OLLAMA_EMBED_MODEL if local_settings.LLM_PROVIDER.lower() == "ollama" else OPENAI_EMBED_MODEL,
                  max_results=MAX_RESULTS,
-                 vector_dim=VECTOR_DIM):
+                 vector_dim=VECTOR_DIM,
+                 recreate_collection=True):
         """ Initialize the ArxivRAG system.
         Args:
             qdrant_host (str): Qdrant host address.
@@ -72,43 +200,127 @@ class ArxivRAG:
             embed_model_name (str): Name of the embedding model to use.
             max_results (int): Maximum number of results to fetch from arXiv.
             vector_dim (int): Dimension of the embedding vectors.
+            recreate_collection (bool): Drop and recreate the collection; when False
+                an existing collection is kept and only created if missing.
         """
 
         self.collection_name = collection_name
         self.max_results = max_results
 
-        # Choose the embedding model based on the name
-        if "bge" in embed_model_name:
-            print(f"Using HuggingFace embedding model: {embed_model_name}")
-            self.embed_model = HuggingFaceEmbedding(model_name=embed_model_name)
+        # Choose the embedding model based on the name and EMBED_BACKEND. The model is
+        # kept on the instance and passed explicitly; global Settings are not mutated.
+        self.embed_model = make_embed_model(embed_model_name)
+
+        self.qdrant_client = make_vector_client(qdrant_host, qdrant_port)
+        if recreate_collection or not self.qdrant_client.collection_exists(collection_name):
+            self.qdrant_client.recreate_collection(
+                collection_name=collection_name,
+                vectors_config=VectorParams(size=vector_dim, distance=Distance.COSINE)
+            )
+            # Cached search results of the dropped collection are gone with it
+            retrieval_cache.collection_versions.bump(collection_name)
+
+        self.ensure_payload_indexes()
+        if local_settings.VECTOR_BACKEND.lower() == "local":
+            from app.local_vector_store import LocalVectorStore
+
+            self.vector_store = LocalVectorStore(client=self.qdrant_client, collection_name=collection_name)
         else:
-            print(f"Using OpenAI embedding model: {embed_model_name}")
-            self.embed_model = OpenAIEmbedding(model="text-embedding-3-small")
-            
-        Settings.embed_model = self.embed_model
-        Settings.node_parser = SentenceSplitter(chunk_size=512, chunk_overlap=20)
-        Settings.num_output = 512
-        Settings.context_window = 3900
-
-        self.qdrant_client = QdrantClient(host=qdrant_host, port=qdrant_port)
-        self.qdrant_client.recreate_collection(
-            collection_name=collection_name,
-            vectors_config=VectorParams(size=vector_dim, distance=Distance.COSINE)
+            self.vector_store = QdrantVectorStore(client=self.qdrant_client, collection_name=collection_name)
+        # Collection being migrated to; searched too when dual-read is on (see for_active_index)
+        self.secondary: Optional["ArxivRAG"] = None
+
+    @classmethod
+    def for_active_index(cls, **kwargs) -> "ArxivRAG":
+        """
+        ArxivRAG for the collection and embedding model in the index state
+        (see index_state.py), never recreating the collection.
+        """
+        state = load_index_state()
+        rag = cls(
+            collection_name=state.collection,
+            embed_model_name=state.embed_model,
+            vector_dim=state.vector_dim,
+            recreate_collection=False,
+            **kwargs,
         )
+        migration = state.migration
+        if migration and migration.get("dual_read"):
+            rag.secondary = cls(
+                collection_name=migration["target"],
+                embed_model_name=migration["embed_model"],
+                vector_dim=migration["vector_dim"],
+                recreate_collection=False,
+                **kwargs,
+            )
+        return rag
 
-        self.vector_store = QdrantVectorStore(client=self.qdrant_client, collection_name=collection_name)
+    def ensure_payload_indexes(self):
+        ensure_payload_indexes(self.qdrant_client, self.collection_name)
 
     def fetch_arxiv_feed(self, query):
         """
         Fetch arXiv papers based on a query with improved error handling and retry logic.
+        Concurrent calls for the same normalized query share one upstream request.
+        """
+        query = normalize_query(query)
+        return _feed_flight.do(query, lambda: self._fetch_arxiv_feed(query))
+
+    def _fetch_arxiv_feed(self, query):
         """
-        url = f"http://export.arxiv.org/api/query?search_query=all:{query}&sortBy=submittedDate&sortOrder=descending&max_results={self.max_results}"
+        Fetch through the circuit breaker. While the circuit is open, or when
+        all retries fail, the last good feed for the query is served if cached.
+        """
+        if not _arxiv_breaker.allow():
+            cached = _feed_cache.get(query)
+            if cached is not None:
+                print(f"arXiv circuit open, serving cached feed for '{query}'")
+                return cached
+            raise Exception("Failed to fetch from arXiv: circuit breaker open after repeated failures (HTTP 503)")
+
+        try:
+            feed = self._request_arxiv_feed(query)
+        except Exception as e:
+            if isinstance(e, BudgetExhausted):
+                # Our own budget ran out, arXiv itself was never asked
+                _arxiv_breaker.release()
+            else:
+                _arxiv_breaker.record_failure()
+            cached = _feed_cache.get(query)
+            if cached is not None:
+                print(f"arXiv fetch failed, serving cached feed for '{query}'")
+                return cached
+            raise
+
+        _arxiv_breaker.record_success()
+        _feed_cache.set(query, feed)
+        return feed
+
+    def _feed_url(self, search_query, start=0, max_results=None):
+        params = {
+            'search_query': search_query,
+            'sortBy': 'submittedDate',
+            'sortOrder': 'descending',
+            'start': start,
+            'max_results': max_results or self.max_results,
+        }
+        return f"{local_settings.ARXIV_API_URL}?{urllib.parse.urlencode(params)}"
+
+    def _request_arxiv_feed(self, query):
+        url = self._feed_url(f"all:{query}")
         print(f"Querying arXiv API with URL: {url}")
         
         retry_count = 0
         last_exception = None
         
         while retry_count < MAX_RETRIES:
+            # Wait for the shared request budget instead of hammering arXiv from every worker
+            if not _arxiv_bucket.acquire(local_settings.ARXIV_RATE_LIMIT_MAX_WAIT):
+                if last_exception is not None:
+                    # Out of budget while retrying upstream errors: report those
+                    break
+                raise BudgetExhausted("Failed to fetch from arXiv: local request budget exhausted (429 Too Many Requests)")
+
             try:
                 # Add user-agent to mimic a browser (sometimes helps with rate limiting)
                 headers = {
@@ -123,7 +335,7 @@ class ArxivRAG:
                     time.sleep(delay)
                 
                 # Make the request
-                response = requests.get(url, headers=headers, timeout=30)
+                response = get_http_session().get(url, headers=headers, timeout=30)
                 
                 # Handle 503 specifically with a more detailed message
                 if response.status_code == 503:
@@ -180,17 +392,21 @@ class ArxivRAG:
         
         # If we exhausted all retries
         if last_exception:
-            error_msg = f"Failed to fetch from arXiv after {MAX_RETRIES} attempts: {str(last_exception)}"
+            error_msg = f"Failed to fetch from arXiv after {retry_count} attempts: {str(last_exception)}"
             print(f"Error: {error_msg}")
             raise Exception(error_msg)
 
     def extract_arxiv_pdf_text(self, pdf_url):
         """
         Download an arXiv PDF by ID and extract its text, all in memory.
+        Concurrent downloads of the same paper are coalesced by arXiv ID.
         """
+        return _pdf_flight.do(arxiv_id_from_link(pdf_url), lambda: self._extract_arxiv_pdf_text(pdf_url))
+
+    def _extract_arxiv_pdf_text(self, pdf_url):
         # pdf_url = f"https://arxiv.org/pdf/{arxiv_id}.pdf"
         # response = requests.get(pdf_url)
-        response = requests.get(pdf_url)
+        response = get_http_session().get(pdf_url, timeout=60)
         response.raise_for_status()
         pdf_filelike = io.BytesIO(response.content)
         reader = PdfReader(pdf_filelike)
@@ -199,109 +415,186 @@ class ArxivRAG:
             text += page.extract_text() or ""
         return text
 
-    def parse_arxiv_feed(self, feed_xml):
+    def _parse_entry(self, entry):
         """
-        Parse arXiv XML feed with improved error handling.
+        Turn one Atom <entry> element into a compact paper record (no PDF text yet).
+        Returns None for entries without a PDF link, title or summary.
         """
-        try:
-            # Try to parse XML
-            root = ET.fromstring(feed_xml)
-            
-            # Define namespaces for extracting data
-            namespaces = {
-                'atom': 'http://www.w3.org/2005/Atom',
-                'arxiv': 'http://arxiv.org/schemas/atom'
-            }
-            
-            # Initialize an empty list to store paper information
-            papers = []
-            
-            # Find entries using namespace
-            entries = root.findall('.//atom:entry', namespaces)
-            if not entries:
-                print("Warning: No entries found in arXiv response")
-                print(f"Response preview: {feed_xml[:200]}...")
-                return []
-                
-            print(f"Found {len(entries)} papers in arXiv response")
-            
-            # Process each entry (paper)
-            for entry in entries:
-                try:
-                    # Extract PDF link
-                    link = entry.find('./atom:link[@title="pdf"]', namespaces)
-                    pdf_link = link.get('href') if link is not None else None
-                    # If PDF link is not present, skip this entry
-                    if pdf_link is None:
-                        print("Warning: No PDF link found for entry")
-                        continue
-                    else:
-                        # If PDF link is present, proceed with extracting information
-                        if not self.is_already_indexed(pdf_link.split('/')[-1]):
-                            print(f"Not indexed paper: {pdf_link}")
-                            pass
-                        else:
-                            print(f"Skipping already indexed paper: {pdf_link}")
-                            continue
-
-                    # Extract basic information
-                    title = entry.find('./atom:title', namespaces)
-                    summary = entry.find('./atom:summary', namespaces)
-                    published = entry.find('./atom:published', namespaces)
-                    authors_elements = entry.findall('./atom:author/atom:name', namespaces)
-                    
-                    # Skip if essential elements are missing
-                    if title is None or summary is None:
-                        continue
-                        
-                    # Format title and summary (clean up newlines and spaces)
-                    title_text = title.text.replace('\n', ' ').strip() if title.text else "No title"
-                    summary_text = summary.text.replace('\n', ' ').strip() if summary.text else "No summary"
-                    
-                    # Format publication date
-                    pub_date = published.text if published is not None and published.text else "No date"
-                    if pub_date != "No date":
-                        # Try to parse and format date
-                        try:
-                            date_obj = datetime.fromisoformat(pub_date.replace('Z', '+00:00'))
-                            pub_date = date_obj.strftime("%Y-%m-%d")
-                        except (ValueError, TypeError) as e:
-                            print(f"Warning: Could not parse date '{pub_date}': {e}")
-                    
-                    # Extract authors
-                    authors = [author.text for author in authors_elements if author.text]
-                    author_text = ", ".join(authors) if authors else "Unknown"
-                    
+        # Extract PDF link
+        link = entry.find('./atom:link[@title="pdf"]', ATOM_NAMESPACES)
+        pdf_link = link.get('href') if link is not None else None
+        # If PDF link is not present, skip this entry
+        if pdf_link is None:
+            print("Warning: No PDF link found for entry")
+            return None
 
-                    # Download and extract text from the PDF
-                    try:
-                        full_text = self.extract_arxiv_pdf_text(pdf_link)
-                        # full_text = "Extracted text from PDF for demonstration purposes will implement later"
-                    except Exception as e:
-                        print(f"Error extracting PDF text: {e}")
-                        full_text = "No text extracted"
-
-                    # Create a formatted entry for the paper
-                    paper_info = {
-                        'title': title_text,
-                        'summary': summary_text,
-                        'authors': author_text,
-                        'published_date': pub_date,
-                        'pdf_link': pdf_link,
-                        'full_text': full_text
-                    }
-
-                    #print(f"Processed paper: -->  {paper_info}")
-
-                    papers.append(paper_info)
-                except Exception as e:
-                    # If processing a specific paper fails, log the error but continue with others
-                    print(f"Error processing a paper entry: {e}")
+        # Extract basic information
+        title = entry.find('./atom:title', ATOM_NAMESPACES)
+        summary = entry.find('./atom:summary', ATOM_NAMESPACES)
+        published = entry.find('./atom:published', ATOM_NAMESPACES)
+        authors_elements = entry.findall('./atom:author/atom:name', ATOM_NAMESPACES)
+
+        # Skip if essential elements are missing
+        if title is None or summary is None:
+            return None
+
+        # Format title and summary (clean up newlines and spaces)
+        title_text = title.text.replace('\n', ' ').strip() if title.text else "No title"
+        summary_text = summary.text.replace('\n', ' ').strip() if summary.text else "No summary"
+
+        # Format publication date
+        pub_date = published.text if published is not None and published.text else "No date"
+        published_ts = None
+        if pub_date != "No date":
+            # Try to parse and format date
+            try:
+                date_obj = datetime.fromisoformat(pub_date.replace('Z', '+00:00'))
+                pub_date = date_obj.strftime("%Y-%m-%d")
+                published_ts = int(date_obj.timestamp())
+            except (ValueError, TypeError) as e:
+                print(f"Warning: Could not parse date '{pub_date}': {e}")
+
+        # Extract categories; the primary one is listed separately in the arxiv namespace
+        primary = entry.find('./arxiv:primary_category', ATOM_NAMESPACES)
+        categories = [c.get('term') for c in entry.findall('./atom:category', ATOM_NAMESPACES) if c.get('term')]
+        primary_category = primary.get('term') if primary is not None else (categories[0] if categories else None)
+
+        # Extract authors
+        authors = [author.text for author in authors_elements if author.text]
+        author_text = ", ".join(authors) if authors else "Unknown"
+
+        return {
+            'title': title_text,
+            'summary': summary_text,
+            'authors': author_text,
+            'published_date': pub_date,
+            'published_ts': published_ts,
+            'primary_category': primary_category,
+            'categories': categories,
+            'author_list': authors,
+            'pdf_link': pdf_link,
+        }
+
+    def iter_feed_entries(self, source, counts=None):
+        """
+        Incrementally parse an Atom feed from a file-like object (e.g. a streamed
+        HTTP response) and yield paper records as each <entry> completes.
+        Processed elements are cleared so memory stays bounded by one entry.
+        counts["entries"], if given, tracks every <entry> in the feed, including
+        the ones dropped because they could not be parsed.
+        """
+        root = None
+        found = 0
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if root is None:
+                root = elem
+            if event != "end" or elem.tag != ATOM_ENTRY_TAG:
+                continue
+            found += 1
+            if counts is not None:
+                counts["entries"] = found
+            try:
+                record = self._parse_entry(elem)
+            except Exception as e:
+                # If processing a specific paper fails, log the error but continue with others
+                print(f"Error processing a paper entry: {e}")
+                record = None
+            # Drop everything parsed so far; the root keeps no finished entries
+            root.clear()
+            if record is not None:
+                yield record
+        if not found:
+            print("Warning: No entries found in arXiv response")
+
+    def attach_full_text(self, records):
+        """
+        PDF download stage: download and extract the text of each record that is
+        not indexed yet, PDF_DOWNLOAD_WORKERS at a time, while upstream records
+        are still arriving. Yields complete papers in feed order.
+        """
+        window = max(1, local_settings.PDF_DOWNLOAD_WORKERS) * 2
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=max(1, local_settings.PDF_DOWNLOAD_WORKERS)) as pool:
+            for record in records:
+                if self.is_already_indexed(record['pdf_link']):
+                    print(f"Skipping already indexed paper: {record['pdf_link']}")
                     continue
-            
-            # Return the list of papers
+                pending.append((record, pool.submit(self.extract_arxiv_pdf_text, record['pdf_link'])))
+                # Bound the number of PDFs held in memory at once
+                while len(pending) >= window:
+                    yield self._with_full_text(*pending.popleft())
+            while pending:
+                yield self._with_full_text(*pending.popleft())
+
+    def _with_full_text(self, record, future):
+        try:
+            full_text = future.result()
+        except Exception as e:
+            print(f"Error extracting PDF text: {e}")
+            full_text = "No text extracted"
+        return {**record, 'full_text': full_text}
+
+    def stream_arxiv_feed(self, search_query, start=0, max_results=None, counts=None):
+        """
+        Stream a (possibly very large) arXiv result page and yield paper records
+        as entries arrive, without holding the response or the XML tree in memory.
+        Goes through the same rate limiter and circuit breaker as fetch_arxiv_feed.
+        See iter_feed_entries for counts.
+        """
+        # Budget first: a local wait must not hold the breaker's half-open trial
+        if not _arxiv_bucket.acquire(local_settings.ARXIV_RATE_LIMIT_MAX_WAIT):
+            raise BudgetExhausted("Failed to fetch from arXiv: local request budget exhausted (429 Too Many Requests)")
+        if not _arxiv_breaker.allow():
+            raise Exception("Failed to fetch from arXiv: circuit breaker open after repeated failures (HTTP 503)")
+
+        url = self._feed_url(search_query, start=start, max_results=max_results)
+        print(f"Streaming arXiv API results from URL: {url}")
+        recorded = False
+        try:
+            try:
+                response = get_http_session().get(url, stream=True, timeout=30)
+                response.raise_for_status()
+            except Exception as e:
+                _arxiv_breaker.record_failure()
+                recorded = True
+                raise Exception(f"Failed to fetch from arXiv: {e}")
+
+            try:
+                response.raw.decode_content = True
+                yield from self.iter_feed_entries(response.raw, counts)
+                _arxiv_breaker.record_success()
+                recorded = True
+            except ET.ParseError as e:
+                _arxiv_breaker.record_failure()
+                recorded = True
+                raise Exception(f"XML parsing error: {str(e)}")
+            finally:
+                response.close()
+        finally:
+            # Closed early by the consumer (GeneratorExit) or failed downstream:
+            # the outcome is unknown, so only give the half-open trial back
+            if not recorded:
+                _arxiv_breaker.release()
+
+    def stream_papers(self, search_query, start=0, max_results=None):
+        """Streamed feed piped straight into the PDF download stage."""
+        return self.attach_full_text(self.stream_arxiv_feed(search_query, start=start, max_results=max_results))
+
+    def parse_arxiv_feed(self, feed_xml, full_text=True):
+        """
+        Parse arXiv XML feed with improved error handling.
+        Papers already indexed are left out. With full_text=False the PDFs are
+        not downloaded (see index_progressively).
+        """
+        try:
+            records = self.iter_feed_entries(io.BytesIO(feed_xml.encode('utf-8')))
+            if full_text:
+                papers = list(self.attach_full_text(records))
+            else:
+                papers = [record for record in records if not self.is_already_indexed(record['pdf_link'])]
+            print(f"Parsed {len(papers)} new papers from arXiv response")
             return papers
-            
+
         except ET.ParseError as e:
             error_msg = f"XML parsing error: {str(e)}"
             line_number = getattr(e, 'position', (0, 0))[0]
@@ -326,54 +619,227 @@ class ArxivRAG:
             raise Exception(error_msg)
 
     def is_already_indexed(self, link):
+        """
+        Whether the full text of this paper is stored in this or a newer version.
+        Points indexed before arxiv_id/version were stored are matched by their
+        link; abstract-only nodes (see index_progressively) do not count.
+        """
+        arxiv_id, version = split_arxiv_version(arxiv_id_from_link(link))
         result, _ = self.qdrant_client.scroll(
             collection_name=self.collection_name,
-            scroll_filter={"must": [{"key": "source", "match": {"value": link}}]},
-            limit=1
+            scroll_filter=Filter(
+                should=[
+                    Filter(must=[
+                        FieldCondition(key="arxiv_id", match=MatchValue(value=arxiv_id)),
+                        FieldCondition(key="version", range=Range(gte=version)),
+                    ]),
+                    FieldCondition(key="link", match=MatchValue(value=link)),
+                ],
+                must_not=[FieldCondition(key="content_type", match=MatchValue(value="abstract"))],
+            ),
+            limit=1,
+            with_payload=False,
         )
         return len(result) > 0
 
     def chunk_text(self,text, chunk_size=2000):
         return [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
 
+    def _paper_summary(self, paper):
+        summary_snippet = paper['summary'][:SHORT_SUMMARY_LENGTH]
+        last_index = summary_snippet.rindex(".") if "." in summary_snippet else len(summary_snippet)
+        short_summary = summary_snippet[:last_index] + "..." if len(summary_snippet) > SHORT_SUMMARY_LENGTH else summary_snippet
+        return f"📄 Title: {paper['title']}\n 🔗 link: {paper['pdf_link']}\n authors: {paper['authors']}\n published_date: {paper['published_date']}\n 📝paper_summary: {short_summary}\n\n"
+
+    def _paper_header(self, paper):
+        return f"Title: {paper['title']}\npaper_summary: {paper['summary']}\nlink: {paper['pdf_link']}\nauthors: {paper['authors']}\npublished_date: {paper['published_date']}"
+
+    def _make_node(self, paper, text, chunk, content_type):
+        """TextNode for one chunk (chunk 0 is the abstract node) with the paper's metadata."""
+        arxiv_id, version = split_arxiv_version(arxiv_id_from_link(paper['pdf_link']))
+        text_hash = dedup.content_hash(text)
+        chunk_simhash = dedup.simhash(text)
+        node = TextNode(
+            text=text,
+            metadata={
+                "title": paper['title'],
+                "paper_summary": paper['summary'],
+                "link": paper['pdf_link'],
+                "authors": paper['authors'],
+                "chunk": chunk,
+                "content_type": content_type,
+                # Structured fields used by payload filters (see query_filters.py)
+                "published_date": paper['published_date'],
+                "published_ts": paper.get('published_ts'),
+                "primary_category": paper.get('primary_category'),
+                "categories": paper.get('categories', []),
+                "author_list": paper.get('author_list', []),
+                # Identity and near-duplicate detection (see dedup.py)
+                "arxiv_id": arxiv_id,
+                "version": version,
+                "content_hash": text_hash,
+                "simhash": dedup.simhash_hex(chunk_simhash),
+                "simhash_bands": dedup.band_keys(chunk_simhash),
+            }
+        )
+        # Same paper, chunk and content -> same point, so re-indexing is an idempotent upsert
+        node.node_id = dedup.node_id(arxiv_id, chunk, text_hash)
+        return node
+
     def create_nodes_from_papers(self, entries, chunk_size=2000):
         nodes = []
         paper_summaries = []
         for paper in entries:
-            #print(f"Processing paper: {paper['title']} inside create_nodes_from_papers")
-            # Create a summary for the paper
-            summary_snippet = paper['summary'][:SHORT_SUMMARY_LENGTH]
-            last_index = summary_snippet.rindex(".") if "." in summary_snippet else len(summary_snippet)
-            short_summary = summary_snippet[:last_index] + "..." if len(summary_snippet) > SHORT_SUMMARY_LENGTH else summary_snippet
-            paper_summary = f"📄 Title: {paper['title']}\n 🔗 link: {paper['pdf_link']}\n authors: {paper['authors']}\n published_date: {paper['published_date']}\n 📝paper_summary: {short_summary}\n\n"
-            paper_summaries.append(paper_summary)
-
-            #print(f"Creating nodes for paper: {paper['title']} before chunking")
-
-            text = f"Title: {paper['title']}\npaper_summary: {paper['summary']}\nlink: {paper['pdf_link']}\nauthors: {paper['authors']}\npublished_date: {paper['published_date']}\n\n\nFull Text:\n{paper['full_text']}"
-            chunks = self.chunk_text(text, chunk_size)
-            for idx, chunk in enumerate(chunks):
-                node = TextNode(
-                    text=chunk,
-                    metadata={
-                        "title": paper['title'],
-                        "paper_summary": paper['summary'],
-                        "link": paper['pdf_link'],
-                        "authors": paper['authors'],
-                        "chunk": idx + 1
-                    }
-                )
-                node.node_id = str(uuid.uuid4())
-                nodes.append(node)
-            
-            #print(f"Created {len(chunks)} nodes for paper: {paper['title']}")
+            paper_summaries.append(self._paper_summary(paper))
+            text = f"{self._paper_header(paper)}\n\n\nFull Text:\n{paper['full_text']}"
+            for idx, chunk in enumerate(self.chunk_text(text, chunk_size)):
+                nodes.append(self._make_node(paper, chunk, idx + 1, "full_text"))
         return nodes, paper_summaries
 
+    def create_abstract_nodes(self, entries):
+        """One node per paper with title, abstract and metadata; no PDF text needed."""
+        nodes = [self._make_node(paper, self._paper_header(paper), 0, "abstract") for paper in entries]
+        return nodes, [self._paper_summary(paper) for paper in entries]
+
+    def index_progressively(self, entries):
+        """
+        Two-phase indexing. The abstract nodes are embedded before this returns,
+        so the papers are searchable at once; PDFs are downloaded and the full
+        text is embedded paper by paper in a background thread. Progress is kept
+        in paper_progress.paper_states.
+
+        Args:
+            entries: Paper records from parse_arxiv_feed(..., full_text=False)
+
+        Returns:
+            tuple[list[str], list[str]]: arxiv IDs and short summaries of the papers
+        """
+        nodes, paper_summaries = self.create_abstract_nodes(entries)
+        self.vectorize_and_store(nodes)
+        arxiv_ids = [node.metadata["arxiv_id"] for node in nodes]
+        paper_progress.paper_states.set(arxiv_ids, paper_progress.ABSTRACT)
+        Thread(target=self.index_full_text, args=(entries,), daemon=True).start()
+        return arxiv_ids, paper_summaries
+
+    def index_full_text(self, entries):
+        """Second phase of index_progressively: full-text chunks, stored as each PDF arrives."""
+        pending = {split_arxiv_version(arxiv_id_from_link(entry['pdf_link']))[0]: entry for entry in entries}
+        try:
+            for paper in self.attach_full_text(entries):
+                arxiv_id = split_arxiv_version(arxiv_id_from_link(paper['pdf_link']))[0]
+                try:
+                    nodes, _ = self.create_nodes_from_papers([paper])
+                    self.vectorize_and_store(nodes)
+                    if nodes:
+                        self._delete_abstract_node(arxiv_id)
+                    paper_progress.paper_states.set([arxiv_id], paper_progress.FULL_TEXT)
+                except Exception as e:
+                    print(f"⚠️ Full-text indexing of {arxiv_id} failed: {e}")
+                    paper_progress.paper_states.set([arxiv_id], paper_progress.FAILED)
+                pending.pop(arxiv_id, None)
+        except Exception as e:
+            print(f"⚠️ Full-text indexing stopped: {e}")
+        # Skipped by attach_full_text because another request indexed them meanwhile, or never reached
+        for arxiv_id, entry in pending.items():
+            indexed = self.is_already_indexed(entry['pdf_link'])
+            paper_progress.paper_states.set([arxiv_id], paper_progress.FULL_TEXT if indexed else paper_progress.FAILED)
+
+    def _delete_abstract_node(self, arxiv_id: str) -> None:
+        """Drop the first-phase abstract node; chunk 0 of the full text repeats the abstract."""
+        self.qdrant_client.delete(
+            collection_name=self.collection_name,
+            points_selector=FilterSelector(filter=Filter(must=[
+                FieldCondition(key="arxiv_id", match=MatchValue(value=arxiv_id)),
+                FieldCondition(key="content_type", match=MatchValue(value="abstract")),
+            ])),
+        )
+        retrieval_cache.collection_versions.bump(self.collection_name)
+
     def vectorize_and_store(self, nodes):
+        """
+        Embed and store nodes paper by paper. Writes for the same paper (another
+        version, or its abstract and full text) wait for each other and then run
+        in turn, so the version check and the replacement see each other's rows.
+        """
+        papers: Dict[str, List[TextNode]] = {}
+        for node in nodes:
+            papers.setdefault(node.metadata["arxiv_id"], []).append(node)
+        for arxiv_id, paper_nodes in papers.items():
+            # Keyed by the unversioned ID so v1 and v2 of a paper are never written concurrently
+            with _paper_write_lock.hold(arxiv_id):
+                self._vectorize_and_store(paper_nodes)
+
+    def _replace_older_versions(self, arxiv_id: str, version: int) -> bool:
+        """
+        Delete stored chunks of older versions of the paper. Returns False if a
+        newer version is already stored, in which case nothing should be indexed.
+        """
+        newer, _ = self.qdrant_client.scroll(
+            collection_name=self.collection_name,
+            scroll_filter=Filter(must=[
+                FieldCondition(key="arxiv_id", match=MatchValue(value=arxiv_id)),
+                FieldCondition(key="version", range=Range(gt=version)),
+            ]),
+            limit=1,
+            with_payload=False,
+        )
+        if newer:
+            print(f"Skipping {arxiv_id}v{version}: a newer version is already indexed")
+            return False
+        older = Filter(must=[
+            FieldCondition(key="arxiv_id", match=MatchValue(value=arxiv_id)),
+            FieldCondition(key="version", range=Range(lt=version)),
+        ])
+        # Usually nothing older is stored; then the collection and its cached results are unchanged
+        if self.qdrant_client.count(collection_name=self.collection_name, count_filter=older, exact=True).count:
+            self.qdrant_client.delete(collection_name=self.collection_name, points_selector=FilterSelector(filter=older))
+            retrieval_cache.collection_versions.bump(self.collection_name)
+        return True
+
+    def _drop_near_duplicates(self, nodes):
+        """
+        Remove chunks whose SimHash is within SIMHASH_MAX_DISTANCE bits of a chunk
+        stored for another paper or of an earlier chunk in this batch.
+        """
+        arxiv_id = nodes[0].metadata["arxiv_id"]
+        bands = sorted({band for node in nodes for band in node.metadata["simhash_bands"]})
+        candidates, _ = self.qdrant_client.scroll(
+            collection_name=self.collection_name,
+            scroll_filter=Filter(
+                must=[FieldCondition(key="simhash_bands", match=MatchAny(any=bands))],
+                # Chunks of the same paper are replaced by the upsert, not duplicates
+                must_not=[FieldCondition(key="arxiv_id", match=MatchValue(value=arxiv_id))],
+            ),
+            limit=local_settings.SIMHASH_CANDIDATE_LIMIT,
+            with_payload=["simhash"],
+        )
+        seen = [int(point.payload["simhash"], 16) for point in candidates if point.payload.get("simhash")]
+
+        kept = []
         for node in nodes:
-            embedding = self.embed_model.get_text_embedding(node.get_content())
-            node.embedding = embedding  # Set the embedding attribute on the node
-            self.vector_store.add([node], embeddings=[embedding])
+            value = int(node.metadata["simhash"], 16)
+            if dedup.is_near_duplicate(value, seen):
+                metrics.inc("ingest_near_duplicate_chunks_total")
+                continue
+            seen.append(value)
+            kept.append(node)
+        return kept
+
+    def _vectorize_and_store(self, nodes):
+        arxiv_id, version = nodes[0].metadata["arxiv_id"], nodes[0].metadata["version"]
+        if not self._replace_older_versions(arxiv_id, version):
+            return
+        nodes = self._drop_near_duplicates(nodes)
+
+        # One batched embedding call and one upsert per batch instead of per node
+        for start in range(0, len(nodes), EMBED_BATCH_SIZE):
+            batch = nodes[start:start + EMBED_BATCH_SIZE]
+            embeddings = self.embed_model.get_text_embedding_batch([node.get_content() for node in batch])
+            for node, embedding in zip(batch, embeddings):
+                node.embedding = embedding  # Set the embedding attribute on the node
+            self.vector_store.add(batch)
+            # Cached search results of this collection are stale now
+            retrieval_cache.collection_versions.bump(self.collection_name)
 
     def vector_store_has_documents(self,user_question: str) -> bool:
         """
@@ -384,7 +850,7 @@ class ArxivRAG:
         """
         try:
             count_result = self.qdrant_client.count(
-                collection_name=COLLECTION_NAME,
+                collection_name=self.collection_name,
                 exact=True  # Ensure an accurate count
             )
             print(f"Vector store contains {count_result.count} documents.")
@@ -394,12 +860,52 @@ class ArxivRAG:
             return False
 
     def query_qdrant(self,user_question: str) -> str:
-        """First searches Qdrant for relevant papers based on user's question."""
-        if not self.qdrant_client.collection_exists(COLLECTION_NAME):
+        """
+        First searches Qdrant for relevant papers based on user's question.
+        Date, category and author constraints in the question become payload
+        filters; if nothing matches them the search is repeated unfiltered.
+        While an embedding migration runs with dual-read, the new collection is
+        searched as well and both rankings are merged.
+        """
+        retrieved_nodes = self._search(user_question)
+        if self.secondary is None or not isinstance(retrieved_nodes, list):
+            return retrieved_nodes
+        try:
+            secondary_nodes = self.secondary._search(user_question)
+        except Exception as e:
+            print(f"⚠️ Dual-read from {self.secondary.collection_name} failed: {e}")
+            return retrieved_nodes
+        if not isinstance(secondary_nodes, list):
+            return retrieved_nodes
+        # Scores of different embedding models are not comparable, so merge by rank
+        return rrf_merge([secondary_nodes, retrieved_nodes], MAX_RESULTS)
+
+    def _search(self, user_question: str):
+        if not self.qdrant_client.collection_exists(self.collection_name):
             return "No papers stored yet. Ask me to fetch some first."
 
+        filters = extract_filters(user_question)
+        cache_key = retrieval_cache.retrieval_key(self.collection_name, normalize_query(user_question), filters, MAX_RESULTS)
+        cached_nodes = retrieval_cache.get_results(cache_key)
+        if cached_nodes is not None:
+            return cached_nodes
+        retrieved_nodes = self._retrieve(user_question, to_qdrant_filter(filters))
+        retrieval_cache.set_results(cache_key, retrieved_nodes)
+        return retrieved_nodes
+
+    def _retrieve(self, user_question: str, qdrant_filter: Optional[Filter]):
         # Build the index from the vector store with settings
-        index = VectorStoreIndex.from_vector_store(self.vector_store, settings=Settings)
+        index = VectorStoreIndex.from_vector_store(self.vector_store, embed_model=self.embed_model)
+
+        if qdrant_filter is not None:
+            print(f"Applying payload filter: {qdrant_filter}")
+            retriever = VectorIndexRetriever(
+                index=index, similarity_top_k=MAX_RESULTS, vector_store_kwargs={"qdrant_filters": qdrant_filter}
+            )
+            retrieved_nodes = retriever.retrieve(user_question)
+            if retrieved_nodes:
+                return retrieved_nodes
+            print("No papers match the filter, falling back to unfiltered search")
 
         # Retrieve relevant nodes
         retriever = VectorIndexRetriever(index=index, similarity_top_k=MAX_RESULTS)
@@ -442,12 +948,14 @@ class ArxivRAG:
 
 
 # --- Lazy Load Function ---
-def get_lazy_load_and_query(llm: Optional[LLM] = None):
+def get_lazy_load_and_query(llm: Optional[LLM] = None, get_rag: Optional[Callable[[], "ArxivRAG"]] = None):
     """
     Get a function that can lazy load papers and query them.
     
     Args:
         llm (LLM, optional): LLM instance to use for summarization
+        get_rag (callable, optional): Returns the ArxivRAG instance; called on every
+            tool invocation so the RAG can be built lazily. Defaults to a new ArxivRAG.
         
     Returns:
         function: A function that can be used as a tool for the agent
@@ -459,10 +967,12 @@ def get_lazy_load_and_query(llm: Optional[LLM] = None):
             model_name=local_settings.OLLAMA_MODEL if local_settings.LLM_PROVIDER.lower() == "ollama" else local_settings.OPENAI_MODEL
         )
 
-    # Use the proper embedding model based on configuration
-    embed_model=OLLAMA_EMBED_MODEL if local_settings.LLM_PROVIDER.lower() == "ollama" else OPENAI_EMBED_MODEL,
+    if get_rag is None:
+        # Use the proper embedding model based on configuration
+        embed_model = OLLAMA_EMBED_MODEL if local_settings.LLM_PROVIDER.lower() == "ollama" else OPENAI_EMBED_MODEL
+        default_rag = ArxivRAG(embed_model_name=embed_model)
+        get_rag = lambda: default_rag
 
-    rag = ArxivRAG(embed_model_name=embed_model)
     def lazy_load_and_query(user_question: str):
         """
         Handle a user query by checking the vector store first and falling back to LLM if needed.
@@ -484,14 +994,27 @@ def get_lazy_load_and_query(llm: Optional[LLM] = None):
 
         retrieved_nodes = []
         try:
+            rag = get_rag()
             if not rag.vector_store_has_documents(user_question):
                 try:
                     feed = rag.fetch_arxiv_feed(query=user_question)
-                    entries = rag.parse_arxiv_feed(feed)
+                    entries = rag.parse_arxiv_feed(feed, full_text=not local_settings.PROGRESSIVE_INDEXING)
                     
                     if not entries:
                         return ["I couldn't find any relevant papers on arXiv for your query. Could you try rephrasing or using more specific keywords?"]
 
+                    if local_settings.PREFETCH_ENABLED:
+                        # Warm likely follow-up topics at low priority
+                        prefetcher.submit(rag, related_queries(
+                            entries, user_question, local_settings.PREFETCH_QUERIES_PER_COLD_QUERY
+                        ))
+
+                    if local_settings.PROGRESSIVE_INDEXING:
+                        # Abstracts are searchable now; the full text follows in the background
+                        arxiv_ids, paper_summaries = rag.index_progressively(entries)
+                        paper_progress.record_fetched(arxiv_ids)
+                        return paper_summaries
+
                     # print(f"Found {len(entries)} new papers to index.")
                     # Create nodes from the fetched papers    
                     nodes, paper_summaries = rag.create_nodes_from_papers(entries)
@@ -500,7 +1023,7 @@ def get_lazy_load_and_query(llm: Optional[LLM] = None):
                         #print(f"Vector store initialized with collection '{COLLECTION_NAME}'")
                         #print(f"Number of new papers to index: {len(nodes)}")
                         thread = Thread(target=rag.vectorize_and_store, args=(nodes,))
-                        thread.start()            
+                        thread.start()
                         return paper_summaries
                     else:
                         #print("No new papers to index.")
@@ -522,21 +1045,15 @@ def get_lazy_load_and_query(llm: Optional[LLM] = None):
             #print("Vector store has documents, querying Qdrant...")
             retrieved_nodes = rag.query_qdrant(user_question)
 
+            if local_settings.PREFETCH_ENABLED and isinstance(retrieved_nodes, list) and is_weak_retrieval(retrieved_nodes):
+                # The stored papers barely cover this topic: index it for the next turn
+                prefetcher.submit(rag, [f"all:{normalize_query(user_question)}"])
+
             if not retrieved_nodes:
                 return ["I couldn't find any specific papers that match your query in my database. Could you try a different question?"]
 
-            paper_summaries = []
-            for node in retrieved_nodes:
-                metadata = node.metadata or {}
-                title = metadata.get("title", "Untitled")
-                summary = metadata.get("papaer_summary", "No summary available")
-                summary_snippet = summary[:SHORT_SUMMARY_LENGTH]
-                last_index = summary_snippet.rindex(".") if "." in summary_snippet else len(summary_snippet)
-                short_summary = summary[:last_index] + "..." if len(summary) > SHORT_SUMMARY_LENGTH else summary            
-                link = metadata.get("link", "No link")
-                paper_summaries.append(f"📄 {title}\n\n🔗 {link}\n\n📝 {short_summary}\n{node.get_content()}")
-
-            return paper_summaries
+            # One deduplicated block per paper, trimmed to the LLM's context budget
+            return pack_context(retrieved_nodes)
             
         except Exception as e:
             error_msg = str(e)
@@ -551,8 +1068,22 @@ def get_lazy_load_and_query(llm: Optional[LLM] = None):
                 return ["The operation timed out while processing your request. This might be due to the complexity of your query or temporary server load. Could you try a simpler question?"]
             else:
                 return [f"I encountered an unexpected error while researching your question. Please try again with a different query. Technical details: {error_msg}"]
-    
-    return lazy_load_and_query
+
+    def lazy_load_and_collect(user_question: str):
+        # The papers fetched by the shared execution, for every caller to record
+        fetched: List[str] = []
+        with paper_progress.collect_papers(fetched):
+            result = lazy_load_and_query(user_question)
+        return result, fetched
+
+    @wraps(lazy_load_and_query)
+    def coalesced_lazy_load_and_query(user_question: str):
+        # Identical questions asked concurrently share one tool execution
+        result, fetched = _tool_flight.do(normalize_query(user_question), lambda: lazy_load_and_collect(user_question))
+        paper_progress.record_fetched(fetched)
+        return result
+
+    return coalesced_lazy_load_and_query
 
 # --- Run Example ---
 if __name__ == "__main__":
@@ -1,6 +1,13 @@
-from fastapi import FastAPI
+import threading
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from .router import api_router
+from .responses import add_compression
+from .config import local_settings
+from . import components, metrics
 
 from dotenv import load_dotenv
 # Load environment variables
@@ -10,7 +17,14 @@ from .observability import init_observability
 # Initialize observability
 init_observability()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy components are built lazily; optionally warm them up without blocking startup
+    if local_settings.WARMUP_ON_STARTUP:
+        threading.Thread(target=components.warmup, name="warmup", daemon=True).start()
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow CORS for local React dev
 app.add_middleware(
@@ -20,12 +34,26 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+add_compression(app)
 
-# Add health check endpoint for Docker
+# Add health check endpoint for Docker (liveness: the process is serving requests)
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+# Readiness: LLM, RAG and agent are built and can take chat traffic
+@app.get("/health/ready")
+async def readiness_check(response: Response):
+    state = components.readiness()
+    if not state["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return state
+
+# Per-process metrics in the Prometheus text format
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    return metrics.render()
+
 app.include_router(api_router)
 
 
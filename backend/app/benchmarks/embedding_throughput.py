@@ -0,0 +1,53 @@
+"""
+Throughput benchmark: in-process HuggingFaceEmbedding vs. the ONNX worker pool on CPU.
+Both are fed the same synthetic 2000-character chunks (the size create_nodes_from_papers produces).
+
+Usage: python app/benchmarks/embedding_throughput.py [--chunks 256] [--model-name BAAI/bge-large-en-v1.5]
+"""
+
+import argparse
+import time
+
+from app.config import local_settings
+
+
+def make_chunks(count: int) -> list[str]:
+    base = "We study retrieval-augmented generation over recent arXiv papers and report results. "
+    return [(f"Chunk {i}. " + base * 30)[:2000] for i in range(count)]
+
+
+def run(name: str, embed_batch, chunks: list[str], batch_size: int) -> None:
+    embed_batch(chunks[:batch_size])  # warm-up
+    start = time.perf_counter()
+    for offset in range(0, len(chunks), batch_size):
+        embed_batch(chunks[offset:offset + batch_size])
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {elapsed:>8.2f} s {len(chunks) / elapsed:>10.1f} chunks/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=local_settings.EMBED_BATCH_SIZE)
+    parser.add_argument("--model-name", default="BAAI/bge-large-en-v1.5")
+    parser.add_argument("--skip-huggingface", action="store_true")
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks)
+    print(f"{args.chunks} chunks, batch size {args.batch_size}")
+
+    if not args.skip_huggingface:
+        from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+        hf = HuggingFaceEmbedding(model_name=args.model_name)
+        run("huggingface (in-process)", hf.get_text_embedding_batch, chunks, args.batch_size)
+
+    from app.embeddings import get_embedding_pool
+
+    pool = get_embedding_pool()
+    label = "onnx int8 pool" if local_settings.ONNX_QUANTIZE_INT8 else "onnx fp32 pool"
+    run(f"{label} ({local_settings.EMBED_WORKERS} workers)", pool.embed, chunks, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark: default FastAPI JSON encoding vs. FastJSONResponse for message lists.
+Reports serialization time and bytes on the wire (raw, gzip and, if installed, brotli).
+
+Usage: python app/benchmarks/serialization.py [--messages 500] [--content-length 2000] [--repeat 20]
+"""
+
+import argparse
+import gzip
+import json
+import statistics
+import time
+import uuid
+
+from fastapi.encoders import jsonable_encoder
+
+from app.model import Messages
+from app.responses import FastJSONResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def make_messages(count: int, content_length: int) -> list[Messages]:
+    conversation_id = str(uuid.uuid4())
+    content = ("Attention-based retrieval summary. " * (content_length // 35 + 1))[:content_length]
+    return [
+        Messages(conversation_id=conversation_id, content=content, is_bot=bool(i % 2))
+        for i in range(count)
+    ]
+
+
+def default_encode(messages: list[Messages]) -> bytes:
+    # Mirrors fastapi.responses.JSONResponse.render after jsonable_encoder
+    return json.dumps(
+        jsonable_encoder(messages), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def fast_encode(messages: list[Messages]) -> bytes:
+    return FastJSONResponse(messages, model=Messages).body
+
+
+def timed(fn, messages: list[Messages], repeat: int) -> tuple[float, bytes]:
+    samples = []
+    body = b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = fn(messages)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--content-length", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages, args.content_length)
+    print(f"{args.messages} messages, {args.content_length} chars each, median of {args.repeat} runs")
+    print(f"{'encoder':<10} {'ms':>9} {'raw bytes':>11} {'gzip bytes':>11} {'br bytes':>10}")
+    for name, fn in (("default", default_encode), ("fast", fast_encode)):
+        seconds, body = timed(fn, messages, args.repeat)
+        gzipped = len(gzip.compress(body, compresslevel=9))
+        brotlied = len(brotli.compress(body)) if brotli is not None else "-"
+        print(f"{name:<10} {seconds * 1000:>9.2f} {len(body):>11} {gzipped:>11} {brotlied:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Bootstrap benchmark: snapshot import vs. live ingestion (embed + upsert) into Qdrant.
+A synthetic snapshot of 2000-character chunks is written to a temporary directory and
+imported into a scratch collection; live ingestion embeds and stores a sample of the
+same chunks with the configured embedding model. Both scratch collections are dropped.
+
+Usage: python app/benchmarks/snapshot_import.py [--points 20000] [--live-chunks 256] [--workers 4]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import uuid
+
+import numpy as np
+from llama_index.core.schema import TextNode
+from llama_index.vector_stores.qdrant import QdrantVectorStore
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, VectorParams
+
+from app.benchmarks.embedding_throughput import make_chunks
+from app.config import local_settings
+from app.embeddings import make_embed_model
+from app.index_state import load_index_state
+from app.initalize_db.snapshot import FORMAT_VERSION, JSONL_FILE, MANIFEST_FILE, VECTORS_FILE, import_snapshot
+
+
+def write_synthetic_snapshot(out_dir: str, points: int, vector_dim: int) -> None:
+    vectors = np.random.default_rng(0).standard_normal((points, vector_dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.save(os.path.join(out_dir, VECTORS_FILE), vectors)
+    chunks = make_chunks(64)
+    with open(os.path.join(out_dir, JSONL_FILE), "w") as f:
+        for i in range(points):
+            node = TextNode(text=chunks[i % len(chunks)], metadata={"title": f"Paper {i // 20}", "chunk": i % 20 + 1})
+            payload = {"_node_content": node.model_dump_json(), "_node_type": "TextNode", **node.metadata}
+            f.write(json.dumps({"id": str(uuid.uuid4()), "payload": payload}) + "\n")
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w") as f:
+        json.dump({
+            "format_version": FORMAT_VERSION, "collection": "benchmark", "embed_model": "synthetic",
+            "vector_dim": vector_dim, "distance": "cosine", "dtype": "float32", "count": points,
+            "metadata_format": "jsonl",
+        }, f)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--live-chunks", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    client = QdrantClient(host=local_settings.QDRANT_HOST, port=local_settings.QDRANT_PORT)
+    state = load_index_state()
+    import_collection = f"benchmark_import_{uuid.uuid4().hex[:8]}"
+    live_collection = f"benchmark_live_{uuid.uuid4().hex[:8]}"
+    try:
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            write_synthetic_snapshot(snapshot_dir, args.points, state.vector_dim)
+            imported, elapsed = import_snapshot(
+                client, snapshot_dir, import_collection, batch_size=args.batch_size, workers=args.workers
+            )
+        print(f"{'snapshot import':<20} {imported:>8} points {elapsed:>8.2f} s {imported / elapsed:>10.1f} points/s")
+
+        embed_model = make_embed_model(state.embed_model)
+        client.recreate_collection(
+            collection_name=live_collection,
+            vectors_config=VectorParams(size=state.vector_dim, distance=Distance.COSINE),
+        )
+        vector_store = QdrantVectorStore(client=client, collection_name=live_collection)
+        nodes = [TextNode(text=chunk) for chunk in make_chunks(args.live_chunks)]
+        start = time.perf_counter()
+        for offset in range(0, len(nodes), local_settings.EMBED_BATCH_SIZE):
+            batch = nodes[offset:offset + local_settings.EMBED_BATCH_SIZE]
+            for node, embedding in zip(batch, embed_model.get_text_embedding_batch([n.get_content() for n in batch])):
+                node.embedding = embedding
+            vector_store.add(batch)
+        elapsed = time.perf_counter() - start
+        print(f"{'live ingestion':<20} {len(nodes):>8} points {elapsed:>8.2f} s {len(nodes) / elapsed:>10.1f} points/s")
+    finally:
+        for collection in (import_collection, live_collection):
+            if client.collection_exists(collection):
+                client.delete_collection(collection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Cold-start profile: time to import the API app and time to build each lazy component.
+The import is run in a fresh interpreter with -X importtime and the slowest
+modules (cumulative) are listed, so regressions back to eager loading show up.
+
+Usage: python app/benchmarks/startup.py [--top 15] [--warmup]
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+
+def profile_import(top: int) -> None:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.backend"],
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise SystemExit("import app.backend failed")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, module = (part.strip() for part in line.replace("import time:", "|", 1).split("|"))
+        rows.append((int(cumulative_us), int(self_us), module))
+
+    print(f"import app.backend: {elapsed:.2f}s wall (including interpreter start)")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, module in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {module}")
+
+
+def profile_warmup() -> None:
+    from app import components
+
+    for name, getter in (("llm", components.get_chat_llm), ("rag", components.get_rag), ("agent", components.create_agent)):
+        start = time.perf_counter()
+        try:
+            getter()
+            print(f"{name:<6} built in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            print(f"{name:<6} failed after {time.perf_counter() - start:.2f}s: {e}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--warmup", action="store_true", help="Also time building LLM, RAG and agent")
+    args = parser.parse_args()
+
+    profile_import(args.top)
+    if args.warmup:
+        profile_warmup()
+
+
+if __name__ == "__main__":
+    main()
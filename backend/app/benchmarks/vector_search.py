@@ -0,0 +1,95 @@
+"""
+Search benchmark: in-process memmap backend (exact and IVF) vs. a Qdrant server.
+Clustered synthetic unit vectors are loaded into a temporary local collection and a
+scratch Qdrant collection; each backend answers the same queries. Reports p50/p95
+latency and recall@k against exact search. Scratch data is removed afterwards.
+
+Usage: python app/benchmarks/vector_search.py [--points 100000] [--dim 1024] [--nprobe 8 32] [--skip-qdrant]
+"""
+
+import argparse
+import tempfile
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Batch, Distance, VectorParams
+
+from app.config import local_settings
+from app.local_vector_store import MemmapVectorIndex
+
+
+def make_vectors(points: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    # Real embeddings cluster by topic; uniform random vectors would make IVF look worse than it is
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    vectors = centers[rng.integers(0, clusters, points)] + 0.5 * rng.standard_normal((points, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def measure(name: str, search, queries: np.ndarray, truth, top_k: int):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        latencies.append(time.perf_counter() - start)
+    recall = np.mean([len(set(found) & set(expected)) / top_k for found, expected in zip(results, truth or results)])
+    p50, p95 = np.percentile(latencies, [50, 95]) * 1000
+    print(f"{name:<24} p50 {p50:>8.2f} ms  p95 {p95:>8.2f} ms  recall@{top_k} {recall:.3f}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=local_settings.VECTOR_DIM)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, help="IVF partitions; defaults to sqrt(points)")
+    parser.add_argument("--nprobe", type=int, nargs="*", default=[8, 32])
+    parser.add_argument("--dtype", choices=["float32", "float16"], default=local_settings.LOCAL_VECTOR_DTYPE)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--skip-qdrant", action="store_true")
+    args = parser.parse_args()
+
+    vectors = make_vectors(args.points, args.dim, clusters=max(16, args.points // 500))
+    queries = make_vectors(args.queries, args.dim, clusters=max(16, args.points // 500), seed=1)
+    ids = [str(uuid.uuid4()) for _ in range(args.points)]
+    collection = f"benchmark_search_{uuid.uuid4().hex[:8]}"
+    print(f"{args.points} points, dim {args.dim}, {args.dtype}, {args.queries} queries")
+
+    with tempfile.TemporaryDirectory() as local_dir:
+        index = MemmapVectorIndex(local_dir, dim=args.dim, dtype=args.dtype)
+        start = time.perf_counter()
+        for offset in range(0, args.points, args.batch_size):
+            block = slice(offset, offset + args.batch_size)
+            index.upsert(ids[block], vectors[block], [{"row": i} for i in range(offset, min(offset + args.batch_size, args.points))])
+        print(f"{'local insert':<24} {time.perf_counter() - start:>8.2f} s")
+
+        truth = measure("local exact", lambda q: [r for r, _ in index.search(q, args.top_k, nprobe=0)], queries, None, args.top_k)
+        start = time.perf_counter()
+        index.build_ivf(args.nlist or int(np.sqrt(args.points)))
+        print(f"{'local build IVF':<24} {time.perf_counter() - start:>8.2f} s")
+        for nprobe in args.nprobe:
+            measure(f"local IVF nprobe={nprobe}", lambda q: [r for r, _ in index.search(q, args.top_k, nprobe=nprobe)],
+                    queries, truth, args.top_k)
+
+    if args.skip_qdrant:
+        return
+    qdrant = QdrantClient(host=local_settings.QDRANT_HOST, port=local_settings.QDRANT_PORT)
+    try:
+        qdrant.recreate_collection(collection_name=collection, vectors_config=VectorParams(size=args.dim, distance=Distance.COSINE))
+        for offset in range(0, args.points, args.batch_size):
+            block = slice(offset, offset + args.batch_size)
+            payloads = [{"row": i} for i in range(offset, min(offset + args.batch_size, args.points))]
+            qdrant.upsert(collection_name=collection, points=Batch(ids=ids[block], vectors=vectors[block].tolist(), payloads=payloads))
+        measure("qdrant", lambda q: [hit.payload["row"] for hit in qdrant.search(
+            collection_name=collection, query_vector=q.tolist(), limit=args.top_k, with_payload=True)], queries, truth, args.top_k)
+    finally:
+        if qdrant.collection_exists(collection):
+            qdrant.delete_collection(collection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Read-through caching for rarely changing database rows.
+Values are stored as JSON-compatible data so the same cache can live in process
+memory or in a shared SQLite file used by every worker on the host.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from app import metrics
+from app.config import local_settings
+
+
+class MemoryCacheBackend:
+    """Per-process LRU cache with a time-to-live on every entry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class SqliteCacheBackend:
+    """
+    Cache shared by all worker processes on one host, backed by a SQLite file.
+    Stand-in for a networked cache such as Redis in multi-worker deployments.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ttl),
+            )
+            # Evict expired entries, then the ones closest to expiry beyond the size limit
+            self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM cache WHERE key = ?", [(key,) for key in keys])
+
+
+def _make_backend() -> Optional[Any]:
+    backend = local_settings.CACHE_BACKEND.lower()
+    if backend == "memory":
+        return MemoryCacheBackend(local_settings.CACHE_MAX_ENTRIES)
+    if backend == "sqlite":
+        return SqliteCacheBackend(local_settings.CACHE_SQLITE_PATH, local_settings.CACHE_MAX_ENTRIES)
+    if backend == "none":
+        return None
+    raise ValueError(f"Unsupported cache backend: {local_settings.CACHE_BACKEND}")
+
+
+_backend = _make_backend()
+
+
+class ReadThroughCache:
+    """
+    Namespaced view on the configured cache backend.
+    Hits, misses and the hit ratio are reported under the cache name.
+    """
+
+    def __init__(self, name: str, ttl: float = local_settings.CACHE_TTL_SECONDS):
+        self.name = name
+        self.ttl = ttl
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def _record(self, outcome: str) -> None:
+        metrics.inc(f"cache_{outcome}_total", cache=self.name)
+        hits = metrics.get_counter("cache_hits_total", cache=self.name)
+        misses = metrics.get_counter("cache_misses_total", cache=self.name)
+        metrics.set_gauge("cache_hit_ratio", hits / (hits + misses), cache=self.name)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value for key without loading it on a miss."""
+        if _backend is None:
+            return None
+        value = _backend.get(self._key(key))
+        self._record("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        if _backend is not None and value is not None:
+            _backend.set(self._key(key), value, self.ttl)
+
+    def get_or_load(self, key: str, load: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """
+        Return the cached value for key, calling load() on a miss.
+        load must return JSON-compatible data; None results are not cached.
+        """
+        if _backend is None:
+            return load()
+        value = self.get(key)
+        if value is None:
+            value = load()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, *keys: str) -> None:
+        if _backend is not None:
+            _backend.delete(*(self._key(key) for key in keys))
@@ -0,0 +1,119 @@
+"""
+Cheap routing for chat turns that do not need the research agent.
+
+Greetings and thanks are answered directly without any LLM call. Follow-ups
+that only refer back to the conversation ("explain that more simply") get one
+plain LLM call with the history instead of a full ReAct loop with retrieval.
+Everything else goes to the agent.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+GREETING = "greeting"
+FOLLOWUP = "followup"
+AGENT = "agent"
+
+GREETING_WORDS = {"hi", "hello", "hey", "hiya", "morning", "evening", "thanks", "thank", "thx", "bye", "goodbye", "cheers"}
+THANKS_WORDS = {"thanks", "thank", "thx", "cheers"}
+FAREWELL_WORDS = {"bye", "goodbye"}
+# Words that may accompany a greeting without making it a question ("thanks so much for the help")
+FILLER_WORDS = {
+    "there", "you", "so", "much", "a", "lot", "all", "again", "good", "great", "ok", "okay", "oh", "and",
+    "for", "the", "your", "help", "very", "guys", "everyone", "folks", "bot", "assistant", "see", "later",
+}
+
+# Phrases that only make sense about the conversation itself
+FOLLOWUP_PATTERN = re.compile(
+    r"\b(above|previous answer|last answer|you said|you mentioned|rephrase|simpler|shorter|"
+    r"elaborate|in other words|tl;?dr|what do you mean|explain more|more detail)\b",
+    re.IGNORECASE,
+)
+# "it"/"this"/"that" alone also start new questions ("is it true that ..."), so they
+# only mark a follow-up together with a request to rework the previous answer
+ANAPHORA_PATTERN = re.compile(r"\b(that|this|it)\b", re.IGNORECASE)
+META_REQUEST_PATTERN = re.compile(
+    r"\b(explain|rephrase|elaborate|summari[sz]e|simplify|clarify|expand|break down|unpack|mean|means)\b",
+    re.IGNORECASE,
+)
+# Anything that asks for (new) sources needs the retrieval tool
+RESEARCH_PATTERN = re.compile(
+    r"\b(papers?|arxiv|research|studies|study|latest|recent|new|find|search|look up|fetch|sources?|"
+    r"citations?|references?|authors?|published)\b",
+    re.IGNORECASE,
+)
+MAX_FOLLOWUP_WORDS = 25
+
+FOLLOWUP_SYSTEM_PROMPT = (
+    "You are a research assistant helping users understand academic papers. "
+    "Answer the user's follow-up using only the conversation so far. "
+    "Do not invent papers, links or citations."
+)
+
+
+def route_message(message: str, message_history: Optional[List[Dict[str, Any]]] = None) -> str:
+    """
+    Decide how a chat turn is answered.
+
+    Args:
+        message: The current user message
+        message_history: Previous messages as sent by the frontend ({"content", "isBot"})
+
+    Returns:
+        str: GREETING, FOLLOWUP or AGENT
+    """
+    words = re.findall(r"[a-z']+", message.lower())
+    if RESEARCH_PATTERN.search(message):
+        # "hey, find LLM papers" is a research request behind a greeting
+        return AGENT
+    # Only when nothing else is said: "hello what is RLHF" is a question
+    if (
+        words
+        and len(words) <= 6
+        and words[0] in GREETING_WORDS
+        and all(word in GREETING_WORDS or word in FILLER_WORDS for word in words)
+        and "?" not in message
+    ):
+        return GREETING
+    if (
+        message_history
+        and len(words) <= MAX_FOLLOWUP_WORDS
+        and (
+            FOLLOWUP_PATTERN.search(message)
+            or (ANAPHORA_PATTERN.search(message) and META_REQUEST_PATTERN.search(message))
+        )
+    ):
+        return FOLLOWUP
+    return AGENT
+
+
+def greeting_reply(message: str) -> str:
+    words = set(re.findall(r"[a-z']+", message.lower()))
+    if words & THANKS_WORDS:
+        return "You're welcome! Let me know if you want to dig into more papers."
+    if words & FAREWELL_WORDS:
+        return "Goodbye! Come back any time you have a research question."
+    return "Hello! I'm your research assistant. Ask me about a topic and I'll find and summarize relevant arXiv papers."
+
+
+async def answer_followup(llm, message: str, message_history: List[Dict[str, Any]]) -> str:
+    """
+    Answer a follow-up with a single LLM call over the conversation history.
+
+    Args:
+        llm: Shared LLM instance
+        message: The current user message
+        message_history: Previous messages as sent by the frontend
+
+    Returns:
+        str: The LLM's answer
+    """
+    from llama_index.core.llms import ChatMessage
+    from app.prompting import build_chat_history
+
+    # Static system prompt first, then the append-only history: a stable prompt prefix
+    messages = [ChatMessage(role="system", content=FOLLOWUP_SYSTEM_PROMPT)]
+    messages.extend(build_chat_history(message_history))
+    messages.append(ChatMessage(role="user", content=message))
+    response = await llm.achat(messages)
+    return response.message.content or ""
@@ -0,0 +1,297 @@
+"""
+Chat turns for the HTTP endpoint and the per-conversation WebSocket channel.
+
+`answer_turn` routes and answers one message and is shared by both endpoints.
+`ChatSession` holds the server-side state of one WebSocket connection: the
+conversation history (loaded once on connect instead of re-sent by the client
+every turn), a bounded outbox that streams answer deltas to the client, the
+running turn so the client can cancel it, and a batch of messages persisted
+together instead of one POST per message.
+
+Client -> server frames:
+    {"type": "message", "content": "..."}   start a turn
+    {"type": "cancel"}                      abort the running turn
+Server -> client frames:
+    ready, start, delta, done, cancelled, error, indexing (see ChatSession)
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import WebSocket
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+
+from app import chat_router, components, metrics, paper_progress
+from app.config import local_settings
+from app.crud import create_messages, get_conversation_by_id, get_messages_by_conversation_id
+from app.db import engine
+from app.model import InsertMessage
+from app.prompting import build_chat_history, track_prompt_stats
+
+
+async def answer_turn(message: str, message_history: Optional[List[Dict[str, Any]]], conversation_id: Optional[str],
+                      fetched_papers: List[str], on_delta: Optional[Callable[[str], Awaitable[None]]] = None):
+    """
+    Route and answer one chat message.
+
+    Args:
+        message: The current user message
+        message_history: Previous messages ({"content", "isBot"}), oldest first
+        conversation_id: Used to label prompt statistics
+        fetched_papers: Receives the arxiv IDs of papers fetched during the turn
+        on_delta: Awaited with pieces of the agent's final answer as they are generated
+
+    Returns:
+        The reply (a string, or the agent's response object)
+    """
+    route = chat_router.AGENT
+    if local_settings.CHAT_ROUTER_ENABLED:
+        route = chat_router.route_message(message, message_history)
+    metrics.inc("chat_turns_total", route=route)
+
+    if route == chat_router.GREETING:
+        metrics.observe("chat_llm_calls_per_turn", 0, route=route)
+        return chat_router.greeting_reply(message)
+    if route == chat_router.FOLLOWUP:
+        llm = await run_in_threadpool(components.get_chat_llm)
+        with track_prompt_stats(f"conversation {conversation_id}"):
+            response = await chat_router.answer_followup(llm, message, message_history)
+        metrics.observe("chat_llm_calls_per_turn", 1, route=route)
+        return response
+    # Fresh agent per request on top of the shared LLM/RAG (built on first use unless warmed up)
+    agent = await run_in_threadpool(components.create_agent, fetched_papers)
+    # History follows the static system prompt instead of being pasted in front of
+    # the current message, so consecutive turns share a growing prompt prefix
+    chat_history = build_chat_history(message_history)
+    with track_prompt_stats(f"conversation {conversation_id}"):
+        return await components.run_agent(agent, message, chat_history=chat_history, on_delta=on_delta)
+
+
+def error_reply(error_msg: str) -> str:
+    """User-facing reply for a failed turn."""
+    if "max iterations" in error_msg.lower() or "time budget" in error_msg.lower():
+        return ("This question needed more research steps than I can take for a single message. "
+                "Could you narrow it down, for example to a specific method, dataset or paper?")
+    if "Failed to fetch from arXiv" in error_msg:
+        if "503" in error_msg:
+            return ("I'm having trouble connecting to the arXiv research database at the moment. "
+                    "The server is temporarily unavailable (HTTP 503), which usually indicates "
+                    "either maintenance or high traffic. Please try again in a few minutes. "
+                    "In the meantime, I can still help answer your question based on my general knowledge.")
+        if "429" in error_msg or "Too Many Requests" in error_msg:
+            return ("I've reached the rate limit for arXiv's API. "
+                    "This happens when there are many research requests in a short period. "
+                    "Please try again in a few minutes. "
+                    "I can still help with questions that don't require the latest research papers.")
+        if "timeout" in error_msg.lower():
+            return ("The connection to arXiv's research database timed out. "
+                    "This might be due to network issues or high server load. "
+                    "Please try again shortly. "
+                    "In the meantime, I can help with questions based on my general knowledge.")
+        return ("I'm having trouble connecting to the arXiv research database at the moment. "
+                "This could be due to network issues or rate limiting. "
+                "I can still help answer your question based on my general knowledge. "
+                "What would you like to know?")
+    if "vector store" in error_msg.lower() or "qdrant" in error_msg.lower():
+        return ("I'm experiencing an issue with my research database. "
+                "This is likely a temporary problem with how I store and retrieve research information. "
+                "Let me try to answer based on my general knowledge instead.")
+    return (f"I encountered an error while processing your request. "
+            f"Error details: {error_msg}. "
+            f"Please try again with a different question.")
+
+
+def conversation_exists(conversation_id: str) -> bool:
+    with Session(engine) as session:
+        return get_conversation_by_id(session=session, conversation_id=conversation_id) is not None
+
+
+def _write_messages(messages: List[InsertMessage]) -> List[str]:
+    with Session(engine) as session:
+        return create_messages(session=session, messages=messages)
+
+
+def _load_history(conversation_id: str) -> List[Dict[str, Any]]:
+    with Session(engine) as session:
+        messages = get_messages_by_conversation_id(session=session, conversation_id=conversation_id)
+    messages = sorted(messages, key=lambda message: message.created_at)[-local_settings.CHAT_HISTORY_MAX_MESSAGES:]
+    return [{"content": message.content, "isBot": message.is_bot} for message in messages]
+
+
+class MessageBatcher:
+    """Buffers a conversation's messages and inserts them in one transaction per batch."""
+
+    def __init__(self, batch_size: int, interval: float):
+        self.batch_size = batch_size
+        self.interval = interval
+        self._pending: List[InsertMessage] = []
+        self._oldest: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def add(self, *messages: InsertMessage) -> None:
+        self._pending.extend(messages)
+        self._oldest = self._oldest or time.monotonic()
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+
+    async def flush_if_due(self) -> None:
+        if self._oldest is not None and time.monotonic() - self._oldest >= self.interval:
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            batch, self._pending, self._oldest = self._pending, [], None
+            if not batch:
+                return
+            try:
+                await run_in_threadpool(_write_messages, batch)
+                metrics.inc("chat_ws_persisted_messages_total", len(batch))
+                metrics.inc("chat_ws_persist_batches_total")
+            except Exception as e:
+                # Keep the messages for the next attempt instead of losing the turn
+                print(f"⚠️ Persisting {len(batch)} chat messages failed: {e}")
+                self._pending[:0] = batch
+                self._oldest = self._oldest or time.monotonic()
+
+
+class ChatSession:
+    """
+    Server-side state of one WebSocket connection to a conversation.
+
+    Sends: {"type": "ready", "history": n}; per turn {"type": "start", "turn": n},
+    any number of {"type": "delta", "turn": n, "text": ...}, then {"type": "done",
+    "turn": n, "response": ..., "indexing"?: ...} or {"type": "cancelled", "turn": n};
+    {"type": "indexing", ...} once fetched papers are fully indexed;
+    {"type": "error", "message": ...} for rejected frames.
+    """
+
+    def __init__(self, websocket: WebSocket, conversation_id: str):
+        self.websocket = websocket
+        self.conversation_id = conversation_id
+        self.history: List[Dict[str, Any]] = []
+        self.turns = 0
+        self._outbox: asyncio.Queue = asyncio.Queue(maxsize=local_settings.WS_SEND_QUEUE_SIZE)
+        self._unsent_delta = ""
+        self._turn: Optional[asyncio.Task] = None
+        self._background: List[asyncio.Task] = []
+        self._batcher = MessageBatcher(local_settings.WS_PERSIST_BATCH_MESSAGES, local_settings.WS_PERSIST_INTERVAL_SECONDS)
+
+    async def run(self) -> None:
+        """Serve the connection until the client disconnects."""
+        self.history = await run_in_threadpool(_load_history, self.conversation_id)
+        sender = asyncio.create_task(self._send_loop())
+        flusher = asyncio.create_task(self._flush_loop())
+        metrics.inc("chat_ws_connections_total")
+        try:
+            await self._send({"type": "ready", "history": len(self.history)})
+            while True:
+                try:
+                    frame = json.loads(await self.websocket.receive_text())
+                except ValueError:
+                    frame = {}
+                await self._handle(frame)
+        finally:
+            for task in [self._turn, sender, flusher, *self._background]:
+                if task is not None:
+                    task.cancel()
+            await asyncio.gather(*(t for t in [self._turn, sender, flusher, *self._background] if t is not None),
+                                 return_exceptions=True)
+            await self._batcher.flush()
+
+    async def _handle(self, frame: Dict[str, Any]) -> None:
+        kind = frame.get("type") if isinstance(frame, dict) else None
+        if kind == "cancel":
+            if self._turn is not None and not self._turn.done():
+                self._turn.cancel()
+            return
+        if kind != "message" or not str(frame.get("content", "")).strip():
+            await self._send({"type": "error", "message": "Expected {\"type\": \"message\", \"content\": ...} or {\"type\": \"cancel\"}"})
+            return
+        if self._turn is not None and not self._turn.done():
+            # One turn at a time; the client can cancel the running one first
+            await self._send({"type": "error", "message": "A reply is still being generated"})
+            return
+        self.turns += 1
+        self._turn = asyncio.create_task(self._run_turn(self.turns, str(frame["content"])))
+
+    async def _run_turn(self, turn: int, content: str) -> None:
+        await self._send({"type": "start", "turn": turn})
+        fetched_papers: List[str] = []
+
+        async def on_delta(text: str) -> None:
+            await self._send_delta(turn, text)
+
+        try:
+            response = await answer_turn(content, self.history, self.conversation_id, fetched_papers, on_delta)
+            reply = str(response)
+        except asyncio.CancelledError:
+            metrics.inc("chat_ws_cancelled_turns_total")
+            self._unsent_delta = ""
+            # The question is kept; the partial answer is not
+            self.history.append({"content": content, "isBot": False})
+            await self._batcher.add(InsertMessage(conversation_id=self.conversation_id, content=content, is_bot=False))
+            # Never wait here: on disconnect the sender is gone and the outbox may be full
+            if not self._outbox.full():
+                self._outbox.put_nowait({"type": "cancelled", "turn": turn})
+            return
+        except Exception as e:
+            print(f"Error in chat turn: {e}")
+            reply = error_reply(str(e))
+
+        await self._flush_delta(turn)
+        done = {"type": "done", "turn": turn, "response": reply}
+        if fetched_papers:
+            done["indexing"] = paper_progress.progress(fetched_papers)
+            if not done["indexing"]["full_text_ready"]:
+                self._background.append(asyncio.create_task(self._watch_indexing(fetched_papers)))
+        await self._send(done)
+
+        self.history.append({"content": content, "isBot": False})
+        self.history.append({"content": reply, "isBot": True})
+        del self.history[:-local_settings.CHAT_HISTORY_MAX_MESSAGES]
+        await self._batcher.add(
+            InsertMessage(conversation_id=self.conversation_id, content=content, is_bot=False),
+            InsertMessage(conversation_id=self.conversation_id, content=reply, is_bot=True),
+        )
+
+    async def _watch_indexing(self, arxiv_ids: List[str]) -> None:
+        """Push the indexing progress once full-text retrieval is ready (see paper_progress.py)."""
+        deadline = time.monotonic() + local_settings.WS_INDEXING_WATCH_SECONDS
+        while time.monotonic() < deadline:
+            await asyncio.sleep(local_settings.WS_INDEXING_POLL_SECONDS)
+            progress = await run_in_threadpool(paper_progress.progress, arxiv_ids)
+            if progress["full_text_ready"]:
+                await self._send({"type": "indexing", **progress})
+                return
+
+    # --- Outgoing frames ---
+
+    async def _send(self, frame: Dict[str, Any]) -> None:
+        # Waits while the outbox is full, so a slow client slows the producer down
+        await self._outbox.put(frame)
+
+    async def _send_delta(self, turn: int, text: str) -> None:
+        # Deltas never wait: while the client is behind they are merged into one frame
+        self._unsent_delta += text
+        if not self._outbox.full():
+            await self._flush_delta(turn)
+        else:
+            metrics.inc("chat_ws_coalesced_deltas_total")
+
+    async def _flush_delta(self, turn: int) -> None:
+        if self._unsent_delta:
+            text, self._unsent_delta = self._unsent_delta, ""
+            await self._send({"type": "delta", "turn": turn, "text": text})
+
+    async def _send_loop(self) -> None:
+        while True:
+            frame = await self._outbox.get()
+            await self.websocket.send_json(frame)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(min(1.0, local_settings.WS_PERSIST_INTERVAL_SECONDS))
+            await self._batcher.flush_if_due()
@@ -0,0 +1,235 @@
+"""
+Lazily constructed heavy components of the chat pipeline.
+
+The LLM client, the ArxivRAG instance (embedding model + Qdrant connection) and
+the agent tools are built on first use instead of at import time, so the API
+process starts quickly and stays up when Qdrant or the model server is down.
+`warmup()` builds everything ahead of traffic; `readiness()` reports progress.
+
+These shared components are read-only after construction and no LlamaIndex
+global Settings are mutated. Agents keep per-run state, so `create_agent()`
+returns a fresh ReActAgent for every request on top of the shared pieces.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app import metrics, paper_progress
+from app.config import local_settings
+
+SYSTEM_PROMPT_PATH = os.path.join(os.path.dirname(__file__), "system_prompt.txt")
+
+_lock = threading.RLock()
+_components: Dict[str, Any] = {}
+_errors: Dict[str, str] = {}
+_rag_key: Optional[tuple] = None
+
+
+def _build(name: str, factory: Callable[[], Any]) -> Any:
+    component = _components.get(name)
+    if component is not None:
+        return component
+    with _lock:
+        if name not in _components:
+            start = time.perf_counter()
+            try:
+                _components[name] = factory()
+            except Exception as e:
+                _errors[name] = str(e)
+                raise
+            _errors.pop(name, None)
+            elapsed = time.perf_counter() - start
+            metrics.set_gauge("component_build_seconds", elapsed, component=name)
+            print(f"Initialized {name} in {elapsed:.2f}s")
+        return _components[name]
+
+
+def _make_llm():
+    from app.llm_providers import get_llm
+    from app.prompting import install_prompt_metrics
+
+    install_prompt_metrics()
+
+    # Initialize LLM based on configuration
+    if local_settings.LLM_PROVIDER.lower() == "ollama":
+        llm = get_llm(
+            provider=local_settings.LLM_PROVIDER,
+            model_name=local_settings.OLLAMA_MODEL,
+            temperature=local_settings.LLM_TEMPERATURE,
+            max_tokens=local_settings.LLM_MAX_TOKENS,
+            base_url=local_settings.OLLAMA_BASE_URL,
+            context_window=local_settings.LLM_CONTEXT_WINDOW
+        )
+    else:  # OpenAI
+        llm = get_llm(
+            provider=local_settings.LLM_PROVIDER,
+            model_name=local_settings.OPENAI_MODEL,
+            temperature=local_settings.LLM_TEMPERATURE,
+            max_tokens=local_settings.LLM_MAX_TOKENS
+        )
+    return llm
+
+
+def _make_rag():
+    from app.arxiv_rag import ArxivRAG
+
+    # Collection and embedding model come from the index state, which the
+    # embedding migration job switches; existing data is never dropped here
+    return ArxivRAG.for_active_index()
+
+
+def read_prompt_file(file_path):
+    """Read the system prompt from a file."""
+    with open(file_path, 'r') as file:
+        return file.read().strip()
+
+
+def _make_tools():
+    from llama_index.core.prompts import PromptTemplate
+    from app.arxiv_rag import get_lazy_load_and_query
+
+    # The tool connects to Qdrant on its first call, not here
+    lazy_load_and_query = get_lazy_load_and_query(llm=get_chat_llm(), get_rag=get_rag)
+    react_header = PromptTemplate(read_prompt_file(SYSTEM_PROMPT_PATH))
+    return [lazy_load_and_query], react_header
+
+
+def get_chat_llm():
+    return _build("llm", _make_llm)
+
+
+def get_rag():
+    from app.index_state import load_index_state
+
+    global _rag_key
+    # Rebuild when an embedding migration switched collections or toggled dual-read
+    key = load_index_state().key
+    with _lock:
+        if _rag_key != key:
+            _components.pop("rag", None)
+            _rag_key = key
+    return _build("rag", _make_rag)
+
+
+def get_tools():
+    return _build("tools", _make_tools)
+
+
+def _memoize_per_request(tool: Callable, fetched_papers: Optional[List[str]] = None) -> Callable:
+    """
+    Wrap a tool so that repeated calls with the same (normalized) question
+    within one agent run return the first result instead of searching again.
+    Papers the tool fetches from arXiv are appended to fetched_papers.
+    """
+    from app.arxiv_rag import normalize_query
+
+    results: Dict[str, Any] = {}
+
+    @wraps(tool)
+    def memoized(user_question: str):
+        key = normalize_query(user_question)
+        if key in results:
+            metrics.inc("agent_tool_cache_hits_total", tool=tool.__name__)
+            return results[key]
+        metrics.inc("agent_tool_calls_total", tool=tool.__name__)
+        with paper_progress.collect_papers(fetched_papers if fetched_papers is not None else []):
+            results[key] = tool(user_question)
+        return results[key]
+
+    return memoized
+
+
+def create_agent(fetched_papers: Optional[List[str]] = None):
+    """
+    New ReActAgent for one request. Construction is cheap: the LLM client,
+    RAG instance and tools are shared, only the agent's run state and the
+    per-request tool memo are private.
+
+    Args:
+        fetched_papers: Receives the arxiv IDs of papers fetched from arXiv during the run
+    """
+    from llama_index.core.agent.workflow import ReActAgent
+
+    tools, react_header = get_tools()
+    agent = ReActAgent(llm=get_chat_llm(),
+                       tools=[_memoize_per_request(tool, fetched_papers) for tool in tools],
+                       verbose=True,)
+    agent.update_prompts({"react_header": react_header})
+    return agent
+
+
+async def run_agent(agent, user_message: str, chat_history=None,
+                    on_delta: Optional[Callable[[str], Awaitable[None]]] = None):
+    """
+    Run the agent within the per-request step and time budget.
+
+    Args:
+        agent: Agent from create_agent()
+        user_message: The current user message
+        chat_history: Previous turns as chat messages (see prompting.build_chat_history)
+        on_delta: Awaited with each new piece of the final answer while it is generated
+
+    Returns:
+        The agent's final response
+
+    Raises:
+        TimeoutError: If the run exceeds AGENT_TIMEOUT_SECONDS
+    """
+    from llama_index.core.agent.workflow import AgentOutput, AgentStream
+
+    handler = agent.run(user_message, chat_history=chat_history, max_iterations=local_settings.AGENT_MAX_ITERATIONS)
+    llm_calls = 0
+
+    async def consume():
+        nonlocal llm_calls
+        answer_sent = 0
+        async for event in handler.stream_events():
+            # Every AgentOutput event is the result of one LLM call
+            if isinstance(event, AgentOutput):
+                llm_calls += 1
+                answer_sent = 0
+            elif on_delta is not None and isinstance(event, AgentStream):
+                # ReAct output: only the text after "Answer:" is meant for the user
+                _, marker, answer = event.response.partition("Answer:")
+                answer = answer.lstrip()
+                if marker and len(answer) > answer_sent:
+                    await on_delta(answer[answer_sent:])
+                    answer_sent = len(answer)
+        return await handler
+
+    try:
+        return await asyncio.wait_for(consume(), timeout=local_settings.AGENT_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        await handler.cancel_run()
+        raise TimeoutError(f"Agent exceeded the time budget of {local_settings.AGENT_TIMEOUT_SECONDS}s")
+    except asyncio.CancelledError:
+        # The client aborted the generation; stop the workflow instead of letting it finish unseen
+        await handler.cancel_run()
+        raise
+    finally:
+        metrics.observe("chat_llm_calls_per_turn", llm_calls, route="agent")
+
+
+def warmup() -> None:
+    """Build every component now; failures are recorded and retried on first use."""
+    for getter in (get_chat_llm, get_rag, get_tools):
+        try:
+            getter()
+        except Exception as e:
+            print(f"Warmup of {getter.__name__} failed: {e}")
+
+
+def readiness() -> Dict[str, Any]:
+    components = {}
+    for name in ("llm", "rag", "tools"):
+        if name in _components:
+            components[name] = "ready"
+        elif name in _errors:
+            components[name] = f"error: {_errors[name]}"
+        else:
+            components[name] = "pending"
+    return {"ready": all(state == "ready" for state in components.values()), "components": components}
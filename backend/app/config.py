@@ -32,17 +32,69 @@ class Settings(BaseSettings):
     QDRANT_PORT: int = 6333
     COLLECTION_NAME: str = "arxiv_ml_papers"
     VECTOR_DIM: int = 1024  # Default for BGE-Large embeddings
+    # Active collection/embedding model, written by the embedding migration job
+    INDEX_STATE_PATH: str = "index_state.json"
+    MIGRATION_BATCH_SIZE: int = 256  # Points re-embedded per batch
+    MIGRATION_BATCHES_PER_SECOND: float = 2.0  # Keeps migration load off Qdrant and the embedding service
+    VECTOR_BACKEND: str = "qdrant"  # "qdrant" (server) or "local" (in-process memory map, no server needed)
+    LOCAL_VECTOR_PATH: str = "vector_data"  # Directory of the local collections
+    LOCAL_VECTOR_DTYPE: str = "float32"  # "float16" halves memory and disk use at a small recall cost
+    LOCAL_VECTOR_NPROBE: int = 0  # IVF partitions scanned per query; 0 = exact search
 
     # Embedding settings
     OPENAI_EMBED_MODEL: str = "text-embedding-3-small"
     OLLAMA_EMBED_MODEL: str = "bge-large"
+    EMBED_BATCH_SIZE: int = 32  # Chunks embedded and upserted per batch
+    EMBED_BACKEND: str = "huggingface"  # "huggingface" (in-process), "onnx" (worker pool, bge only) or "remote" (shared server)
+    ONNX_MODEL_DIR: str = "models/bge-large-en-v1.5-onnx"
+    ONNX_QUANTIZE_INT8: bool = False
+    EMBED_WORKERS: int = 2  # Embedding processes in the ONNX worker pool
+    EMBED_THREADS_PER_WORKER: int = 2
+    EMBED_MAX_BATCH: int = 32  # Upper bound for dynamic batches
+    EMBED_BATCH_WAIT_MS: float = 5.0  # How long the batcher waits to fill a batch
+    EMBED_QUEUE_SIZE: int = 1024  # Pending texts before callers block
+    # With EMBED_BACKEND="remote" API workers call one shared embedding server
+    # (python app/embedding_server.py), which itself uses EMBED_SERVER_BACKEND
+    EMBED_SERVICE_URL: str = "http://localhost:8001"
+    EMBED_SERVER_BACKEND: str = "huggingface"
+    EMBED_SERVER_PORT: int = 8001
 
     # ArXiv settings
+    ARXIV_API_URL: str = "http://export.arxiv.org/api/query"
     MAX_RESULTS: int = 5
+    PDF_DOWNLOAD_WORKERS: int = 4  # Concurrent PDF downloads while a feed is being parsed
+    HARVEST_PAGE_SIZE: int = 100  # Entries per arXiv API page when bulk harvesting
+    HARVEST_EMBED_WORKERS: int = 2  # Parallel embed+upsert batches when bulk harvesting
+    HARVEST_CHECKPOINT_PATH: str = "harvest_checkpoint.json"
     SHORT_SUMMARY_LENGTH: int = 100
+    RECENT_PAPERS_DAYS: int = 365  # What "recent"/"latest" means for retrieval filters
+    # Near-duplicate chunk detection at ingestion (app/dedup.py)
+    SIMHASH_MAX_DISTANCE: int = 3  # Chunks whose 64-bit SimHashes differ in at most this many bits are duplicates
+    SIMHASH_BANDS: int = 4  # Must be > SIMHASH_MAX_DISTANCE so near-duplicates always share a band
+    SIMHASH_CANDIDATE_LIMIT: int = 512  # Stored chunks compared per indexed paper
+    # Context packing of retrieved chunks (app/context_packing.py)
+    CONTEXT_RESERVED_TOKENS: int = 1500  # System prompt, tool descriptions and history
+    CHARS_PER_TOKEN: float = 4.0  # Used to estimate tokens without a tokenizer
+    CONTEXT_DEDUP_THRESHOLD: float = 0.8  # Shingle Jaccard similarity above which chunks count as duplicates
     MAX_RETRIES: int = 3
     RETRY_DELAY_BASE: float = 2.0
     RETRY_JITTER: float = 0.5
+    ARXIV_RATE_LIMIT_PER_SECOND: float = 1 / 3  # arXiv asks for at most one API request every 3 seconds
+    ARXIV_RATE_LIMIT_BURST: int = 1
+    ARXIV_RATE_LIMIT_MAX_WAIT: float = 30.0  # Seconds a request may queue for a token before failing
+    ARXIV_RATE_LIMIT_BACKEND: str = "memory"  # Options: "memory" or "sqlite" (shared through CACHE_SQLITE_PATH)
+    ARXIV_CIRCUIT_FAILURE_THRESHOLD: int = 3  # Consecutive failed fetches before the circuit opens
+    ARXIV_CIRCUIT_RESET_SECONDS: float = 60.0
+    ARXIV_FEED_CACHE_TTL: float = 3600.0  # Last good feed per query, served while the circuit is open
+    # Cold queries embed abstracts first, full text in the background. Opt-in: the first answer only sees abstracts,
+    # and with several workers /chat/indexing needs CACHE_BACKEND="sqlite" to see progress made by another worker
+    PROGRESSIVE_INDEXING: bool = False
+    PREFETCH_ENABLED: bool = False  # Index papers related to a cold query, and weakly matched topics, in the background
+    PREFETCH_QUERIES_PER_COLD_QUERY: int = 3  # Related arXiv searches derived from each cold query
+    PREFETCH_QUERIES_PER_MINUTE: float = 2.0  # Prefetch budget, on top of the shared arXiv rate limit
+    PREFETCH_QUEUE_SIZE: int = 20  # Further related searches are dropped while the queue is full
+    PREFETCH_MAX_RESULTS: int = 5  # Papers fetched per related search
+    PREFETCH_WEAK_SCORE: float = 0.5  # Best cosine score below which a question's own topic is prefetched
 
     # LLM settings
     LLM_PROVIDER: str = "openai"  # Options: "openai" or "ollama"
@@ -50,9 +102,49 @@ class Settings(BaseSettings):
     #OLLAMA_MODEL: str = "deepseek-coder:latest"
     OLLAMA_MODEL: str = "deepseek-r1:8b"
     OLLAMA_BASE_URL: str = "http://ollama:11434"
+    OLLAMA_KEEP_ALIVE: str = "30m"  # Keep the model and its KV cache loaded between requests
+    OLLAMA_NUM_KEEP: int = 1024  # Prompt tokens (the static system prompt) kept when the context shifts
+    CHAT_HISTORY_MAX_MESSAGES: int = 20  # History messages passed to the agent
+    CHAT_HISTORY_BLOCK: int = 10  # Old messages are dropped in blocks of this size to keep the prefix stable
     LLM_TEMPERATURE: float = 0.0
     LLM_MAX_TOKENS: int = 512
     LLM_CONTEXT_WINDOW: int = 4096
+    WARMUP_ON_STARTUP: bool = True  # Build LLM/RAG/agent in the background at startup instead of on first request
+    AGENT_MAX_ITERATIONS: int = 6  # ReAct steps (LLM calls) allowed per chat turn
+    AGENT_TIMEOUT_SECONDS: float = 90.0  # Wall-clock budget per chat turn
+    CHAT_ROUTER_ENABLED: bool = True  # Answer greetings and follow-ups without the research agent
+    WS_SEND_QUEUE_SIZE: int = 32  # Frames buffered per WebSocket; answer deltas are merged while it is full
+    WS_PERSIST_BATCH_MESSAGES: int = 10  # WebSocket turns are stored in batches of this many messages
+    WS_PERSIST_INTERVAL_SECONDS: float = 2.0  # ... or once the oldest unsaved message is this old
+    WS_INDEXING_POLL_SECONDS: float = 2.0  # How often a socket checks for finished full-text indexing
+    WS_INDEXING_WATCH_SECONDS: float = 300.0  # Give up pushing indexing progress after this long
+
+    # Database maintenance settings
+    DELETE_CHUNK_SIZE: int = 5000  # Rows removed per transaction by bulk deletes
+    MESSAGE_PREVIEW_LENGTH: int = 120  # Characters kept in Conversations.last_message_preview
+
+    # Cache settings
+    CACHE_BACKEND: str = "memory"  # Options: "memory", "sqlite" (shared by workers on one host) or "none"
+    CACHE_TTL_SECONDS: float = 300.0
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_SQLITE_PATH: str = "/tmp/conversation_chatbot_cache.sqlite3"
+    # Reuse vector search results until the collection changes. Collection versions are per process with the
+    # "memory" backend, so writes by the CLIs (harvest, snapshot import) only reach API workers through "sqlite"
+    # or once RETRIEVAL_CACHE_TTL expires
+    RETRIEVAL_CACHE_ENABLED: bool = True
+    RETRIEVAL_CACHE_TTL: float = 900.0
+
+    # HTTP response settings
+    FAST_JSON_RESPONSES: bool = False  # Serialize message/conversation lists without jsonable_encoder (orjson from the fast-json extra if installed)
+    COMPRESSION: str = "gzip"  # Options: "none", "gzip" or "br" (needs brotli-asgi, the brotli extra)
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # Bytes; smaller responses are sent uncompressed
+
+    # Outbound HTTP client settings (arXiv, PDFs, LLM providers)
+    HTTP_POOL_CONNECTIONS: int = 10  # Idle keep-alive connections kept per pool
+    HTTP_POOL_MAXSIZE: int = 20  # Maximum concurrent connections per pool
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_TIMEOUT: float = 60.0
+    HTTP2_ENABLED: bool = True  # Used when the h2 package is installed
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -0,0 +1,139 @@
+"""
+Packs retrieved chunks into the context handed to the agent.
+
+Chunks are grouped by paper, consecutive chunks of a paper are merged back into
+one excerpt, near-duplicate chunks are dropped and the result is trimmed to a
+token budget derived from LLM_CONTEXT_WINDOW. Every retrieved paper keeps at
+least its title, link and short summary; excerpts get the remaining budget.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from app import metrics
+from app.config import local_settings
+
+# create_nodes_from_papers prefixes the first chunk with the paper metadata
+FULL_TEXT_MARKER = "Full Text:\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count; good enough for budgeting without loading a tokenizer."""
+    return int(len(text) / local_settings.CHARS_PER_TOKEN) + 1
+
+
+def context_token_budget() -> int:
+    """Tokens available for retrieved context after the prompt and the answer."""
+    budget = local_settings.LLM_CONTEXT_WINDOW - local_settings.LLM_MAX_TOKENS - local_settings.CONTEXT_RESERVED_TOKENS
+    return max(budget, 256)
+
+
+def short_summary(summary: str, length: int = local_settings.SHORT_SUMMARY_LENGTH) -> str:
+    """Summary cut at the last full sentence within length characters."""
+    if len(summary) <= length:
+        return summary
+    snippet = summary[:length]
+    last_index = snippet.rindex(".") if "." in snippet else len(snippet)
+    return summary[:last_index] + "..."
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = re.findall(r"\w+", text.lower())
+    return {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut text to max_tokens, preferring a sentence boundary."""
+    max_chars = int(max_tokens * local_settings.CHARS_PER_TOKEN)
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    boundary = cut.rfind(". ")
+    if boundary > max_chars // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + " ..."
+
+
+def _group_by_paper(retrieved_nodes: List[Any]) -> List[Dict[str, Any]]:
+    """Papers ordered by their best chunk score, each with its distinct chunks."""
+    papers: Dict[str, Dict[str, Any]] = {}
+    kept_shingles: List[set] = []
+    for node in retrieved_nodes:
+        metadata = node.metadata or {}
+        key = metadata.get("link") or metadata.get("title", "")
+        text = node.get_content()
+        if FULL_TEXT_MARKER in text:
+            text = text.split(FULL_TEXT_MARKER, 1)[1]
+        shingles = _shingles(text)
+        if any(_jaccard(shingles, other) >= local_settings.CONTEXT_DEDUP_THRESHOLD for other in kept_shingles):
+            metrics.inc("context_chunks_deduplicated_total")
+            continue
+        kept_shingles.append(shingles)
+
+        score = getattr(node, "score", None) or 0.0
+        paper = papers.setdefault(key, {"metadata": metadata, "score": score, "chunks": {}})
+        paper["score"] = max(paper["score"], score)
+        paper["chunks"][metadata.get("chunk", len(paper["chunks"]) + 1)] = text
+    return sorted(papers.values(), key=lambda paper: paper["score"], reverse=True)
+
+
+def _merge_adjacent(chunks: Dict[int, str]) -> List[str]:
+    """Join runs of consecutive chunk numbers; chunks are contiguous slices of the paper."""
+    excerpts: List[str] = []
+    previous: Optional[int] = None
+    for index in sorted(chunks):
+        if previous is not None and index == previous + 1:
+            excerpts[-1] += chunks[index]
+        else:
+            excerpts.append(chunks[index])
+        previous = index
+    return [excerpt.strip() for excerpt in excerpts if excerpt.strip()]
+
+
+def pack_context(retrieved_nodes: List[Any], token_budget: Optional[int] = None) -> List[str]:
+    """
+    Turn retrieved nodes into one context block per paper within the token budget.
+
+    Args:
+        retrieved_nodes: Nodes (or NodeWithScore) returned by the retriever
+        token_budget: Tokens to fill; defaults to context_token_budget()
+
+    Returns:
+        list[str]: One block per paper, best-scoring paper first
+    """
+    if token_budget is None:
+        token_budget = context_token_budget()
+    papers = _group_by_paper(retrieved_nodes)
+
+    headers = []
+    for paper in papers:
+        metadata = paper["metadata"]
+        summary = metadata.get("paper_summary", "No summary available")
+        headers.append(
+            f"📄 {metadata.get('title', 'Untitled')}\n\n🔗 {metadata.get('link', 'No link')}\n\n📝 {short_summary(summary)}\n"
+        )
+    # Headers always fit so no paper is lost; excerpts share what is left
+    remaining = token_budget - sum(estimate_tokens(header) for header in headers)
+
+    blocks = []
+    for position, (paper, header) in enumerate(zip(papers, headers)):
+        share = remaining // (len(papers) - position) if remaining > 0 else 0
+        excerpt_parts = []
+        used = 0
+        for excerpt in _merge_adjacent(paper["chunks"]):
+            if share - used <= 0:
+                break
+            excerpt = _truncate(excerpt, share - used)
+            used += estimate_tokens(excerpt)
+            excerpt_parts.append(excerpt)
+        remaining -= used
+        blocks.append(header + "\n\n".join(excerpt_parts))
+
+    metrics.observe("context_tokens_packed", sum(estimate_tokens(block) for block in blocks))
+    return blocks
@@ -1,70 +1,107 @@
+import logging
 import uuid
-from typing import Any
+from datetime import datetime
+from typing import Any, Callable
 
+from sqlalchemy import delete, event, insert, update
 from sqlmodel import Session, select
 
 from .model import InsertUser, InsertConversation, InsertMessage, Users, Conversations, Messages
+from .cache import ReadThroughCache
+from .config import local_settings
 from .security import get_password_hash, verify_password
 
+logger = logging.getLogger(__name__)
+
+# Keys: "id:<user id>", "username:<username>". Credentials are never cached (the
+# sqlite backend is a plain file), so users from these lookups have no password.
+user_cache = ReadThroughCache("users")
+USER_CREDENTIAL_FIELDS = {"password"}
+# Keys: "id:<conversation id>", "user:<user id>" (the user's conversation list)
+conversation_cache = ReadThroughCache("conversations")
+
+
+def _invalidate_conversation(conversation_id: str | None = None, user_id: str | None = None) -> None:
+    keys = []
+    if conversation_id:
+        keys.append(f"id:{conversation_id}")
+    if user_id:
+        keys.append(f"user:{user_id}")
+    conversation_cache.invalidate(*keys)
+
+def _dump(obj: Any, exclude: set[str] | None = None) -> dict[str, Any] | None:
+    """JSON-compatible snapshot of a row for the cache, None if the row is missing."""
+    return obj.model_dump(mode="json", exclude=exclude) if obj is not None else None
+
+def _cached_user(key: str, statement: Any, session: Session) -> Users | None:
+    result = user_cache.get_or_load(key, lambda: _dump(session.exec(statement).first(), exclude=USER_CREDENTIAL_FIELDS))
+    # The constructor, unlike model_validate, accepts the row without its password
+    return Users(**result) if result is not None else None
+
 def create_user(*, session: Session, user: InsertUser) -> Users:
     #db_obj = Users.model_validate(user, update={"hashed_password": get_password_hash(user.password)})
     db_obj = Users.model_validate(user)
     session.add(db_obj)
     session.commit()
     session.refresh(db_obj)
+    user_cache.invalidate(f"id:{db_obj.id}", f"username:{db_obj.username}")
     return db_obj
 
 
 def get_converstion_by_user_id(*, session: Session, user_id: str) -> list[Conversations]:
-    statement = select(Conversations).where(Conversations.user_id == user_id)
-    results = session.exec(statement).all()
-    return results
+    # Most recently active first; served by ix_conversations_user_id_updated_at
+    statement = (
+        select(Conversations)
+        .where(Conversations.user_id == user_id)
+        .order_by(Conversations.updated_at.desc())
+    )
+    results = conversation_cache.get_or_load(
+        f"user:{user_id}",
+        lambda: [row.model_dump(mode="json") for row in session.exec(statement).all()],
+    )
+    return [Conversations.model_validate(row) for row in results]
 
 def get_conversation_by_id(*, session: Session, conversation_id: str) -> Conversations | None:
     statement = select(Conversations).where(Conversations.id == conversation_id)
-    result = session.exec(statement).first()
-    return result
+    result = conversation_cache.get_or_load(f"id:{conversation_id}", lambda: _dump(session.exec(statement).first()))
+    return Conversations.model_validate(result) if result is not None else None
 
 def create_conversation(*, session: Session, conversation: InsertConversation) -> Conversations:
     db_obj = Conversations.model_validate(conversation, update={"user_id": conversation.user_id})
     session.add(db_obj)
     session.commit()
     session.refresh(db_obj)
+    _invalidate_conversation(user_id=db_obj.user_id)
     return db_obj
 
 def delete_conversation(*, session: Session, conversation_id: str) -> None:
-    statement = select(Conversations).where(Conversations.id == conversation_id)
-    result = session.exec(statement).first()
-    if result:
-        session.delete(result)
-        session.commit()    
+    user_id = session.execute(
+        delete(Conversations).where(Conversations.id == conversation_id).returning(Conversations.user_id)
+    ).scalar()
+    session.commit()
+    _invalidate_conversation(conversation_id, user_id)
 
 def getUserById(*, session: Session, user_id: str) -> Users | None:
+    """Get a user by ID, served from the user cache when possible (without the password)."""
     statement = select(Users).where(Users.id == user_id)
-    result = session.exec(statement).first()
-    return result
+    return _cached_user(f"id:{user_id}", statement, session)
 
 def getUserByUsername(*, session: Session, username: str) -> Users | None:
     """
-    Get a user by username with improved logging and error handling
+    Get a user by username, served from the user cache when possible (without the password)
     """
     if not username:
-        print("Warning: Empty username provided to getUserByUsername")
+        logger.warning("Empty username provided to getUserByUsername")
         return None
-        
+
     try:
-        print(f"Looking up user with username: {username}")
         statement = select(Users).where(Users.username == username)
-        result = session.exec(statement).first()
-        
-        if result:
-            print(f"Found user: {result.username} with ID: {result.id}")
-        else:
-            print(f"No user found with username: {username}")
-            
-        return result
+        user = _cached_user(f"username:{username}", statement, session)
+        if user is None:
+            logger.debug("No user found with username: %s", username)
+        return user
     except Exception as e:
-        print(f"Error in getUserByUsername: {str(e)}")
+        logger.error("Error in getUserByUsername: %s", e)
         # Re-raise the exception to be handled by the caller
         raise
 
@@ -73,18 +110,149 @@ def get_messages_by_conversation_id(*, session: Session, conversation_id: str) -
     results = session.exec(statement).all()
     return results
 
+def _touch_conversation(*, session: Session, conversation_id: str, added: int, last_content: str, at: datetime) -> str | None:
+    """
+    Bump the denormalized message stats of a conversation in the current transaction.
+    Returns the owning user's ID so the caller can invalidate cached lists after commit.
+    """
+    return session.execute(
+        update(Conversations)
+        .where(Conversations.id == conversation_id)
+        .values(
+            message_count=Conversations.message_count + added,
+            last_message_preview=last_content[:local_settings.MESSAGE_PREVIEW_LENGTH],
+            updated_at=at,
+        )
+        .returning(Conversations.user_id)
+    ).scalar()
+
 def create_message(*, session: Session, message: InsertMessage) -> Messages:
     db_obj = Messages.model_validate(message, update={"conversation_id": message.conversation_id})
     session.add(db_obj)
+    user_id = _touch_conversation(
+        session=session,
+        conversation_id=db_obj.conversation_id,
+        added=1,
+        last_content=db_obj.content,
+        at=db_obj.created_at,
+    )
     session.commit()
     session.refresh(db_obj)
+    _invalidate_conversation(db_obj.conversation_id, user_id)
     return db_obj   
 
-def delete_message_by_conversation_id(*, session: Session, conversation_id: str) -> None:
-    # Using direct delete statement for bulk deletion - more efficient
-    from sqlalchemy import delete
-    delete_stmt = delete(Messages).where(Messages.conversation_id == conversation_id)
-    session.execute(delete_stmt)
-    session.commit()
-    
-    
\ No newline at end of file
+def create_messages(*, session: Session, messages: list[InsertMessage], commit: bool = True) -> list[str]:
+    """
+    Insert several messages in a single transaction using a multi-row INSERT.
+
+    IDs and timestamps are generated client-side so no refresh round trip is
+    needed to return them. Pass commit=False to let the caller commit the
+    rows together with other work in the same transaction; cached
+    conversations are then invalidated when that commit happens.
+    """
+    if not messages:
+        return []
+    rows = [Messages.model_validate(message).model_dump() for message in messages]
+    session.execute(insert(Messages), rows)
+
+    # One stats update per conversation, using its last row in the batch
+    per_conversation: dict[str, list[dict[str, Any]]] = {}
+    for row in rows:
+        per_conversation.setdefault(row["conversation_id"], []).append(row)
+    touched = []
+    for conversation_id, conversation_rows in per_conversation.items():
+        user_id = _touch_conversation(
+            session=session,
+            conversation_id=conversation_id,
+            added=len(conversation_rows),
+            last_content=conversation_rows[-1]["content"],
+            at=conversation_rows[-1]["created_at"],
+        )
+        touched.append((conversation_id, user_id))
+    def invalidate(*_: Any) -> None:
+        for conversation_id, user_id in touched:
+            _invalidate_conversation(conversation_id, user_id)
+
+    if commit:
+        session.commit()
+        invalidate()
+    else:
+        # Invalidating now would let a concurrent reader cache the pre-commit rows for the whole TTL
+        event.listen(session, "after_commit", invalidate, once=True)
+    return [row["id"] for row in rows]
+
+def _delete_in_chunks(
+    *,
+    session: Session,
+    model: Any,
+    where: Any,
+    chunk_size: int,
+    on_chunk: Callable[[list[str]], None] | None = None,
+) -> int:
+    """
+    Delete the rows of `model` matching `where`, chunk_size rows per transaction.
+
+    Each chunk is a single set-based DELETE ... WHERE id IN (SELECT ... LIMIT n)
+    committed on its own, so no row is loaded into Python and locks are held
+    only for the duration of one chunk. If on_chunk is given, it receives the
+    IDs deleted by each committed chunk.
+    """
+    total = 0
+    while True:
+        ids = select(model.id).where(where).limit(chunk_size)
+        statement = delete(model).where(model.id.in_(ids))
+        if on_chunk is None:
+            deleted = session.execute(statement).rowcount
+            session.commit()
+        else:
+            deleted_ids = list(session.execute(statement.returning(model.id)).scalars())
+            session.commit()
+            on_chunk(deleted_ids)
+            deleted = len(deleted_ids)
+        total += deleted
+        if deleted < chunk_size:
+            return total
+
+def delete_message_by_conversation_id(*, session: Session, conversation_id: str, chunk_size: int | None = None) -> int:
+    """Delete all messages of a conversation in chunks and return how many were removed."""
+    deleted = _delete_in_chunks(
+        session=session,
+        model=Messages,
+        where=Messages.conversation_id == conversation_id,
+        chunk_size=chunk_size or local_settings.DELETE_CHUNK_SIZE,
+    )
+    if deleted:
+        user_id = session.execute(
+            update(Conversations)
+            .where(Conversations.id == conversation_id)
+            .values(message_count=0, last_message_preview=None, updated_at=datetime.now())
+            .returning(Conversations.user_id)
+        ).scalar()
+        session.commit()
+        _invalidate_conversation(conversation_id, user_id)
+    return deleted
+
+def delete_conversations_by_user_id(*, session: Session, user_id: str, chunk_size: int | None = None) -> int:
+    """
+    Delete every conversation of a user together with its messages.
+
+    Messages go first (chunked, via a subquery on the user's conversations) so
+    the foreign key is never violated; returns the number of conversations removed.
+    """
+    chunk_size = chunk_size or local_settings.DELETE_CHUNK_SIZE
+    user_conversations = select(Conversations.id).where(Conversations.user_id == user_id)
+    _delete_in_chunks(
+        session=session,
+        model=Messages,
+        where=Messages.conversation_id.in_(user_conversations),
+        chunk_size=chunk_size,
+    )
+    deleted = _delete_in_chunks(
+        session=session,
+        model=Conversations,
+        where=Conversations.user_id == user_id,
+        chunk_size=chunk_size,
+        on_chunk=lambda ids: conversation_cache.invalidate(*(f"id:{conversation_id}" for conversation_id in ids)),
+    )
+    _invalidate_conversation(user_id=user_id)
+    return deleted
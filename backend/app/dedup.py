@@ -0,0 +1,61 @@
+"""
+Content hashing and near-duplicate detection for indexed chunks.
+
+- Node IDs are derived from the paper ID, chunk number and content hash, so
+  indexing the same paper again upserts the same points instead of adding new ones.
+- Every chunk gets a 64-bit SimHash over word shingles. Chunks within
+  SIMHASH_MAX_DISTANCE bits of each other are near-duplicates. The hash is split
+  into SIMHASH_BANDS bands stored as keyword payload; any two hashes within that
+  distance share at least one band (pigeonhole), so candidates are found with a
+  single indexed Qdrant query instead of a collection scan.
+"""
+
+import hashlib
+import re
+import uuid
+from typing import List
+
+from app.config import local_settings
+
+# Fixed namespace so node IDs are stable across processes and deployments
+NODE_ID_NAMESPACE = uuid.UUID("8f4d6f8e-3b7c-4f43-9a55-3f8a2f0f9c11")
+SIMHASH_BITS = 64
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def node_id(arxiv_id: str, chunk: int, text_hash: str) -> str:
+    """Deterministic UUID (Qdrant point IDs must be UUIDs or integers) for one chunk."""
+    return str(uuid.uuid5(NODE_ID_NAMESPACE, f"{arxiv_id}:{chunk}:{text_hash}"))
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    words = re.findall(r"\w+", text.lower())
+    shingles = [" ".join(words[i:i + shingle_size]) for i in range(max(len(words) - shingle_size + 1, 1))]
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(SIMHASH_BITS) if weights[bit] > 0)
+
+
+def simhash_hex(value: int) -> str:
+    # Stored as hex: Qdrant integers are signed 64-bit
+    return f"{value:016x}"
+
+
+def band_keys(value: int, bands: int = local_settings.SIMHASH_BANDS) -> List[str]:
+    width = SIMHASH_BITS // bands
+    mask = (1 << width) - 1
+    return [f"{band}:{(value >> (band * width)) & mask:x}" for band in range(bands)]
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def is_near_duplicate(value: int, others: List[int], max_distance: int = local_settings.SIMHASH_MAX_DISTANCE) -> bool:
+    return any(hamming_distance(value, other) <= max_distance for other in others)
@@ -0,0 +1,99 @@
+"""
+Shared embedding server for multi-worker deployments.
+
+Loads the embedding model once and serves it over HTTP so that every uvicorn
+worker (started with EMBED_BACKEND="remote") only holds a small HTTP client
+instead of its own copy of the model weights.
+
+Usage:
+    python app/embedding_server.py --port 8001
+
+API:
+    POST /embed {"texts": ["..."], "query": false} -> {"embeddings": [[...], ...]}
+    GET /health -> {"status": "ok", "model": "..."}
+"""
+
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app import metrics
+from app.config import local_settings
+from app.embeddings import make_embed_model
+
+# Serialize model calls; torch/ONNX already parallelize a single batch internally
+_model_lock = threading.Lock()
+_model = None
+_model_name = ""
+
+
+class EmbeddingHandler(BaseHTTPRequestHandler):
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "model": _model_name})
+        elif self.path == "/metrics":
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {"detail": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/embed":
+            self._send_json(404, {"detail": "Not found"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            texts = request["texts"]
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {"detail": f"Invalid request: {e}"})
+            return
+
+        with _model_lock:
+            if request.get("query"):
+                embeddings = [_model.get_query_embedding(text) for text in texts]
+            else:
+                embeddings = _model.get_text_embedding_batch(texts)
+        metrics.inc("embedding_server_texts_total", len(texts))
+        self._send_json(200, {"embeddings": embeddings})
+
+    def log_message(self, format, *args):
+        # Per-request access logs are too noisy during ingestion
+        pass
+
+
+def main() -> None:
+    global _model, _model_name
+    from app.arxiv_rag import OLLAMA_EMBED_MODEL, OPENAI_EMBED_MODEL
+
+    default_model = OLLAMA_EMBED_MODEL if local_settings.LLM_PROVIDER.lower() == "ollama" else OPENAI_EMBED_MODEL
+    parser = argparse.ArgumentParser(description="Serve one shared embedding model to all API workers")
+    parser.add_argument("--model-name", default=default_model)
+    parser.add_argument("--backend", default=local_settings.EMBED_SERVER_BACKEND, help="huggingface or onnx")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=local_settings.EMBED_SERVER_PORT)
+    args = parser.parse_args()
+
+    if args.backend.lower() == "remote":
+        parser.error("The embedding server needs a local backend")
+    _model_name = args.model_name
+    _model = make_embed_model(args.model_name, backend=args.backend)
+    server = ThreadingHTTPServer((args.host, args.port), EmbeddingHandler)
+    print(f"Embedding server listening on {args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+Embedding model selection and local embedding services.
+
+`make_embed_model` picks the embedding backend from EMBED_BACKEND. Besides the
+in-process HuggingFace and OpenAI models there are two service modes:
+
+- "onnx": BGE on ONNX Runtime in a local worker pool (see below).
+- "remote": the model lives in one shared embedding server process
+  (app/embedding_server.py) and API workers only hold an HTTP client.
+
+ONNX worker pool:
+
+Texts are queued in a bounded queue (callers block when it is full), grouped
+into dynamic batches by a dispatcher thread and embedded in a separate process
+pool, so large ingestions no longer compete with API traffic for the GIL.
+
+The model directory must contain an exported `model.onnx` and the HuggingFace
+`tokenizer.json`; `python app/embeddings.py export` creates both with optimum.
+onnxruntime and optimum come with the `onnx` extra (`uv sync --extra onnx`).
+With ONNX_QUANTIZE_INT8 the model is dynamically quantized to int8 on first use.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, List, Optional
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from pydantic import PrivateAttr
+
+from app import metrics
+from app.config import local_settings
+from app.http_clients import get_async_httpx_client, get_httpx_client
+
+# Same query instruction HuggingFaceEmbedding uses for BGE English models
+BGE_QUERY_INSTRUCTION = "Represent this sentence for searching relevant passages: "
+
+FP32_MODEL_FILE = "model.onnx"
+INT8_MODEL_FILE = "model_quantized.onnx"
+
+# --- Worker process state ---
+_session = None
+_tokenizer = None
+
+
+def _init_worker(model_path: str, tokenizer_path: str, threads: int) -> None:
+    global _session, _tokenizer
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    _session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+    _tokenizer = Tokenizer.from_file(tokenizer_path)
+    _tokenizer.enable_truncation(max_length=512)
+    _tokenizer.enable_padding()
+
+
+def _embed_batch(texts: List[str]) -> List[List[float]]:
+    encodings = _tokenizer.encode_batch(texts)
+    inputs = {
+        "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+        "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+    }
+    if any(i.name == "token_type_ids" for i in _session.get_inputs()):
+        inputs["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+    last_hidden_state = _session.run(None, inputs)[0]
+    # BGE uses the [CLS] token embedding, L2-normalized
+    cls = last_hidden_state[:, 0]
+    cls = cls / np.linalg.norm(cls, axis=1, keepdims=True)
+    return cls.tolist()
+
+
+def quantize_int8(model_dir: str) -> str:
+    """Create the int8 dynamically quantized model next to model.onnx if it is missing."""
+    quantized_path = os.path.join(model_dir, INT8_MODEL_FILE)
+    if not os.path.exists(quantized_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print(f"Quantizing {model_dir} to int8...")
+        quantize_dynamic(os.path.join(model_dir, FP32_MODEL_FILE), quantized_path, weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+class EmbeddingWorkerPool:
+    """Bounded request queue, dynamic batcher and process pool for embeddings."""
+
+    def __init__(
+        self,
+        model_dir: str,
+        quantize: bool,
+        workers: int,
+        max_batch: int,
+        max_wait_ms: float,
+        queue_size: int,
+        threads_per_worker: int,
+    ):
+        model_path = quantize_int8(model_dir) if quantize else os.path.join(model_dir, FP32_MODEL_FILE)
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[tuple[str, Future]]" = queue.Queue(maxsize=queue_size)
+        # At most two batches per worker are submitted; the rest wait in the queue
+        self._in_flight = threading.BoundedSemaphore(workers * 2)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_path, os.path.join(model_dir, "tokenizer.json"), threads_per_worker),
+        )
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="embedding-batcher", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, texts: List[str]) -> List[Future]:
+        """Queue texts for embedding; blocks while the queue is full (backpressure)."""
+        futures = []
+        for text in texts:
+            future: Future = Future()
+            self._queue.put((text, future))
+            futures.append(future)
+        metrics.set_gauge("embedding_queue_depth", self._queue.qsize())
+        return futures
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return [future.result() for future in self.submit(texts)]
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """embed() for the event loop: neither a full queue nor the results block it."""
+        futures = await asyncio.to_thread(self.submit, texts)
+        return list(await asyncio.gather(*(asyncio.wrap_future(future) for future in futures)))
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            # Collect more requests until the batch is full or the wait budget is spent
+            deadline = time.monotonic() + self.max_wait
+            while len(items) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._in_flight.acquire()
+            metrics.observe("embedding_batch_size", len(items))
+            try:
+                batch_future = self._executor.submit(_embed_batch, [text for text, _ in items])
+            except Exception as e:
+                # e.g. BrokenProcessPool: fail this batch but keep the dispatcher alive,
+                # otherwise every later embed() would wait forever
+                print(f"⚠️ Submitting an embedding batch failed: {e}")
+                self._in_flight.release()
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+            batch_future.add_done_callback(lambda done, items=items: self._deliver(done, items))
+
+    def _deliver(self, done: Future, items: List[tuple]) -> None:
+        self._in_flight.release()
+        error = done.exception()
+        if error is not None:
+            for _, future in items:
+                future.set_exception(error)
+            return
+        for (_, future), embedding in zip(items, done.result()):
+            future.set_result(embedding)
+
+
+_pool: Optional[EmbeddingWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_embedding_pool() -> EmbeddingWorkerPool:
+    """Process-wide embedding pool, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = EmbeddingWorkerPool(
+                model_dir=local_settings.ONNX_MODEL_DIR,
+                quantize=local_settings.ONNX_QUANTIZE_INT8,
+                workers=local_settings.EMBED_WORKERS,
+                max_batch=local_settings.EMBED_MAX_BATCH,
+                max_wait_ms=local_settings.EMBED_BATCH_WAIT_MS,
+                queue_size=local_settings.EMBED_QUEUE_SIZE,
+                threads_per_worker=local_settings.EMBED_THREADS_PER_WORKER,
+            )
+        return _pool
+
+
+class OnnxBgeEmbedding(BaseEmbedding):
+    """LlamaIndex embedding model backed by the ONNX worker pool."""
+
+    query_instruction: str = BGE_QUERY_INSTRUCTION
+    _pool: Any = PrivateAttr()
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._pool = get_embedding_pool()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "OnnxBgeEmbedding"
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._pool.embed([self.query_instruction + query])[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return (await self._pool.aembed([self.query_instruction + query]))[0]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._pool.embed([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return (await self._pool.aembed([text]))[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._pool.embed(texts)
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return await self._pool.aembed(texts)
+
+
+class RemoteEmbedding(BaseEmbedding):
+    """LlamaIndex embedding model that calls the shared embedding server."""
+
+    base_url: str
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "RemoteEmbedding"
+
+    def _payload(self, texts: List[str], query: bool) -> dict:
+        return {"texts": texts, "query": query}
+
+    def _post(self, texts: List[str], query: bool = False) -> List[List[float]]:
+        response = get_httpx_client().post(f"{self.base_url}/embed", json=self._payload(texts, query))
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
+    async def _apost(self, texts: List[str], query: bool = False) -> List[List[float]]:
+        response = await get_async_httpx_client().post(f"{self.base_url}/embed", json=self._payload(texts, query))
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._post([query], query=True)[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return (await self._apost([query], query=True))[0]
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._post([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return (await self._apost([text]))[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._post(texts)
+
+
+def check_remote_model(base_url: str, embed_model_name: str) -> None:
+    """
+    Fail if the embedding server serves another model than embed_model_name;
+    its vectors would not match the collection. An unreachable server is only
+    reported here, the embedding calls will raise.
+    """
+    try:
+        response = get_httpx_client().get(f"{base_url}/health")
+        response.raise_for_status()
+        served = response.json().get("model")
+    except Exception as e:
+        print(f"⚠️ Could not check the embedding server's model: {e}")
+        return
+    if served != embed_model_name:
+        raise ValueError(f"Embedding server at {base_url} serves {served!r}, not {embed_model_name!r}")
+
+
+def make_embed_model(embed_model_name: str, backend: Optional[str] = None) -> BaseEmbedding:
+    """
+    Build the embedding model for embed_model_name according to EMBED_BACKEND
+    (or the explicit backend). Heavy libraries are only imported when needed,
+    so workers using the remote backend never load torch or model weights.
+    """
+    backend = (backend or local_settings.EMBED_BACKEND).lower()
+    if backend == "remote":
+        print(f"Using shared embedding server: {local_settings.EMBED_SERVICE_URL}")
+        check_remote_model(local_settings.EMBED_SERVICE_URL, embed_model_name)
+        return RemoteEmbedding(base_url=local_settings.EMBED_SERVICE_URL, embed_batch_size=local_settings.EMBED_BATCH_SIZE)
+    if "bge" in embed_model_name and backend == "onnx":
+        print(f"Using ONNX embedding worker pool: {local_settings.ONNX_MODEL_DIR}")
+        return OnnxBgeEmbedding()
+    if "bge" in embed_model_name:
+        from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+        print(f"Using HuggingFace embedding model: {embed_model_name}")
+        return HuggingFaceEmbedding(model_name=embed_model_name)
+
+    from llama_index.embeddings.openai import OpenAIEmbedding
+
+    print(f"Using OpenAI embedding model: {embed_model_name}")
+    return OpenAIEmbedding(
+        model=embed_model_name,
+        http_client=get_httpx_client(),
+        async_http_client=get_async_httpx_client(),
+    )
+
+
+def export(model_name: str, model_dir: str) -> None:
+    """Export a HuggingFace BGE model to ONNX (requires the optional optimum package)."""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+
+    ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(model_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(model_dir)
+    print(f"Exported {model_name} to {model_dir}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Prepare the ONNX BGE embedding model")
+    parser.add_argument("command", choices=["export", "quantize"])
+    parser.add_argument("--model-name", default="BAAI/bge-large-en-v1.5")
+    parser.add_argument("--model-dir", default=local_settings.ONNX_MODEL_DIR)
+    args = parser.parse_args()
+    if args.command == "export":
+        export(args.model_name, args.model_dir)
+    else:
+        quantize_int8(args.model_dir)
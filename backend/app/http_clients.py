@@ -0,0 +1,81 @@
+"""
+Process-wide pooled HTTP clients for ConversationChatBot.
+arXiv feed and PDF downloads share one requests.Session; LLM and embedding
+clients share httpx clients with keep-alive (and HTTP/2 where available),
+so connection setup is paid once per process instead of once per call.
+"""
+
+import threading
+from typing import Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config import local_settings
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_httpx_client: Optional[httpx.Client] = None
+_async_httpx_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    if not local_settings.HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def pooled_limits() -> httpx.Limits:
+    """Connection pool limits shared by every httpx-based client."""
+    return httpx.Limits(
+        max_connections=local_settings.HTTP_POOL_MAXSIZE,
+        max_keepalive_connections=local_settings.HTTP_POOL_CONNECTIONS,
+        keepalive_expiry=local_settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def get_http_session() -> requests.Session:
+    """Shared requests.Session used for arXiv API and PDF downloads."""
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=local_settings.HTTP_POOL_CONNECTIONS,
+                pool_maxsize=local_settings.HTTP_POOL_MAXSIZE,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def get_httpx_client() -> httpx.Client:
+    """Shared synchronous httpx client for LLM and embedding providers."""
+    global _httpx_client
+    with _lock:
+        if _httpx_client is None:
+            _httpx_client = httpx.Client(
+                http2=_http2_available(),
+                limits=pooled_limits(),
+                timeout=local_settings.HTTP_TIMEOUT,
+            )
+        return _httpx_client
+
+
+def get_async_httpx_client() -> httpx.AsyncClient:
+    """Shared asynchronous httpx client for LLM and embedding providers."""
+    global _async_httpx_client
+    with _lock:
+        if _async_httpx_client is None:
+            _async_httpx_client = httpx.AsyncClient(
+                http2=_http2_available(),
+                limits=pooled_limits(),
+                timeout=local_settings.HTTP_TIMEOUT,
+            )
+        return _async_httpx_client
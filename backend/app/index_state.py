@@ -0,0 +1,80 @@
+"""
+Which Qdrant collection and embedding model the application reads from.
+
+The state lives in a small JSON file (INDEX_STATE_PATH) shared by all workers
+on the host. Without the file the configured COLLECTION_NAME, embedding model
+and VECTOR_DIM are used. The embedding migration job
+(app/initalize_db/migrate_embeddings.py) records its progress in the file and
+switches every worker to the new collection by atomically replacing it.
+"""
+
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+from app.config import local_settings
+
+_lock = threading.Lock()
+_cached: Optional["IndexState"] = None
+_cached_mtime: Optional[float] = None
+
+
+def default_embed_model() -> str:
+    if local_settings.LLM_PROVIDER.lower() == "ollama":
+        return local_settings.OLLAMA_EMBED_MODEL
+    return local_settings.OPENAI_EMBED_MODEL
+
+
+@dataclass
+class IndexState:
+    collection: str
+    embed_model: str
+    vector_dim: int
+    # Running migration: target, embed_model, vector_dim, dual_read, offset, migrated
+    migration: Optional[Dict[str, Any]] = None
+    # Collection active before the last switch, kept for rollback
+    previous: Optional[Dict[str, Any]] = None
+
+    @property
+    def key(self) -> tuple:
+        """Changes whenever components built from this state must be rebuilt."""
+        migration = self.migration or {}
+        return (self.collection, self.embed_model, self.vector_dim, migration.get("target"), migration.get("dual_read"))
+
+
+def _default_state() -> IndexState:
+    return IndexState(
+        collection=local_settings.COLLECTION_NAME,
+        embed_model=default_embed_model(),
+        vector_dim=local_settings.VECTOR_DIM,
+    )
+
+
+def load_index_state(path: Optional[str] = None) -> IndexState:
+    """
+    Current index state; the file is only re-read when its mtime changes, so
+    this is cheap enough to call on every request.
+    """
+    global _cached, _cached_mtime
+    path = path or local_settings.INDEX_STATE_PATH
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return _default_state()
+    with _lock:
+        if _cached is None or mtime != _cached_mtime:
+            with open(path) as f:
+                _cached = IndexState(**json.load(f))
+            _cached_mtime = mtime
+        return _cached
+
+
+def save_index_state(state: IndexState, path: Optional[str] = None) -> None:
+    # Write then rename: readers see either the old or the new state, never a partial file
+    path = path or local_settings.INDEX_STATE_PATH
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(asdict(state), f, indent=2)
+    os.replace(tmp_path, path)
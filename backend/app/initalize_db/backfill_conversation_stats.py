@@ -0,0 +1,69 @@
+"""
+Backfill the denormalized message stats of conversations from their messages.
+
+Conversations.message_count and last_message_preview are maintained by
+crud.create_message(s), but conversations that existed before the columns were
+added start at 0 messages and no preview. This recomputes both from the
+messages table. By default only conversations that report 0 messages but have
+some are updated, so it is cheap to run on every start (see
+scripts/prestart.sh); --all recomputes every conversation.
+
+Usage:
+    python app/initalize_db/backfill_conversation_stats.py
+    python app/initalize_db/backfill_conversation_stats.py --all
+"""
+
+import argparse
+import logging
+
+from sqlalchemy import exists, func, select, update
+from sqlmodel import Session
+
+from app.config import local_settings
+from app.db import engine
+from app.model import Conversations, Messages
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def backfill(session: Session, recompute_all: bool = False) -> int:
+    """
+    Recompute message_count and last_message_preview from the messages table.
+
+    Args:
+        session: Database session; committed on success
+        recompute_all: Update every conversation instead of only the unfilled ones
+
+    Returns:
+        int: Number of updated conversations
+    """
+    of_conversation = Messages.conversation_id == Conversations.id
+    message_count = select(func.count(Messages.id)).where(of_conversation).scalar_subquery()
+    last_preview = (
+        select(func.substr(Messages.content, 1, local_settings.MESSAGE_PREVIEW_LENGTH))
+        .where(of_conversation)
+        .order_by(Messages.created_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    statement = update(Conversations).values(message_count=message_count, last_message_preview=last_preview)
+    if not recompute_all:
+        statement = statement.where(Conversations.message_count == 0, exists().where(of_conversation))
+    updated = session.execute(statement).rowcount
+    session.commit()
+    return updated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill conversation message counts and previews")
+    parser.add_argument("--all", action="store_true", help="Recompute every conversation, not only unfilled ones")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        updated = backfill(session, recompute_all=args.all)
+    logger.info("Backfilled message stats of %d conversations", updated)
+
+
+if __name__ == "__main__":
+    main()
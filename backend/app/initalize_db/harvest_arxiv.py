@@ -0,0 +1,137 @@
+"""
+Bulk-harvest arXiv categories into the vector store before traffic arrives.
+
+Pages through the arXiv API for each category (optionally limited to a
+submission date range), streams every page through the PDF download stage and
+runs chunk -> embed -> upsert in parallel batches. Progress is checkpointed
+after every page so an interrupted run resumes where it stopped.
+
+Usage:
+    python app/initalize_db/harvest_arxiv.py --category cs.LG --category cs.CL \
+        --from-date 2024-01-01 --to-date 2024-06-30 --max-papers 2000
+"""
+
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from app.arxiv_rag import ArxivRAG
+from app.config import local_settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def build_search_query(category: str, from_date: str | None, to_date: str | None) -> str:
+    query = f"cat:{category}"
+    if from_date or to_date:
+        start = (from_date or "1991-01-01").replace("-", "") + "0000"
+        end = (to_date or "2100-01-01").replace("-", "") + "2359"
+        query += f" AND submittedDate:[{start} TO {end}]"
+    return query
+
+
+def load_checkpoint(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, checkpoint: dict) -> None:
+    # Write then rename so a crash never leaves a truncated checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def index_batch(rag: ArxivRAG, papers: list[dict]) -> int:
+    nodes, _ = rag.create_nodes_from_papers(papers)
+    rag.vectorize_and_store(nodes)
+    return len(papers)
+
+
+def harvest_query(
+    rag: ArxivRAG,
+    pool: ThreadPoolExecutor,
+    search_query: str,
+    checkpoint: dict,
+    checkpoint_path: str,
+    page_size: int,
+    max_papers: int | None,
+    papers_per_batch: int,
+) -> None:
+    state = checkpoint.setdefault(search_query, {"start": 0, "indexed": 0, "done": False})
+    if state["done"]:
+        logger.info("Skipping finished query %s (%d papers indexed)", search_query, state["indexed"])
+        return
+
+    while not state["done"]:
+        # The last page only asks for what is left of max_papers
+        page = page_size if max_papers is None else min(page_size, max_papers - state["start"])
+        if page <= 0:
+            state["done"] = True
+            save_checkpoint(checkpoint_path, checkpoint)
+            break
+        # Offsets count raw <entry> elements: entries dropped by the parser
+        # (no PDF link, title or summary) still occupy a slot in arXiv's paging
+        counts = {"entries": 0}
+        logger.info("Harvesting %s from offset %d", search_query, state["start"])
+        records = rag.stream_arxiv_feed(search_query, start=state["start"], max_results=page, counts=counts)
+        futures = []
+        batch = []
+        for paper in rag.attach_full_text(records):
+            batch.append(paper)
+            if len(batch) >= papers_per_batch:
+                futures.append(pool.submit(index_batch, rag, batch))
+                batch = []
+        if batch:
+            futures.append(pool.submit(index_batch, rag, batch))
+        indexed = sum(future.result() for future in futures)
+
+        seen = counts["entries"]
+        state["start"] += seen
+        state["indexed"] += indexed
+        state["done"] = seen < page or (max_papers is not None and state["start"] >= max_papers)
+        save_checkpoint(checkpoint_path, checkpoint)
+        logger.info("Page done: %d entries, %d newly indexed, %d total", seen, indexed, state["indexed"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-harvest arXiv papers into the vector store")
+    parser.add_argument("--category", action="append", required=True, help="arXiv category, e.g. cs.LG (repeatable)")
+    parser.add_argument("--from-date", help="First submission date, YYYY-MM-DD")
+    parser.add_argument("--to-date", help="Last submission date, YYYY-MM-DD")
+    parser.add_argument("--max-papers", type=int, help="Stop each category after this many feed entries")
+    parser.add_argument("--page-size", type=int, default=local_settings.HARVEST_PAGE_SIZE)
+    parser.add_argument("--workers", type=int, default=local_settings.HARVEST_EMBED_WORKERS, help="Parallel embed+upsert batches")
+    parser.add_argument("--papers-per-batch", type=int, default=8)
+    parser.add_argument("--checkpoint", default=local_settings.HARVEST_CHECKPOINT_PATH)
+    parser.add_argument("--api-url", help="Override ARXIV_API_URL, e.g. a local fixture feed server")
+    args = parser.parse_args()
+
+    if args.api_url:
+        local_settings.ARXIV_API_URL = args.api_url
+
+    checkpoint = load_checkpoint(args.checkpoint)
+    rag = ArxivRAG.for_active_index()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for category in args.category:
+            harvest_query(
+                rag,
+                pool,
+                build_search_query(category, args.from_date, args.to_date),
+                checkpoint,
+                args.checkpoint,
+                page_size=args.page_size,
+                max_papers=args.max_papers,
+                papers_per_batch=args.papers_per_batch,
+            )
+    logger.info("Harvest finished")
+
+
+if __name__ == "__main__":
+    main()
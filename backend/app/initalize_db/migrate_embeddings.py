@@ -0,0 +1,195 @@
+"""
+Re-embed the stored chunks into a new, versioned collection and switch to it.
+
+Chunk texts and metadata are read from the payload of the active collection
+(no PDF downloads), embedded with the target model in rate-limited batches and
+upserted under the same point IDs. Progress is kept in the index state, so an
+interrupted run resumes where it stopped. With --dual-read the API searches
+both collections while the migration runs. When every point is copied, a
+catch-up pass copies chunks indexed in the meantime and the index state is
+switched, which moves all workers to the new collection at once. The old
+collection is kept; --rollback switches back to it.
+
+Usage:
+    python app/initalize_db/migrate_embeddings.py --embed-model text-embedding-3-small --dual-read
+    python app/initalize_db/migrate_embeddings.py --rollback
+"""
+
+import argparse
+import logging
+import re
+
+from llama_index.core.vector_stores.utils import metadata_dict_to_node
+from qdrant_client import QdrantClient
+
+from app import retrieval_cache
+from app.arxiv_rag import ArxivRAG, make_vector_client
+from app.config import local_settings
+from app.embeddings import make_embed_model
+from app.index_state import IndexState, load_index_state, save_index_state
+from app.ratelimit import TokenBucket
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAX_CATCH_UP_PASSES = 3
+
+
+def target_collection_name(base: str, embed_model: str, vector_dim: int) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "_", embed_model.lower()).strip("_")
+    return f"{base}__{slug}_{vector_dim}"
+
+
+def probe_vector_dim(embed_model: str) -> int:
+    return len(make_embed_model(embed_model).get_text_embedding("dimension probe"))
+
+
+def copy_points(target: ArxivRAG, points) -> int:
+    """Embed the stored chunks with the target model and upsert them under the same IDs."""
+    nodes = [metadata_dict_to_node(point.payload) for point in points]
+    embeddings = target.embed_model.get_text_embedding_batch([node.get_content() for node in nodes])
+    for node, point, embedding in zip(nodes, points, embeddings):
+        node.id_ = str(point.id)
+        node.embedding = embedding
+    target.vector_store.add(nodes)
+    retrieval_cache.collection_versions.bump(target.collection_name)
+    return len(nodes)
+
+
+def copy_all(client: QdrantClient, state: IndexState, target: ArxivRAG, batch_size: int, bucket: TokenBucket) -> None:
+    migration = state.migration
+    while not migration.get("copied_all"):
+        bucket.acquire(max_wait=float("inf"))
+        points, next_offset = client.scroll(
+            collection_name=state.collection,
+            limit=batch_size,
+            offset=migration["offset"],
+            with_payload=True,
+            with_vectors=False,
+        )
+        if points:
+            migration["migrated"] += copy_points(target, points)
+        migration["offset"] = next_offset
+        migration["copied_all"] = next_offset is None
+        save_index_state(state)
+        logger.info("Re-embedded %d points into %s", migration["migrated"], target.collection_name)
+
+
+def _missing_ids(client: QdrantClient, from_collection: str, in_collection: str, batch_size: int, bucket: TokenBucket):
+    """Yield batches of point IDs present in from_collection but not in in_collection."""
+    offset = None
+    while True:
+        bucket.acquire(max_wait=float("inf"))
+        points, offset = client.scroll(
+            collection_name=from_collection, limit=batch_size, offset=offset, with_payload=False, with_vectors=False
+        )
+        ids = [point.id for point in points]
+        present = {str(point.id) for point in client.retrieve(in_collection, ids=ids, with_payload=False)}
+        missing = [point_id for point_id in ids if str(point_id) not in present]
+        if missing:
+            yield missing
+        if offset is None:
+            return
+
+
+def catch_up(client: QdrantClient, state: IndexState, target: ArxivRAG, batch_size: int, bucket: TokenBucket) -> int:
+    """
+    Apply changes made to the source collection after the main pass had passed
+    them: copy new chunks and delete chunks replaced by newer paper versions.
+    Returns the number of changed points.
+    """
+    changed = 0
+    for missing in _missing_ids(client, state.collection, target.collection_name, batch_size, bucket):
+        changed += copy_points(target, client.retrieve(state.collection, ids=missing, with_payload=True))
+    for removed in _missing_ids(client, target.collection_name, state.collection, batch_size, bucket):
+        client.delete(collection_name=target.collection_name, points_selector=removed)
+        retrieval_cache.collection_versions.bump(target.collection_name)
+        changed += len(removed)
+    return changed
+
+
+def switch(state: IndexState) -> None:
+    migration = state.migration
+    new_state = IndexState(
+        collection=migration["target"],
+        embed_model=migration["embed_model"],
+        vector_dim=migration["vector_dim"],
+        previous={"collection": state.collection, "embed_model": state.embed_model, "vector_dim": state.vector_dim},
+    )
+    save_index_state(new_state)
+    logger.info("Switched queries from %s to %s", state.collection, new_state.collection)
+
+
+def rollback() -> None:
+    state = load_index_state()
+    if not state.previous:
+        raise SystemExit("No previous collection recorded")
+    previous = state.previous
+    save_index_state(IndexState(
+        collection=previous["collection"],
+        embed_model=previous["embed_model"],
+        vector_dim=previous["vector_dim"],
+        previous={"collection": state.collection, "embed_model": state.embed_model, "vector_dim": state.vector_dim},
+    ))
+    logger.info("Rolled back queries from %s to %s", state.collection, previous["collection"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-embed stored chunks into a new collection and switch to it")
+    parser.add_argument("--embed-model", help="Target embedding model name")
+    parser.add_argument("--vector-dim", type=int, help="Target dimension; probed from the model if omitted")
+    parser.add_argument("--target-collection", help="Defaults to <COLLECTION_NAME>__<model>_<dim>")
+    parser.add_argument("--batch-size", type=int, default=local_settings.MIGRATION_BATCH_SIZE)
+    parser.add_argument("--batches-per-second", type=float, default=local_settings.MIGRATION_BATCHES_PER_SECOND)
+    parser.add_argument("--dual-read", action="store_true", help="Search old and new collection during the migration")
+    parser.add_argument("--no-switch", action="store_true", help="Copy only; rerun without this flag to switch")
+    parser.add_argument("--rollback", action="store_true", help="Switch back to the previous collection")
+    args = parser.parse_args()
+
+    if args.rollback:
+        rollback()
+        return
+    if not args.embed_model:
+        parser.error("--embed-model is required")
+
+    state = load_index_state()
+    vector_dim = args.vector_dim or probe_vector_dim(args.embed_model)
+    target_name = args.target_collection or target_collection_name(local_settings.COLLECTION_NAME, args.embed_model, vector_dim)
+    if target_name == state.collection:
+        raise SystemExit(f"{target_name} is already the active collection")
+    if state.migration and state.migration["target"] != target_name:
+        raise SystemExit(f"Another migration to {state.migration['target']} is in progress")
+    if not state.migration:
+        state.migration = {
+            "target": target_name,
+            "embed_model": args.embed_model,
+            "vector_dim": vector_dim,
+            "offset": None,
+            "migrated": 0,
+            "copied_all": False,
+        }
+    else:
+        logger.info("Resuming migration to %s after %d points", target_name, state.migration["migrated"])
+    state.migration["dual_read"] = args.dual_read
+    save_index_state(state)
+
+    client = make_vector_client()
+    target = ArxivRAG(
+        collection_name=target_name, embed_model_name=args.embed_model, vector_dim=vector_dim, recreate_collection=False
+    )
+    bucket = TokenBucket("embedding_migration", rate=args.batches_per_second, capacity=1)
+
+    copy_all(client, state, target, args.batch_size, bucket)
+    if args.no_switch:
+        logger.info("Copy finished; rerun without --no-switch to switch to %s", target_name)
+        return
+    for _ in range(MAX_CATCH_UP_PASSES):
+        changed = catch_up(client, state, target, args.batch_size, bucket)
+        logger.info("Catch-up pass changed %d points", changed)
+        if not changed:
+            break
+    switch(state)
+
+
+if __name__ == "__main__":
+    main()
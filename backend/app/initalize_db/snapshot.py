@@ -0,0 +1,221 @@
+"""
+Export a Qdrant collection to a versioned snapshot directory and import it elsewhere.
+
+Snapshot layout (format version 1):
+    manifest.json    collection, embedding model, dimension, dtype, point count
+    vectors.npy      (count, dim) float32 or float16 matrix, row i = point i
+    payloads.jsonl   {"id": ..., "payload": {...}} per line, same order as the vectors
+                     (or payloads.parquet with --metadata-format parquet, requires pyarrow)
+
+Payloads include the chunk texts (_node_content) and paper metadata, so an
+imported environment can serve and re-embed without fetching from arXiv.
+Imports memory-map the vector block and upsert batches from several threads.
+
+Usage:
+    python app/initalize_db/snapshot.py export --out snapshots/arxiv-2024-06
+    python app/initalize_db/snapshot.py import --src snapshots/arxiv-2024-06 --activate
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Iterator, List, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Batch, Distance, VectorParams
+
+from app import retrieval_cache
+from app.arxiv_rag import ensure_payload_indexes, make_vector_client
+from app.index_state import IndexState, load_index_state, save_index_state
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+JSONL_FILE = "payloads.jsonl"
+PARQUET_FILE = "payloads.parquet"
+
+
+def export_collection(client: QdrantClient, collection: str, embed_model: str, out_dir: str,
+                      dtype: str = "float32", metadata_format: str = "jsonl", batch_size: int = 1024) -> int:
+    """
+    Write every point of the collection to out_dir.
+
+    Returns:
+        int: Number of exported points
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    count = client.count(collection_name=collection, exact=True).count
+    vector_dim = client.get_collection(collection).config.params.vectors.size
+    # Vectors are preallocated on disk and payloads written per page, so memory
+    # use does not grow with the collection
+    vectors = np.lib.format.open_memmap(os.path.join(out_dir, VECTORS_FILE), mode="w+", dtype=dtype, shape=(count, vector_dim))
+    if metadata_format == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([("id", pa.string()), ("payload", pa.string())])
+        writer = pq.ParquetWriter(os.path.join(out_dir, PARQUET_FILE), schema, compression="zstd")
+
+        def write_payloads(points) -> None:
+            writer.write_table(pa.table({
+                "id": [json.dumps(point.id) for point in points],
+                "payload": [json.dumps(point.payload) for point in points],
+            }, schema=schema))
+    else:
+        writer = open(os.path.join(out_dir, JSONL_FILE), "w")
+
+        def write_payloads(points) -> None:
+            writer.writelines(json.dumps({"id": point.id, "payload": point.payload}) + "\n" for point in points)
+
+    offset = None
+    row = 0
+    try:
+        while row < count:
+            points, offset = client.scroll(
+                collection_name=collection, limit=batch_size, offset=offset, with_payload=True, with_vectors=True
+            )
+            # Points added during the export are left out; the manifest count stays consistent
+            points = points[:count - row]
+            if points:
+                vectors[row:row + len(points)] = np.asarray([point.vector for point in points], dtype=dtype)
+                write_payloads(points)
+                row += len(points)
+                logger.info("Exported %d/%d points", row, count)
+            if offset is None:
+                break
+    finally:
+        writer.close()
+    vectors.flush()
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "collection": collection,
+        "embed_model": embed_model,
+        "vector_dim": vector_dim,
+        "distance": "cosine",
+        "dtype": dtype,
+        "count": row,
+        "metadata_format": metadata_format,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return row
+
+
+def load_manifest(src_dir: str) -> dict:
+    with open(os.path.join(src_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    if manifest["format_version"] > FORMAT_VERSION:
+        raise ValueError(f"Snapshot format {manifest['format_version']} is newer than supported ({FORMAT_VERSION})")
+    return manifest
+
+
+def iter_payloads(src_dir: str, manifest: dict) -> Iterator[Tuple[object, dict]]:
+    if manifest["metadata_format"] == "parquet":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(os.path.join(src_dir, PARQUET_FILE)).iter_batches():
+            for point_id, payload in zip(batch.column("id").to_pylist(), batch.column("payload").to_pylist()):
+                yield json.loads(point_id), json.loads(payload)
+    else:
+        with open(os.path.join(src_dir, JSONL_FILE)) as f:
+            for line in f:
+                record = json.loads(line)
+                yield record["id"], record["payload"]
+
+
+def import_snapshot(client: QdrantClient, src_dir: str, collection: str, batch_size: int = 512,
+                    workers: int = 4, recreate: bool = False) -> Tuple[int, float]:
+    """
+    Bulk-load a snapshot into collection with parallel batched upserts.
+
+    Returns:
+        tuple[int, float]: Imported points and elapsed seconds
+    """
+    manifest = load_manifest(src_dir)
+    if recreate or not client.collection_exists(collection):
+        client.recreate_collection(
+            collection_name=collection,
+            vectors_config=VectorParams(size=manifest["vector_dim"], distance=Distance.COSINE),
+        )
+        retrieval_cache.collection_versions.bump(collection)
+    ensure_payload_indexes(client, collection)
+    vectors = np.load(os.path.join(src_dir, VECTORS_FILE), mmap_mode="r")
+
+    def upsert(start: int, ids: List, payloads: List[dict]) -> int:
+        block = np.asarray(vectors[start:start + len(ids)], dtype=np.float32)
+        client.upsert(
+            collection_name=collection,
+            points=Batch(ids=ids, vectors=block.tolist(), payloads=payloads),
+            wait=True,
+        )
+        return len(ids)
+
+    start_time = time.perf_counter()
+    imported = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = []
+        ids, payloads, start = [], [], 0
+        for row, (point_id, payload) in enumerate(iter_payloads(src_dir, manifest)):
+            ids.append(point_id)
+            payloads.append(payload)
+            if len(ids) >= batch_size:
+                futures.append(pool.submit(upsert, start, ids, payloads))
+                ids, payloads, start = [], [], row + 1
+            # Bound the batches held in memory
+            if len(futures) >= workers * 2:
+                imported += futures.pop(0).result()
+        if ids:
+            futures.append(pool.submit(upsert, start, ids, payloads))
+        imported += sum(future.result() for future in futures)
+    retrieval_cache.collection_versions.bump(collection)
+    return imported, time.perf_counter() - start_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export or import a Qdrant collection snapshot")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export")
+    export_parser.add_argument("--out", required=True, help="Snapshot directory")
+    export_parser.add_argument("--collection", help="Defaults to the active collection")
+    export_parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    export_parser.add_argument("--metadata-format", choices=["jsonl", "parquet"], default="jsonl")
+
+    import_parser = subparsers.add_parser("import")
+    import_parser.add_argument("--src", required=True, help="Snapshot directory")
+    import_parser.add_argument("--collection", help="Defaults to the collection name in the manifest")
+    import_parser.add_argument("--batch-size", type=int, default=512)
+    import_parser.add_argument("--workers", type=int, default=4)
+    import_parser.add_argument("--recreate", action="store_true", help="Drop the collection first")
+    import_parser.add_argument("--activate", action="store_true", help="Make the imported collection the active index")
+    args = parser.parse_args()
+
+    client = make_vector_client()
+    if args.command == "export":
+        state = load_index_state()
+        collection = args.collection or state.collection
+        count = export_collection(client, collection, state.embed_model, args.out, args.dtype, args.metadata_format)
+        logger.info("Exported %d points from %s to %s", count, collection, args.out)
+        return
+
+    manifest = load_manifest(args.src)
+    collection = args.collection or manifest["collection"]
+    imported, elapsed = import_snapshot(client, args.src, collection, args.batch_size, args.workers, args.recreate)
+    logger.info("Imported %d points into %s in %.1fs (%.0f points/s)", imported, collection, elapsed, imported / elapsed)
+    if args.activate:
+        save_index_state(IndexState(collection=collection, embed_model=manifest["embed_model"], vector_dim=manifest["vector_dim"]))
+        logger.info("Activated %s with embedding model %s", collection, manifest["embed_model"])
+
+
+if __name__ == "__main__":
+    main()
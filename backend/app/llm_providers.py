@@ -4,13 +4,20 @@ Supports both OpenAI and Ollama integrations.
 """
 
 from typing import Dict, Any, Optional, List, Union
+import threading
+from ollama import AsyncClient, Client
 from llama_index.llms.openai import OpenAI
 from llama_index.llms.ollama import Ollama
 from llama_index.core.llms import LLM
 from llama_index.core.settings import Settings
 from app.config import local_settings
+from app.http_clients import get_async_httpx_client, get_httpx_client, pooled_limits
 import os
 
+# One client per provider configuration and process, see get_llm
+_llm_registry: Dict[tuple, LLM] = {}
+_llm_registry_lock = threading.Lock()
+
 def get_openai_llm(
     model_name: Optional[str] = None,
     temperature: float = 0.0,
@@ -31,7 +38,9 @@ def get_openai_llm(
     return OpenAI(
         model=model,
         temperature=temperature,
-        max_tokens=max_tokens
+        max_tokens=max_tokens,
+        http_client=get_httpx_client(),
+        async_http_client=get_async_httpx_client(),
     )
 
 def get_ollama_llm(
@@ -39,7 +48,9 @@ def get_ollama_llm(
     base_url: Optional[str] = None,
     temperature: float = 0.0,
     context_window: int = 4096,
-    max_tokens: int = 512
+    max_tokens: int = 512,
+    keep_alive: Optional[str] = None,
+    num_keep: Optional[int] = None
 ) -> Ollama:
     """
     Initialize an Ollama LLM client.
@@ -50,25 +61,38 @@ def get_ollama_llm(
         temperature: Controls randomness (0 = deterministic, 1 = creative)
         context_window: Size of the context window
         max_tokens: Maximum tokens in the response
+        keep_alive: How long Ollama keeps the model (and its KV cache) loaded
+        num_keep: Prompt tokens kept when the context window shifts
     
     Returns:
         Ollama LLM instance
     """
     # Use environment variable if set, otherwise use default localhost
     base_url = base_url or local_settings.OLLAMA_BASE_URL
+    request_timeout = 120.0  # Longer timeout for larger models
+    keep_alive = keep_alive or local_settings.OLLAMA_KEEP_ALIVE
+    num_keep = local_settings.OLLAMA_NUM_KEEP if num_keep is None else num_keep
 
+    # Keep-alive pooled clients; the ollama package builds its own httpx client per host
     return Ollama(
         model=model_name,
         base_url=base_url,
         temperature=temperature,
         context_window=context_window,
         max_tokens=max_tokens,
-        request_timeout=120.0  # Longer timeout for larger models
+        request_timeout=request_timeout,
+        # Keeping the model loaded lets consecutive requests reuse the cached prompt prefix
+        keep_alive=keep_alive,
+        additional_kwargs={"num_keep": num_keep},
+        client=Client(host=base_url, timeout=request_timeout, limits=pooled_limits()),
+        async_client=AsyncClient(host=base_url, timeout=request_timeout, limits=pooled_limits()),
     )
 
 def get_llm(provider: str = "openai", **kwargs) -> LLM:
     """
     Factory function to get the appropriate LLM based on provider.
+    Clients are created once per process and configuration and then reused,
+    so their connection pools stay warm across requests.
     
     Args:
         provider: The LLM provider to use ("openai" or "ollama")
@@ -80,12 +104,19 @@ def get_llm(provider: str = "openai", **kwargs) -> LLM:
     Raises:
         ValueError: If provider is not supported
     """
-    if provider.lower() == "openai":
+    provider = provider.lower()
+    if provider == "openai":
         # Filter out kwargs that are not supported by OpenAI
-        openai_kwargs = {k: v for k, v in kwargs.items() 
-                         if k in ['model_name', 'temperature', 'max_tokens']}
-        return get_openai_llm(**openai_kwargs)
-    elif provider.lower() == "ollama":
-        return get_ollama_llm(**kwargs)
+        kwargs = {k: v for k, v in kwargs.items() 
+                  if k in ['model_name', 'temperature', 'max_tokens']}
+        factory = get_openai_llm
+    elif provider == "ollama":
+        factory = get_ollama_llm
     else:
         raise ValueError(f"Unsupported LLM provider: {provider}")
+
+    key = (provider, tuple(sorted(kwargs.items())))
+    with _llm_registry_lock:
+        if key not in _llm_registry:
+            _llm_registry[key] = factory(**kwargs)
+        return _llm_registry[key]
@@ -0,0 +1,607 @@
+"""
+In-process vector search for small or offline deployments (VECTOR_BACKEND="local").
+
+Each collection is a directory with
+    vectors.bin    memory-mapped float32/float16 matrix of L2-normalized vectors
+    meta.sqlite    one row per point: id, payload (JSON), deleted flag, IVF cluster
+    centroids.npy  optional IVF centroids (see build_ivf)
+
+Deletions only flag rows; `compact` rewrites both files without them.
+
+Search is a blocked matrix-vector product over the memory map (exact), or over
+the rows of the nprobe closest IVF partitions. Payload filters use the same
+qdrant_client Filter models as the Qdrant backend and are evaluated in SQLite.
+
+`LocalVectorClient` implements the subset of QdrantClient that ArxivRAG and the
+CLIs use, and `LocalVectorStore` is the matching LlamaIndex vector store, so
+query_qdrant and ingestion work unchanged on either backend. Several worker
+processes can share a directory: writes bump a generation counter and readers
+reload the row count, deletions and partitions when it changes.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    FilterCondition,
+    FilterOperator,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import metadata_dict_to_node, node_to_metadata_dict
+from qdrant_client.http.models import (
+    Batch,
+    CountResult,
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    MatchAny,
+    MatchText,
+    MatchValue,
+    PointIdsList,
+    Range,
+    Record,
+)
+
+from app.config import local_settings
+
+VECTORS_FILE = "vectors.bin"
+META_FILE = "meta.sqlite"
+CENTROIDS_FILE = "centroids.npy"
+SEARCH_BLOCK_ROWS = 65536  # Rows multiplied per block, bounds temporary memory
+GROWTH_ROWS = 4096
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _condition_sql(condition: Any, params: list) -> str:
+    if isinstance(condition, Filter):
+        return _filter_sql(condition, params)
+    if not isinstance(condition, FieldCondition):
+        raise ValueError(f"Unsupported filter condition: {condition!r}")
+    # json_each yields one row for scalars and one per element for lists
+    path = f"$.{condition.key}"
+    params.append(path)
+    match, value_range = condition.match, condition.range
+    if isinstance(match, MatchValue):
+        params.append(match.value)
+        clause = "value = ?"
+    elif isinstance(match, MatchAny):
+        params.extend(match.any)
+        clause = f"value IN ({', '.join('?' * len(match.any))})"
+    elif isinstance(match, MatchText):
+        params.append(f"%{match.text}%")
+        clause = "value LIKE ?"
+    elif value_range is not None:
+        parts = []
+        for op, bound in ((">", value_range.gt), (">=", value_range.gte), ("<", value_range.lt), ("<=", value_range.lte)):
+            if bound is not None:
+                parts.append(f"value {op} ?")
+                params.append(bound)
+        clause = " AND ".join(parts) or "1"
+    else:
+        raise ValueError(f"Unsupported filter condition: {condition!r}")
+    return f"EXISTS (SELECT 1 FROM json_each(payload, ?) WHERE {clause})"
+
+
+def _metadata_filters(filters: MetadataFilters) -> Filter:
+    """Translate LlamaIndex MetadataFilters into the equivalent qdrant Filter."""
+    must, must_not = [], []
+    for item in filters.filters:
+        if isinstance(item, MetadataFilters):
+            must.append(_metadata_filters(item))
+            continue
+        key, value, op = item.key, item.value, item.operator
+        if op == FilterOperator.EQ:
+            must.append(FieldCondition(key=key, match=MatchValue(value=value)))
+        elif op == FilterOperator.NE:
+            must_not.append(FieldCondition(key=key, match=MatchValue(value=value)))
+        elif op == FilterOperator.IN:
+            must.append(FieldCondition(key=key, match=MatchAny(any=list(value))))
+        elif op == FilterOperator.NIN:
+            must_not.append(FieldCondition(key=key, match=MatchAny(any=list(value))))
+        elif op == FilterOperator.TEXT_MATCH:
+            must.append(FieldCondition(key=key, match=MatchText(text=value)))
+        elif op in (FilterOperator.GT, FilterOperator.GTE, FilterOperator.LT, FilterOperator.LTE):
+            bound = {FilterOperator.GT: "gt", FilterOperator.GTE: "gte", FilterOperator.LT: "lt", FilterOperator.LTE: "lte"}[op]
+            must.append(FieldCondition(key=key, range=Range(**{bound: value})))
+        else:
+            raise ValueError(f"Unsupported metadata filter operator: {op}")
+    if filters.condition == FilterCondition.OR:
+        if must_not:
+            raise ValueError("Negated metadata filters are not supported under an OR condition")
+        return Filter(should=must)
+    if filters.condition not in (None, FilterCondition.AND):
+        raise ValueError(f"Unsupported metadata filter condition: {filters.condition}")
+    return Filter(must=must, must_not=must_not)
+
+
+def _filter_sql(flt: Optional[Filter], params: list) -> str:
+    """Translate a qdrant Filter into a SQLite WHERE expression over the payload JSON."""
+    if flt is None:
+        return "1"
+    parts = []
+    for condition in flt.must or []:
+        parts.append(_condition_sql(condition, params))
+    if flt.should:
+        parts.append("(" + " OR ".join(_condition_sql(c, params) for c in flt.should) + ")")
+    for condition in flt.must_not or []:
+        parts.append(f"NOT {_condition_sql(condition, params)}")
+    return " AND ".join(parts) or "1"
+
+
+class MemmapVectorIndex:
+    """One collection: memory-mapped vectors plus a SQLite metadata sidecar."""
+
+    def __init__(self, path: str, dim: Optional[int] = None, dtype: Optional[str] = None):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(path, META_FILE), timeout=30.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS points (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, "
+            "payload TEXT NOT NULL, deleted INTEGER NOT NULL DEFAULT 0, cluster INTEGER NOT NULL DEFAULT -1)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        meta = dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+        if "dim" not in meta:
+            if dim is None:
+                raise ValueError(f"{path} is not a vector collection")
+            meta = {"dim": str(dim), "dtype": dtype or local_settings.LOCAL_VECTOR_DTYPE, "capacity": "0", "generation": "0"}
+            self._conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", meta.items())
+        # Bumped when compact() replaces vectors.bin; collections from before it start at 0
+        self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('layout', '0')")
+        self.dim = int(meta["dim"])
+        self.dtype = np.dtype(meta["dtype"])
+        self._generation = None
+        self._layout = None
+        self._vectors: Optional[np.memmap] = None
+        self._refresh()
+
+    # --- State shared with other processes ---
+
+    def _meta(self, key: str) -> str:
+        return self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()[0]
+
+    def _bump_generation(self) -> None:
+        self._conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'generation'")
+
+    def _refresh(self) -> None:
+        """Reload row count, deletions, partitions and the memory map after writes (by any process)."""
+        with self._lock:
+            generation = self._meta("generation")
+            if generation == self._generation:
+                return
+            capacity = int(self._meta("capacity"))
+            layout = self._meta("layout")
+            if self._vectors is None or self._vectors.shape[0] != capacity or layout != self._layout:
+                self._vectors = (
+                    np.memmap(os.path.join(self.path, VECTORS_FILE), dtype=self.dtype, mode="r+", shape=(capacity, self.dim))
+                    if capacity else None
+                )
+                self._layout = layout
+            rows = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM points").fetchone()[0]
+            self.rows = rows
+            self._alive = np.zeros(rows, dtype=bool)
+            self._clusters = np.full(rows, -1, dtype=np.int32)
+            table = np.array(self._conn.execute("SELECT row, deleted, cluster FROM points").fetchall(), dtype=np.int64)
+            if len(table):
+                self._alive[table[:, 0]] = table[:, 1] == 0
+                self._clusters[table[:, 0]] = table[:, 2]
+            centroids_path = os.path.join(self.path, CENTROIDS_FILE)
+            self._centroids = np.load(centroids_path) if os.path.exists(centroids_path) else None
+            self._generation = generation
+
+    def _ensure_capacity(self, rows: int) -> None:
+        capacity = int(self._meta("capacity"))
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2, GROWTH_ROWS)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(os.path.join(self.path, VECTORS_FILE), "ab") as f:
+            f.truncate(new_capacity * self.dim * self.dtype.itemsize)
+        self._conn.execute("UPDATE meta SET value = ? WHERE key = 'capacity'", (str(new_capacity),))
+        self._vectors = np.memmap(os.path.join(self.path, VECTORS_FILE), dtype=self.dtype, mode="r+", shape=(new_capacity, self.dim))
+
+    # --- Writes ---
+
+    def upsert(self, ids: List[str], vectors: np.ndarray, payloads: List[dict]) -> None:
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = dict(self._conn.execute(
+                    f"SELECT id, row FROM points WHERE id IN ({', '.join('?' * len(ids))})", ids
+                ).fetchall()) if ids else {}
+                next_row = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM points").fetchone()[0]
+                rows = []
+                for point_id in ids:
+                    if point_id in existing:
+                        rows.append(existing[point_id])
+                    else:
+                        rows.append(next_row)
+                        existing[point_id] = next_row
+                        next_row += 1
+                self._ensure_capacity(next_row)
+                clusters = self._assign(vectors)
+                self._vectors[rows] = vectors.astype(self.dtype)
+                self._vectors.flush()
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO points (row, id, payload, deleted, cluster) VALUES (?, ?, ?, 0, ?)",
+                    [(row, point_id, json.dumps(payload), int(cluster))
+                     for row, point_id, payload, cluster in zip(rows, ids, payloads, clusters)],
+                )
+                self._bump_generation()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._refresh()
+
+    def delete(self, ids: Optional[List[str]] = None, flt: Optional[Filter] = None) -> None:
+        with self._lock:
+            if ids is not None:
+                self._conn.executemany("UPDATE points SET deleted = 1 WHERE id = ?", [(str(i),) for i in ids])
+            else:
+                params: list = []
+                self._conn.execute(f"UPDATE points SET deleted = 1 WHERE {_filter_sql(flt, params)}", params)
+            self._bump_generation()
+        self._refresh()
+
+    def compact(self) -> int:
+        """
+        Rewrite vectors.bin and the points table without deleted rows. Live rows
+        keep their order and IVF partition; other processes remap on their next
+        read. Writes wait for the compaction, searches running during it may lose
+        a few hits.
+
+        Returns:
+            int: Number of rows removed
+        """
+        tmp_path = os.path.join(self.path, VECTORS_FILE + ".compact")
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                live = [row for (row,) in self._conn.execute("SELECT row FROM points WHERE deleted = 0 ORDER BY row")]
+                removed = self._conn.execute("SELECT COUNT(*) FROM points").fetchone()[0] - len(live)
+                if not removed:
+                    self._conn.execute("ROLLBACK")
+                    return 0
+                capacity = max(len(live), GROWTH_ROWS)
+                compacted = np.memmap(tmp_path, dtype=self.dtype, mode="w+", shape=(capacity, self.dim))
+                for start in range(0, len(live), SEARCH_BLOCK_ROWS):
+                    rows = live[start:start + SEARCH_BLOCK_ROWS]
+                    compacted[start:start + len(rows)] = self._vectors[rows]
+                compacted.flush()
+                del compacted
+                self._conn.execute("DELETE FROM points WHERE deleted = 1")
+                # Ascending, every live row moves down into a slot that is already free
+                self._conn.executemany(
+                    "UPDATE points SET row = ? WHERE row = ?", [(new, old) for new, old in enumerate(live) if new != old]
+                )
+                self._conn.execute("UPDATE meta SET value = ? WHERE key = 'capacity'", (str(capacity),))
+                self._conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'layout'")
+                self._bump_generation()
+                self._vectors = None
+                os.replace(tmp_path, os.path.join(self.path, VECTORS_FILE))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        self._refresh()
+        return removed
+
+    # --- Reads ---
+
+    def count(self, flt: Optional[Filter] = None) -> int:
+        params: list = []
+        return self._conn.execute(
+            f"SELECT COUNT(*) FROM points WHERE deleted = 0 AND {_filter_sql(flt, params)}", params
+        ).fetchone()[0]
+
+    def records(self, flt: Optional[Filter] = None, ids: Optional[List[str]] = None, after_row: int = -1,
+                limit: Optional[int] = None) -> List[Tuple[int, str, dict]]:
+        params: list = [after_row]
+        sql = "SELECT row, id, payload FROM points WHERE deleted = 0 AND row > ?"
+        if ids is not None:
+            sql += f" AND id IN ({', '.join('?' * len(ids))})"
+            params.extend(str(i) for i in ids)
+        sql += f" AND {_filter_sql(flt, params)} ORDER BY row"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [(row, point_id, json.loads(payload)) for row, point_id, payload in self._conn.execute(sql, params)]
+
+    def records_by_rows(self, rows: List[int]) -> List[Tuple[int, str, dict]]:
+        sql = f"SELECT row, id, payload FROM points WHERE row IN ({', '.join('?' * len(rows))})"
+        return [(row, point_id, json.loads(payload)) for row, point_id, payload in self._conn.execute(sql, rows)]
+
+    def vector(self, row: int) -> List[float]:
+        return self._vectors[row].astype(np.float32).tolist()
+
+    def _candidate_rows(self, query: np.ndarray, flt: Optional[Filter], nprobe: int, alive: np.ndarray,
+                        clusters: np.ndarray, centroids: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Rows to score, or None for every live row."""
+        candidates = None
+        if centroids is not None and nprobe > 0:
+            probes = np.argsort(centroids @ query)[::-1][:nprobe]
+            candidates = np.flatnonzero(np.isin(clusters, probes) & alive)
+        if flt is not None:
+            params: list = []
+            filtered = np.fromiter(
+                (row for (row,) in self._conn.execute(
+                    f"SELECT row FROM points WHERE deleted = 0 AND {_filter_sql(flt, params)}", params)),
+                dtype=np.int64,
+            )
+            filtered = filtered[filtered < len(alive)]
+            candidates = filtered if candidates is None else np.intersect1d(candidates, filtered)
+        return candidates
+
+    def search(self, query: List[float], top_k: int, flt: Optional[Filter] = None,
+               nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Top-k rows by cosine similarity.
+
+        Args:
+            query: Query embedding
+            top_k: Number of results
+            flt: Optional payload filter
+            nprobe: IVF partitions to scan; defaults to LOCAL_VECTOR_NPROBE (0 = exact)
+
+        Returns:
+            list[tuple[int, float]]: (row, score), best first
+        """
+        self._refresh()
+        # Consistent snapshot; writers replace these objects instead of mutating them
+        with self._lock:
+            vectors, alive, clusters, centroids = self._vectors, self._alive, self._clusters, self._centroids
+        if not len(alive):
+            return []
+        query_vec = _normalize(np.asarray(query, dtype=np.float32))
+        nprobe = local_settings.LOCAL_VECTOR_NPROBE if nprobe is None else nprobe
+        candidates = self._candidate_rows(query_vec, flt, nprobe, alive, clusters, centroids)
+        if candidates is not None and not len(candidates):
+            return []
+
+        best_rows, best_scores = [], []
+        total = len(alive) if candidates is None else len(candidates)
+        for start in range(0, total, SEARCH_BLOCK_ROWS):
+            if candidates is None:
+                rows = np.arange(start, min(start + SEARCH_BLOCK_ROWS, total))
+                block = vectors[start:start + len(rows)]
+            else:
+                rows = candidates[start:start + SEARCH_BLOCK_ROWS]
+                block = vectors[rows]
+            scores = block.astype(np.float32) @ query_vec
+            scores[~alive[rows]] = -np.inf
+            keep = min(top_k, len(scores))
+            top = np.argpartition(-scores, keep - 1)[:keep]
+            best_rows.append(rows[top])
+            best_scores.append(scores[top])
+        rows = np.concatenate(best_rows)
+        scores = np.concatenate(best_scores)
+        order = np.argsort(-scores)[:top_k]
+        return [(int(rows[i]), float(scores[i])) for i in order if np.isfinite(scores[i])]
+
+    def build_ivf(self, nlist: int, iterations: int = 10, sample_size: int = 50000) -> None:
+        """Train IVF centroids with spherical k-means on a sample and assign every row."""
+        self._refresh()
+        alive_rows = np.flatnonzero(self._alive)
+        rng = np.random.default_rng(0)
+        sample = self._vectors[np.sort(rng.choice(alive_rows, min(sample_size, len(alive_rows)), replace=False))].astype(np.float32)
+        centroids = sample[rng.choice(len(sample), min(nlist, len(sample)), replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(len(centroids)):
+                members = sample[assignment == cluster]
+                if len(members):
+                    centroids[cluster] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+        with self._lock:
+            np.save(os.path.join(self.path, CENTROIDS_FILE), centroids)
+            self._centroids = centroids
+            updates = []
+            for start in range(0, self.rows, SEARCH_BLOCK_ROWS):
+                block = self._vectors[start:start + SEARCH_BLOCK_ROWS].astype(np.float32)
+                assignment = np.argmax(block @ centroids.T, axis=1)
+                updates.extend((int(c), start + i) for i, c in enumerate(assignment))
+            self._conn.executemany("UPDATE points SET cluster = ? WHERE row = ?", updates)
+            self._bump_generation()
+        self._refresh()
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        if self._centroids is None:
+            return np.full(len(vectors), -1)
+        return np.argmax(vectors @ self._centroids.T, axis=1)
+
+
+class LocalVectorClient:
+    """The subset of QdrantClient used by ArxivRAG and the CLIs, backed by MemmapVectorIndex."""
+
+    def __init__(self, path: str = local_settings.LOCAL_VECTOR_PATH):
+        self.path = path
+        self._indexes: Dict[str, MemmapVectorIndex] = {}
+        self._lock = threading.Lock()
+
+    def _collection_path(self, collection_name: str) -> str:
+        return os.path.join(self.path, collection_name)
+
+    def index(self, collection_name: str) -> MemmapVectorIndex:
+        with self._lock:
+            if collection_name not in self._indexes:
+                self._indexes[collection_name] = MemmapVectorIndex(self._collection_path(collection_name))
+            return self._indexes[collection_name]
+
+    def collection_exists(self, collection_name: str) -> bool:
+        return os.path.exists(os.path.join(self._collection_path(collection_name), META_FILE))
+
+    def recreate_collection(self, collection_name: str, vectors_config, **kwargs) -> bool:
+        self.delete_collection(collection_name)
+        with self._lock:
+            self._indexes[collection_name] = MemmapVectorIndex(self._collection_path(collection_name), dim=vectors_config.size)
+        return True
+
+    def delete_collection(self, collection_name: str, **kwargs) -> bool:
+        with self._lock:
+            self._indexes.pop(collection_name, None)
+        shutil.rmtree(self._collection_path(collection_name), ignore_errors=True)
+        return True
+
+    def get_collection(self, collection_name: str):
+        index = self.index(collection_name)
+        return SimpleNamespace(points_count=index.count(), config=SimpleNamespace(params=SimpleNamespace(vectors=SimpleNamespace(size=index.dim))))
+
+    def create_payload_index(self, collection_name: str, field_name: str, field_schema=None, **kwargs) -> None:
+        # Filters are evaluated in SQLite; there is nothing to index separately
+        return None
+
+    def count(self, collection_name: str, count_filter: Optional[Filter] = None, exact: bool = True, **kwargs) -> CountResult:
+        return CountResult(count=self.index(collection_name).count(count_filter))
+
+    def _to_records(self, index: MemmapVectorIndex, rows: Iterable[Tuple[int, str, dict]], with_payload, with_vectors) -> List[Record]:
+        records = []
+        for row, point_id, payload in rows:
+            if with_payload is False:
+                payload = None
+            elif isinstance(with_payload, list):
+                payload = {key: payload[key] for key in with_payload if key in payload}
+            records.append(Record(id=point_id, payload=payload, vector=index.vector(row) if with_vectors else None))
+        return records
+
+    def scroll(self, collection_name: str, scroll_filter: Optional[Filter] = None, limit: int = 10, offset=None,
+               with_payload=True, with_vectors=False, **kwargs) -> Tuple[List[Record], Optional[int]]:
+        index = self.index(collection_name)
+        after_row = -1 if offset is None else int(offset) - 1
+        # One extra row tells whether there is a next page
+        rows = index.records(flt=scroll_filter, after_row=after_row, limit=limit + 1)
+        next_offset = rows[limit][0] if len(rows) > limit else None
+        return self._to_records(index, rows[:limit], with_payload, with_vectors), next_offset
+
+    def retrieve(self, collection_name: str, ids: List, with_payload=True, with_vectors=False, **kwargs) -> List[Record]:
+        index = self.index(collection_name)
+        return self._to_records(index, index.records(ids=[str(i) for i in ids]), with_payload, with_vectors)
+
+    def upsert(self, collection_name: str, points, wait: bool = True, **kwargs) -> None:
+        if isinstance(points, Batch):
+            ids, vectors, payloads = points.ids, points.vectors, points.payloads or [{} for _ in points.ids]
+        else:
+            ids = [point.id for point in points]
+            vectors = [point.vector for point in points]
+            payloads = [point.payload or {} for point in points]
+        self.index(collection_name).upsert([str(i) for i in ids], np.asarray(vectors, dtype=np.float32), payloads)
+
+    def delete(self, collection_name: str, points_selector, wait: bool = True, **kwargs) -> None:
+        index = self.index(collection_name)
+        if isinstance(points_selector, FilterSelector):
+            index.delete(flt=points_selector.filter)
+        elif isinstance(points_selector, Filter):
+            index.delete(flt=points_selector)
+        elif isinstance(points_selector, PointIdsList):
+            index.delete(ids=[str(i) for i in points_selector.points])
+        else:
+            index.delete(ids=[str(i) for i in points_selector])
+
+    def search(self, collection_name: str, query_vector: List[float], limit: int = 10,
+               query_filter: Optional[Filter] = None) -> List[Tuple[str, float, dict]]:
+        index = self.index(collection_name)
+        hits = index.search(query_vector, limit, flt=query_filter)
+        if not hits:
+            return []
+        records = {row: (point_id, payload) for row, point_id, payload in index.records_by_rows([row for row, _ in hits])}
+        # A compaction between the search and this lookup renumbers rows
+        return [(records[row][0], score, records[row][1]) for row, score in hits if row in records]
+
+
+class LocalVectorStore(BasePydanticVectorStore):
+    """LlamaIndex vector store over LocalVectorClient; accepts qdrant_filters like QdrantVectorStore."""
+
+    stores_text: bool = True
+    collection_name: str
+    _client: LocalVectorClient = PrivateAttr()
+
+    def __init__(self, client: LocalVectorClient, collection_name: str, **kwargs: Any):
+        super().__init__(collection_name=collection_name, **kwargs)
+        self._client = client
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "LocalVectorStore"
+
+    @property
+    def client(self) -> LocalVectorClient:
+        return self._client
+
+    def add(self, nodes: List[BaseNode], **kwargs: Any) -> List[str]:
+        ids = [node.node_id for node in nodes]
+        payloads = [node_to_metadata_dict(node, remove_text=False, flat_metadata=False) for node in nodes]
+        vectors = np.asarray([node.get_embedding() for node in nodes], dtype=np.float32)
+        self._client.index(self.collection_name).upsert(ids, vectors, payloads)
+        return ids
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        self._client.delete(
+            self.collection_name,
+            FilterSelector(filter=Filter(must=[FieldCondition(key="doc_id", match=MatchValue(value=ref_doc_id))])),
+        )
+
+    def _query_filter(self, query: VectorStoreQuery, qdrant_filters: Optional[Filter]) -> Optional[Filter]:
+        """Combine qdrant_filters with the query's metadata filters and doc_ids, as QdrantVectorStore does."""
+        if query.node_ids:
+            raise ValueError("LocalVectorStore does not support querying by node_ids")
+        conditions = [qdrant_filters] if qdrant_filters is not None else []
+        if query.filters is not None and query.filters.filters:
+            conditions.append(_metadata_filters(query.filters))
+        if query.doc_ids:
+            conditions.append(FieldCondition(key="doc_id", match=MatchAny(any=list(query.doc_ids))))
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 and isinstance(conditions[0], Filter) else Filter(must=conditions)
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        hits = self._client.search(
+            self.collection_name, query.query_embedding, limit=query.similarity_top_k,
+            query_filter=self._query_filter(query, kwargs.get("qdrant_filters")),
+        )
+        nodes, similarities, ids = [], [], []
+        for point_id, score, payload in hits:
+            node = metadata_dict_to_node(payload)
+            nodes.append(node)
+            similarities.append(score)
+            ids.append(point_id)
+        return VectorStoreQueryResult(nodes=nodes, similarities=similarities, ids=ids)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintain local vector collections")
+    parser.add_argument("command", choices=["build-ivf", "compact", "info"])
+    parser.add_argument("--collection", default=local_settings.COLLECTION_NAME)
+    parser.add_argument("--nlist", type=int, default=1024, help="IVF partitions (about sqrt(points) is a good start)")
+    args = parser.parse_args()
+
+    index = LocalVectorClient().index(args.collection)
+    if args.command == "build-ivf":
+        index.build_ivf(args.nlist)
+    elif args.command == "compact":
+        print(f"Removed {index.compact()} deleted rows")
+    print(f"{args.collection}: {index.count()} points, dim {index.dim}, {index.dtype}, "
+          f"IVF {'off' if index._centroids is None else len(index._centroids)}")
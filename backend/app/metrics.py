@@ -0,0 +1,65 @@
+"""
+Minimal in-process metrics registry for ConversationChatBot.
+Counters, gauges and summaries are kept per worker process and rendered in the
+Prometheus text exposition format by the /metrics endpoint.
+"""
+
+import threading
+from typing import Dict, Tuple
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+_gauges: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+_summaries: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Tuple[int, float]] = {}
+
+
+def _key(name: str, labels: Dict[str, str]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, value: float = 1.0, **labels: str) -> None:
+    """Increase a counter by value."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0.0) + value
+
+
+def set_gauge(name: str, value: float, **labels: str) -> None:
+    """Set a gauge to value."""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    """Record one observation (e.g. a duration) in a count/sum summary."""
+    key = _key(name, labels)
+    with _lock:
+        count, total = _summaries.get(key, (0, 0.0))
+        _summaries[key] = (count + 1, total + value)
+
+
+def get_counter(name: str, **labels: str) -> float:
+    """Current value of a counter, 0 if it was never incremented."""
+    with _lock:
+        return _counters.get(_key(name, labels), 0.0)
+
+
+def _format(name: str, labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return name
+    rendered = ",".join(f'{k}="{v}"' for k, v in labels)
+    return f"{name}{{{rendered}}}"
+
+
+def render() -> str:
+    """Render every metric in the Prometheus text format."""
+    lines = []
+    with _lock:
+        for (name, labels), value in sorted(_counters.items()):
+            lines.append(f"{_format(name, labels)} {value}")
+        for (name, labels), value in sorted(_gauges.items()):
+            lines.append(f"{_format(name, labels)} {value}")
+        for (name, labels), (count, total) in sorted(_summaries.items()):
+            lines.append(f"{_format(name + '_count', labels)} {count}")
+            lines.append(f"{_format(name + '_sum', labels)} {total}")
+    return "\n".join(lines) + "\n"
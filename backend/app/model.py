@@ -1,6 +1,6 @@
 import uuid
 
-from sqlmodel import SQLModel, Field, Relationship, Column
+from sqlmodel import SQLModel, Field, Relationship, Column, Index
 from datetime import datetime
 
 class InsertUser(SQLModel):
@@ -19,9 +19,17 @@ class InsertConversation(SQLModel):
     title: str | None = Field(default=None)
 
 class Conversations(InsertConversation, table=True):
+    # Serves the per-user conversation list sorted by recent activity
+    __table_args__ = (Index("ix_conversations_user_id_updated_at", "user_id", "updated_at"),)
+
     id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: datetime = Field(default_factory=datetime.now)
+    # Denormalized from messages, maintained by crud.create_message(s)
+    # server_default fills the column for existing rows when the migration adds it,
+    # initalize_db/backfill_conversation_stats.py then recounts them
+    message_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    last_message_preview: str | None = Field(default=None)
     users: Users = Relationship(back_populates="conversations")
     messages: list["Messages"] = Relationship(back_populates="conversation")
 
@@ -36,3 +44,6 @@ class Messages(InsertMessage, table=True):
     conversation: Conversations = Relationship(back_populates="messages")
 
 
+
+class BulkMessagesResponse(SQLModel):
+    ids: list[str]
@@ -10,7 +10,15 @@ from llama_index import core as llama_core
 import os
 from dotenv import load_dotenv
 
+_initialized = False
+
 def init_observability():
+    """Set up tracing once per process; skipped when PHOENIX_API_KEY is not set."""
+    global _initialized
+    if _initialized:
+        return
+    _initialized = True
+
     # Load environment variables from .env file
     load_dotenv()
 
@@ -29,7 +37,10 @@ def init_observability():
     # # Instrument the application
     # LlamaIndexInstrumentor().instrument(tracer_provider=tracer_provider)
 
-    PHOENIX_API_KEY = os.environ["PHOENIX_API_KEY"]
+    PHOENIX_API_KEY = os.environ.get("PHOENIX_API_KEY")
+    if not PHOENIX_API_KEY:
+        print("PHOENIX_API_KEY is not set, tracing disabled")
+        return
     os.environ["OTEL_EXPORTER_OTLP_HEADERS"] = f"api_key={PHOENIX_API_KEY}"
     llama_core.set_global_handler(
         "arize_phoenix", endpoint="https://llamatrace.com/v1/traces"
@@ -0,0 +1,116 @@
+"""
+Per-paper indexing progress for two-phase (progressive) indexing.
+
+A cold query first embeds one abstract node per paper, so the papers are
+searchable immediately (state "abstract"), then downloads the PDFs and embeds
+the full-text chunks in the background ("full_text", or "failed"). /chat reports
+the state of the papers fetched during a turn and GET /chat/indexing lets the
+client poll until full-text retrieval is ready.
+
+States live in process memory, or in CACHE_SQLITE_PATH with the "sqlite" cache
+backend so every worker sees the progress of indexing started by another.
+"""
+
+import contextvars
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from app.config import local_settings
+
+ABSTRACT = "abstract"
+FULL_TEXT = "full_text"
+FAILED = "failed"
+UNKNOWN = "unknown"
+
+MAX_MEMORY_ENTRIES = 10000
+
+# Papers fetched during the current request, see collect_papers()
+_collected: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar("fetched_papers", default=None)
+
+
+class PaperIndexingStates:
+    """arxiv_id -> indexing state, optionally shared through a SQLite file."""
+
+    def __init__(self, path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._states: Dict[str, str] = {}
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS paper_indexing (arxiv_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def set(self, arxiv_ids: Iterable[str], state: str) -> None:
+        arxiv_ids = list(arxiv_ids)
+        with self._lock:
+            if self._conn is None:
+                for arxiv_id in arxiv_ids:
+                    self._states.pop(arxiv_id, None)
+                    self._states[arxiv_id] = state
+                # Oldest first, dict order is insertion order
+                while len(self._states) > MAX_MEMORY_ENTRIES:
+                    del self._states[next(iter(self._states))]
+            else:
+                now = time.time()
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO paper_indexing (arxiv_id, state, updated) VALUES (?, ?, ?)",
+                    [(arxiv_id, state, now) for arxiv_id in arxiv_ids],
+                )
+
+    def get(self, arxiv_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+        """State per paper; None for papers this store knows nothing about."""
+        arxiv_ids = list(arxiv_ids)
+        with self._lock:
+            if self._conn is None:
+                return {arxiv_id: self._states.get(arxiv_id) for arxiv_id in arxiv_ids}
+            rows = dict(self._conn.execute(
+                f"SELECT arxiv_id, state FROM paper_indexing WHERE arxiv_id IN ({', '.join('?' * len(arxiv_ids))})",
+                arxiv_ids,
+            ).fetchall()) if arxiv_ids else {}
+        return {arxiv_id: rows.get(arxiv_id) for arxiv_id in arxiv_ids}
+
+
+paper_states = PaperIndexingStates(
+    local_settings.CACHE_SQLITE_PATH if local_settings.CACHE_BACKEND.lower() == "sqlite" else None
+)
+
+
+@contextmanager
+def collect_papers(papers: List[str]) -> Iterator[List[str]]:
+    """
+    Append the arxiv IDs of papers fetched within the block to papers. Tools run
+    in executor threads, so this is entered around each tool call (see
+    components.create_agent) rather than around the whole request.
+    """
+    token = _collected.set(papers)
+    try:
+        yield papers
+    finally:
+        _collected.reset(token)
+
+
+def record_fetched(arxiv_ids: Iterable[str]) -> None:
+    papers = _collected.get()
+    if papers is None:
+        return
+    for arxiv_id in arxiv_ids:
+        if arxiv_id not in papers:
+            papers.append(arxiv_id)
+
+
+def progress(arxiv_ids: Iterable[str]) -> dict:
+    """
+    Indexing progress of the given papers, as returned to the client.
+
+    Returns:
+        dict: {"papers": {arxiv_id: state}, "full_text_ready": bool}; papers with
+        no recorded state (mistyped IDs, evicted entries, or state kept by another
+        worker with the "memory" backend) are UNKNOWN and keep full_text_ready false
+    """
+    states = {arxiv_id: state or UNKNOWN for arxiv_id, state in paper_states.get(arxiv_ids).items()}
+    return {"papers": states, "full_text_ready": all(state in (FULL_TEXT, FAILED) for state in states.values())}
@@ -0,0 +1,173 @@
+"""
+Speculative prefetch of papers related to a cold query.
+
+When lazy_load_and_query has to fetch a topic from arXiv, it indexes only the
+MAX_RESULTS papers it found. Follow-up questions usually drift to neighbouring
+topics, so the prefetcher derives a few related arXiv searches from the fetched
+papers (their dominant category combined with terms that recur across the
+abstracts) and indexes those results in the background. Once the collection
+holds papers, questions are answered from it without a fetch; when the best
+match scores below PREFETCH_WEAK_SCORE the question itself is searched on arXiv
+in the background instead, so the next turn on that topic finds papers.
+
+Prefetching is best effort and low priority: one worker thread per process, a
+bounded queue that drops work when full, its own rate budget on top of the
+shared arXiv budget, and nothing is fetched while the arXiv circuit is open.
+"""
+
+import queue
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List
+
+from app import metrics
+from app.config import local_settings
+from app.ratelimit import TokenBucket
+
+TERM_PATTERN = re.compile(r"[a-z][a-z0-9\-]{2,}")
+STOPWORDS = frozenset("""
+    a about above across after again against all also although among an and another any are as at be because been
+    before being between both but by can could do does done during each either et etc even every for from further
+    given has have having here how however if in into is it its itself just may more most much must new no nor not
+    now of on one only or other our out over own paper per rather same several should show shown shows since so
+    some such than that the their them then there these they this those through thus to too two under up upon us
+    use used uses using very via was we well were what when where whether which while who whose why will with
+    within without would yet approach approaches method methods propose proposed present results result work
+    study studies based novel existing recent problem problems task tasks performance state art achieve achieves
+    demonstrate experiments experimental framework first three different various significantly significant large
+    further provide provides introduce introduces
+""".split())
+RECENT_QUERIES = 256  # Prefetched queries remembered to avoid repeating them
+
+
+def _terms(text: str) -> set:
+    """Distinct unigrams and bigrams of an abstract, without stopwords."""
+    words = [word.strip("-") for word in TERM_PATTERN.findall(text.lower())]
+    words = [word for word in words if len(word) > 2 and word not in STOPWORDS]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def related_queries(entries: List[Dict[str, Any]], question: str, limit: int) -> List[str]:
+    """
+    Build arXiv search queries for topics next to the fetched papers.
+
+    Args:
+        entries: Paper records returned for the cold query
+        question: The question that triggered the fetch; its words are excluded
+        limit: Maximum number of queries
+
+    Returns:
+        list[str]: Raw arXiv search_query strings, most promising first
+    """
+    if not entries or limit <= 0:
+        return []
+    question_words = set(TERM_PATTERN.findall(question.lower()))
+    document_frequency = Counter()
+    for entry in entries:
+        document_frequency.update(_terms(f"{entry.get('title', '')} {entry.get('summary', '')}"))
+
+    # Terms shared by several abstracts describe the neighbourhood, not one paper;
+    # bigrams are more specific than single words
+    candidates = [
+        (count * (2 if " " in term else 1), term)
+        for term, count in document_frequency.items()
+        if count > 1 and not set(term.split()) & question_words
+    ]
+    candidates.sort(key=lambda item: (-item[0], item[1]))
+
+    categories = Counter(entry.get("primary_category") for entry in entries if entry.get("primary_category"))
+    category = categories.most_common(1)[0][0] if categories else None
+
+    queries = []
+    used_words: set = set()
+    for _, term in candidates:
+        # Skip terms overlapping an already chosen one ("language" after "language models")
+        if set(term.split()) & used_words:
+            continue
+        used_words.update(term.split())
+        query = f'all:"{term}"'
+        queries.append(f"cat:{category} AND {query}" if category else query)
+        if len(queries) >= limit:
+            break
+    return queries
+
+
+def is_weak_retrieval(nodes: List[Any]) -> bool:
+    """True when no retrieved node is similar enough to cover the question."""
+    scores = [node.score for node in nodes if node.score is not None]
+    return not scores or max(scores) < local_settings.PREFETCH_WEAK_SCORE
+
+
+class Prefetcher:
+    """Background queue feeding related searches into the ingestion path."""
+
+    def __init__(self, queries_per_minute: float, queue_size: int, max_results: int):
+        self.max_results = max_results
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._budget = TokenBucket("arxiv_prefetch", rate=queries_per_minute / 60, capacity=1)
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def submit(self, rag, queries: List[str]) -> int:
+        """
+        Queue queries for rag without blocking. Queries prefetched recently and
+        queries that do not fit in the queue are dropped.
+
+        Returns:
+            int: Number of queued queries
+        """
+        queued = 0
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="arxiv-prefetch", daemon=True)
+                self._worker.start()
+            for query in queries:
+                if query in self._recent:
+                    continue
+                try:
+                    self._queue.put_nowait((rag, query))
+                except queue.Full:
+                    metrics.inc("prefetch_dropped_total")
+                    break
+                self._recent[query] = None
+                while len(self._recent) > RECENT_QUERIES:
+                    self._recent.popitem(last=False)
+                queued += 1
+        metrics.inc("prefetch_queued_total", queued)
+        metrics.set_gauge("prefetch_queue_depth", self._queue.qsize())
+        return queued
+
+    def _run(self) -> None:
+        while True:
+            rag, query = self._queue.get()
+            self._budget.acquire(max_wait=float("inf"))
+            try:
+                indexed = self._prefetch(rag, query)
+                metrics.inc("prefetch_completed_total")
+                metrics.inc("prefetch_papers_indexed_total", indexed)
+            except Exception as e:
+                metrics.inc("prefetch_failed_total")
+                print(f"⚠️ Prefetch of '{query}' failed: {e}")
+            finally:
+                self._queue.task_done()
+                metrics.set_gauge("prefetch_queue_depth", self._queue.qsize())
+
+    def _prefetch(self, rag, query: str) -> int:
+        # Same stages as a cold query: stream the feed, download new PDFs, embed and store
+        papers = list(rag.stream_papers(query, max_results=self.max_results))
+        if not papers:
+            return 0
+        nodes, _ = rag.create_nodes_from_papers(papers)
+        if nodes:
+            rag.vectorize_and_store(nodes)
+        print(f"Prefetched {len(papers)} papers for '{query}'")
+        return len(papers)
+
+
+prefetcher = Prefetcher(
+    queries_per_minute=local_settings.PREFETCH_QUERIES_PER_MINUTE,
+    queue_size=local_settings.PREFETCH_QUEUE_SIZE,
+    max_results=local_settings.PREFETCH_MAX_RESULTS,
+)
@@ -0,0 +1,133 @@
+"""
+Prompt assembly that keeps the prompt prefix stable across turns.
+
+The agent prompt is laid out as
+
+    system prompt + tool descriptions | conversation history | current message
+
+The first part never changes and the history only grows by appending, so the
+prompt of turn N is a prefix of the prompt of turn N+1 and Ollama can reuse
+its KV cache instead of re-evaluating the whole prompt. When the history has
+to be shortened, it is cut in whole blocks so the prefix stays stable for
+several turns instead of shifting on every request.
+
+`install_prompt_metrics()` records prompt evaluation stats reported by Ollama.
+`track_prompt_stats()` aggregates them for one request. Ollama reports only the
+prompt tokens it evaluated (those not served from its KV cache), not the prompt
+size, so prefix reuse shows up as few evaluated tokens per call; the prompt size
+next to it is a chars/4 estimate and not comparable token for token.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from app import metrics
+from app.config import local_settings
+from app.context_packing import estimate_tokens
+
+_request_stats: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("prompt_stats", default=None)
+_installed = False
+_install_lock = threading.Lock()
+
+
+def build_chat_history(message_history: Optional[List[Dict[str, Any]]]):
+    """
+    Convert the frontend history into chat messages for the agent.
+
+    Args:
+        message_history: Previous messages as sent by the frontend ({"content", "isBot"})
+
+    Returns:
+        list[ChatMessage]: Oldest first, trimmed in CHAT_HISTORY_BLOCK steps
+    """
+    from llama_index.core.llms import ChatMessage
+
+    history = message_history or []
+    max_messages = local_settings.CHAT_HISTORY_MAX_MESSAGES
+    if len(history) > max_messages:
+        # Drop whole blocks of old messages so the kept window only moves every few turns
+        block = local_settings.CHAT_HISTORY_BLOCK
+        excess = len(history) - max_messages
+        history = history[((excess + block - 1) // block) * block:]
+
+    return [
+        ChatMessage(
+            role="assistant" if msg.get("isBot", False) else "user",
+            # Normalized so the same message always renders to the same tokens
+            content=str(msg.get("content", "")).strip(),
+        )
+        for msg in history
+    ]
+
+
+def _raw_value(raw: Any, key: str) -> Optional[float]:
+    if raw is None:
+        return None
+    value = raw.get(key) if isinstance(raw, dict) else getattr(raw, key, None)
+    return float(value) if value is not None else None
+
+
+def _record_llm_call(messages: List[Any], raw: Any) -> None:
+    prompt_eval_count = _raw_value(raw, "prompt_eval_count")
+    if prompt_eval_count is None:
+        return  # Not an Ollama response
+    prompt_eval_seconds = (_raw_value(raw, "prompt_eval_duration") or 0.0) / 1e9
+    estimated_prompt_tokens = float(sum(estimate_tokens(str(message.content or "")) for message in messages))
+
+    metrics.observe("llm_prompt_eval_seconds", prompt_eval_seconds)
+    metrics.observe("llm_prompt_eval_tokens", prompt_eval_count)
+    metrics.inc("llm_prompt_eval_tokens_total", prompt_eval_count)
+    metrics.inc("llm_prompt_tokens_estimated_total", estimated_prompt_tokens)
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats["llm_calls"] += 1
+        stats["estimated_prompt_tokens"] += estimated_prompt_tokens
+        stats["prompt_eval_tokens"] += prompt_eval_count
+        stats["prompt_eval_seconds"] += prompt_eval_seconds
+
+
+def install_prompt_metrics() -> None:
+    """Register a LlamaIndex instrumentation handler for LLM chat calls (once per process)."""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        _installed = True
+
+    from llama_index.core.instrumentation import get_dispatcher
+    from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+    from llama_index.core.instrumentation.events.llm import LLMChatEndEvent
+
+    class PromptStatsHandler(BaseEventHandler):
+        @classmethod
+        def class_name(cls) -> str:
+            return "PromptStatsHandler"
+
+        def handle(self, event, **kwargs) -> None:
+            # For streaming calls the last chunk carries the final counters
+            if isinstance(event, LLMChatEndEvent) and event.response is not None:
+                _record_llm_call(event.messages, event.response.raw)
+
+    get_dispatcher().add_event_handler(PromptStatsHandler())
+
+
+@contextmanager
+def track_prompt_stats(label: str) -> Iterator[Dict[str, float]]:
+    """Collect prompt stats of all LLM calls made inside the block and print a summary."""
+    stats = {"llm_calls": 0, "estimated_prompt_tokens": 0.0, "prompt_eval_tokens": 0.0, "prompt_eval_seconds": 0.0}
+    token = _request_stats.set(stats)
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+        if stats["llm_calls"]:
+            print(
+                f"Prompt stats for {label}: {stats['llm_calls']} LLM calls, ~{stats['estimated_prompt_tokens']:.0f} prompt tokens "
+                f"(estimated), {stats['prompt_eval_tokens']:.0f} evaluated, {stats['prompt_eval_seconds']:.2f}s prompt eval, "
+                f"{time.perf_counter() - start:.2f}s total"
+            )
@@ -0,0 +1,106 @@
+"""
+Structured constraints in user questions, turned into Qdrant payload filters.
+
+Recognized constraints:
+- dates: "recent"/"latest", "since 2023", "after 2022", "before 2020",
+  "in 2024", "from 2021 to 2023", "last 2 years", "past 6 months"
+- categories: explicit arXiv category codes such as cs.LG or stat.ML
+- authors: "by Hinton", "authored by Yann LeCun"
+
+The filter fields (published_ts, categories, author_list) are written by
+create_nodes_from_papers and indexed by ArxivRAG.ensure_payload_indexes.
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from qdrant_client.http.models import FieldCondition, Filter, MatchAny, MatchText, Range
+
+from app.config import local_settings
+
+DAY_SECONDS = 24 * 3600
+
+CATEGORY_PATTERN = re.compile(
+    r"\b((?:cs|math|stat|eess|econ|q-bio|q-fin|astro-ph|cond-mat|physics|nlin)\.[A-Za-z]{2,3})\b"
+)
+AUTHOR_PATTERN = re.compile(r"\b(?:authored by|written by|by)\s+((?:[A-Z][\w'\-]*\.?\s?){1,3})")
+RANGE_PATTERN = re.compile(r"\b(?:from|between)\s+((?:19|20)\d{2})\s+(?:to|and|-)\s+((?:19|20)\d{2})\b", re.IGNORECASE)
+SINCE_PATTERN = re.compile(r"\b(?:since|after|from)\s+((?:19|20)\d{2})\b", re.IGNORECASE)
+BEFORE_PATTERN = re.compile(r"\b(?:before|until|prior to)\s+((?:19|20)\d{2})\b", re.IGNORECASE)
+IN_YEAR_PATTERN = re.compile(r"\bin\s+((?:19|20)\d{2})\b", re.IGNORECASE)
+LAST_PATTERN = re.compile(r"\b(?:last|past)\s+(\d+)\s+(year|month|week|day)s?\b", re.IGNORECASE)
+RECENT_PATTERN = re.compile(r"\b(recent|recently|latest|newest)\b", re.IGNORECASE)
+
+UNIT_DAYS = {"year": 365, "month": 30, "week": 7, "day": 1}
+
+
+@dataclass
+class QueryFilters:
+    published_after: Optional[int] = None  # Unix timestamp, inclusive
+    published_before: Optional[int] = None  # Unix timestamp, exclusive
+    categories: List[str] = field(default_factory=list)
+    authors: List[str] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return self.published_after is None and self.published_before is None and not self.categories and not self.authors
+
+
+def _year_start(year: str) -> int:
+    return int(datetime(int(year), 1, 1, tzinfo=timezone.utc).timestamp())
+
+
+def extract_filters(question: str, now: Optional[float] = None) -> QueryFilters:
+    """
+    Extract date, category and author constraints from a question.
+
+    Args:
+        question: The user's question
+        now: Current time as Unix timestamp (for tests and benchmarks)
+
+    Returns:
+        QueryFilters: Empty if the question has no recognizable constraints
+    """
+    now = time.time() if now is None else now
+    filters = QueryFilters()
+
+    if match := RANGE_PATTERN.search(question):
+        filters.published_after = _year_start(match.group(1))
+        filters.published_before = _year_start(str(int(match.group(2)) + 1))
+    else:
+        if match := SINCE_PATTERN.search(question):
+            filters.published_after = _year_start(match.group(1))
+        if match := BEFORE_PATTERN.search(question):
+            filters.published_before = _year_start(match.group(1))
+        if filters.published_after is None and filters.published_before is None:
+            if match := IN_YEAR_PATTERN.search(question):
+                filters.published_after = _year_start(match.group(1))
+                filters.published_before = _year_start(str(int(match.group(1)) + 1))
+            elif match := LAST_PATTERN.search(question):
+                days = int(match.group(1)) * UNIT_DAYS[match.group(2).lower()]
+                filters.published_after = int(now - days * DAY_SECONDS)
+            elif RECENT_PATTERN.search(question):
+                filters.published_after = int(now - local_settings.RECENT_PAPERS_DAYS * DAY_SECONDS)
+
+    filters.categories = CATEGORY_PATTERN.findall(question)
+    filters.authors = [name.strip() for name in AUTHOR_PATTERN.findall(question)]
+    return filters
+
+
+def to_qdrant_filter(filters: QueryFilters) -> Optional[Filter]:
+    """Qdrant payload filter for the constraints, or None if there are none."""
+    if filters.is_empty():
+        return None
+    conditions = []
+    if filters.published_after is not None or filters.published_before is not None:
+        conditions.append(
+            FieldCondition(key="published_ts", range=Range(gte=filters.published_after, lt=filters.published_before))
+        )
+    if filters.categories:
+        conditions.append(FieldCondition(key="categories", match=MatchAny(any=filters.categories)))
+    for author in filters.authors:
+        # Full-text match so "Hinton" finds "Geoffrey Hinton"
+        conditions.append(FieldCondition(key="author_list", match=MatchText(text=author)))
+    return Filter(must=conditions)
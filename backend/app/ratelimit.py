@@ -0,0 +1,165 @@
+"""
+Rate limiting and circuit breaking for upstream APIs (arXiv).
+The token bucket can live in process memory or in a SQLite file so that every
+worker on the host draws from the same budget.
+"""
+
+import sqlite3
+import threading
+import time
+
+from app import metrics
+
+
+class BudgetExhausted(Exception):
+    """A local request budget ran out; says nothing about the health of the upstream API."""
+
+
+class TokenBucket:
+    """Process-wide token bucket refilled at `rate` tokens per second."""
+
+    def __init__(self, name: str, rate: float, capacity: int):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Take a token if available; otherwise return the seconds until one is."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            metrics.set_gauge("ratelimit_tokens", self._tokens, bucket=self.name)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, max_wait: float) -> bool:
+        """
+        Block until a token is available or max_wait seconds have passed.
+        Returns False if no token could be obtained in time.
+        """
+        start = time.monotonic()
+        while True:
+            wait = self._take()
+            waited = time.monotonic() - start
+            if wait == 0:
+                metrics.observe("ratelimit_wait_seconds", waited, bucket=self.name)
+                return True
+            if waited + wait > max_wait:
+                metrics.inc("ratelimit_rejected_total", bucket=self.name)
+                return False
+            time.sleep(wait)
+
+
+class SqliteTokenBucket(TokenBucket):
+    """Token bucket whose state is shared by all processes using the same SQLite file."""
+
+    def __init__(self, name: str, rate: float, capacity: int, path: str):
+        super().__init__(name, rate, capacity)
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS token_buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "INSERT OR IGNORE INTO token_buckets (name, tokens, updated) VALUES (?, ?, ?)",
+            (name, float(capacity), time.time()),
+        )
+
+    def _take(self) -> float:
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock so read-modify-write is atomic across processes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                tokens, updated = self._conn.execute(
+                    "SELECT tokens, updated FROM token_buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                now = time.time()
+                tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+                self._conn.execute(
+                    "UPDATE token_buckets SET tokens = ?, updated = ? WHERE name = ?", (tokens, now, self.name)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        metrics.set_gauge("ratelimit_tokens", tokens, bucket=self.name)
+        return wait
+
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open circuit breaker.
+    After failure_threshold consecutive failures the circuit opens and calls
+    fail fast for reset_timeout seconds; then a single trial call is let
+    through and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._publish()
+
+    def _publish(self) -> None:
+        metrics.set_gauge("circuit_breaker_state", self._STATE_VALUES[self._state], breaker=self.name)
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted now."""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+                self._publish()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            metrics.inc("circuit_breaker_rejected_total", breaker=self.name)
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+            self._trial_in_flight = False
+            self._publish()
+
+    def release(self) -> None:
+        """Give back a call let through by allow() whose outcome was never recorded."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    metrics.inc("circuit_breaker_opened_total", breaker=self.name)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._publish()
@@ -0,0 +1,78 @@
+"""
+Fast JSON responses and compression middleware for API routes.
+The fast path serializes models straight to JSON bytes instead of going through
+FastAPI's jsonable_encoder, which walks every field in Python.
+"""
+
+from functools import lru_cache
+from typing import Any, Sequence
+
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+from app.config import local_settings
+
+try:
+    import orjson
+except ImportError:  # Optional (fast-json extra), pydantic's serializer is used instead
+    orjson = None
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response for lists of pydantic/SQLModel rows.
+    Rows are dumped by pydantic's core serializer and encoded with orjson when
+    it is installed; without orjson pydantic writes the JSON bytes itself.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, content: Sequence[BaseModel], model: type[BaseModel], **kwargs: Any):
+        self.model = model
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Sequence[BaseModel]) -> bytes:
+        adapter = _list_adapter(self.model)
+        if orjson is not None:
+            return orjson.dumps(adapter.dump_python(list(content)))
+        return adapter.dump_json(list(content))
+
+
+def json_list_response(items: Sequence[BaseModel], model: type[BaseModel]) -> Any:
+    """
+    Return items through the fast serializer when FAST_JSON_RESPONSES is enabled,
+    otherwise return them unchanged for FastAPI's response_model handling.
+    """
+    if local_settings.FAST_JSON_RESPONSES:
+        return FastJSONResponse(items, model=model)
+    return items
+
+
+def add_compression(app: FastAPI) -> None:
+    """
+    Compress responses larger than COMPRESSION_MINIMUM_SIZE bytes.
+    "br" needs the optional brotli-asgi package and falls back to gzip for
+    clients that do not accept brotli.
+    """
+    mode = local_settings.COMPRESSION.lower()
+    minimum_size = local_settings.COMPRESSION_MINIMUM_SIZE
+    if mode == "none":
+        return
+    if mode == "br":
+        try:
+            from brotli_asgi import BrotliMiddleware
+
+            app.add_middleware(BrotliMiddleware, minimum_size=minimum_size, gzip_fallback=True)
+            return
+        except ImportError:
+            print("brotli-asgi is not installed, using gzip compression instead")
+    elif mode != "gzip":
+        raise ValueError(f"Unsupported compression mode: {local_settings.COMPRESSION}")
+    app.add_middleware(GZipMiddleware, minimum_size=minimum_size)
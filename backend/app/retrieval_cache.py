@@ -0,0 +1,114 @@
+"""
+Cache of vector search results, separate from any answer caching.
+
+Entries map (collection, collection version, normalized question, payload
+filters, top_k) to the retrieved nodes and their scores, so a repeated question
+skips the query embedding and the ANN search. Every write to a collection
+(a vectorize_and_store batch or a deletion) bumps its version, which changes
+the key of every later lookup; entries for old versions simply expire.
+
+Versions are kept per process, or in CACHE_SQLITE_PATH with the "sqlite" cache
+backend so that ingestion in one worker (or the harvest CLI) invalidates the
+results cached by the others. Hits and misses are reported as
+cache_hits_total / cache_misses_total with cache="retrieval".
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from dataclasses import asdict
+from typing import Dict, List, Optional
+
+from llama_index.core.schema import NodeWithScore, TextNode
+
+from app import metrics
+from app.cache import ReadThroughCache
+from app.config import local_settings
+from app.query_filters import QueryFilters
+
+# Relative date bounds ("last 6 months") move every second; key them by the hour
+DATE_KEY_RESOLUTION = 3600
+
+
+class CollectionVersions:
+    """Write counter per collection, optionally shared through a SQLite file."""
+
+    def __init__(self, path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS collection_versions (collection TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+            )
+
+    def get(self, collection: str) -> int:
+        with self._lock:
+            if self._conn is None:
+                return self._versions.get(collection, 0)
+            row = self._conn.execute(
+                "SELECT version FROM collection_versions WHERE collection = ?", (collection,)
+            ).fetchone()
+            return row[0] if row else 0
+
+    def bump(self, collection: str) -> int:
+        with self._lock:
+            if self._conn is None:
+                version = self._versions[collection] = self._versions.get(collection, 0) + 1
+            else:
+                self._conn.execute(
+                    "INSERT INTO collection_versions (collection, version) VALUES (?, 1) "
+                    "ON CONFLICT(collection) DO UPDATE SET version = version + 1",
+                    (collection,),
+                )
+                version = self._conn.execute(
+                    "SELECT version FROM collection_versions WHERE collection = ?", (collection,)
+                ).fetchone()[0]
+        metrics.set_gauge("collection_version", version, collection=collection)
+        return version
+
+
+collection_versions = CollectionVersions(
+    local_settings.CACHE_SQLITE_PATH if local_settings.CACHE_BACKEND.lower() == "sqlite" else None
+)
+_results = ReadThroughCache("retrieval", ttl=local_settings.RETRIEVAL_CACHE_TTL)
+
+
+def retrieval_key(collection: str, question: str, filters: QueryFilters, top_k: int) -> str:
+    """
+    Cache key of a search; changes whenever the collection is written to.
+
+    Args:
+        collection: Searched collection
+        question: Normalized user question
+        filters: Payload filters extracted from the question
+        top_k: Number of results
+
+    Returns:
+        str: Hex digest of the key fields
+    """
+    filter_key = asdict(filters)
+    for bound in ("published_after", "published_before"):
+        if filter_key[bound] is not None:
+            filter_key[bound] //= DATE_KEY_RESOLUTION
+    raw = json.dumps(
+        [collection, collection_versions.get(collection), question, filter_key, top_k], sort_keys=True
+    )
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def get_results(key: str) -> Optional[List[NodeWithScore]]:
+    if not local_settings.RETRIEVAL_CACHE_ENABLED:
+        return None
+    cached = _results.get(key)
+    if cached is None:
+        return None
+    return [NodeWithScore(node=TextNode.from_dict(dict(item["node"])), score=item["score"]) for item in cached]
+
+
+def set_results(key: str, nodes: List[NodeWithScore]) -> None:
+    if local_settings.RETRIEVAL_CACHE_ENABLED:
+        _results.set(key, [{"node": item.node.to_dict(), "score": item.score} for item in nodes])
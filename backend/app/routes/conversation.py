@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select, func
 from app.deps import SessionDep
-from app.crud import get_converstion_by_user_id, get_conversation_by_id, create_conversation, delete_conversation, delete_message_by_conversation_id
+from app.crud import get_converstion_by_user_id, get_conversation_by_id, create_conversation, delete_conversation, delete_conversations_by_user_id, delete_message_by_conversation_id
 from app.model import InsertConversation, Conversations
 from app.model import Users
+from app.responses import json_list_response
 
 
 router = APIRouter(tags=["conversation"])
@@ -19,7 +20,20 @@ def get_conversations_by_user_id(
     conversations = get_converstion_by_user_id(session=session, user_id=userId)
     if not conversations:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No conversations found for this user.")
-    return conversations
+    return json_list_response(conversations, Conversations)
+
+@router.delete("/conversations/user/{userId}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_conversations_by_user_id_route(
+    userId: str,
+    session: SessionDep
+):
+    """
+    Delete all conversations of a user, together with their messages.
+    """
+    deleted = delete_conversations_by_user_id(session=session, user_id=userId)
+    if not deleted:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No conversations found for this user.")
+    return {"detail": "All conversations deleted successfully."}
 
 @router.post("/conversations", response_model=Conversations)
 def create_new_conversation(
@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from requests import session
 from sqlmodel import Session, select, func
 from app.deps import SessionDep
-from app.crud import create_message, get_messages_by_conversation_id
-from app.model import InsertMessage, Messages
+from app.crud import create_message, create_messages, delete_message_by_conversation_id, get_messages_by_conversation_id
+from app.model import BulkMessagesResponse, InsertMessage, Messages
+from app.responses import json_list_response
 
 router = APIRouter(tags=["messages"])
 
@@ -23,6 +24,23 @@ def create_new_message(
     return new_message
 
 
+@router.post("/messages/bulk", response_model=BulkMessagesResponse)
+def create_new_messages(
+    messages: list[InsertMessage],
+    session: SessionDep
+):
+    """
+    Create several messages in one transaction and return their IDs.
+    """
+    if not messages:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="At least one message is required.")
+    if any(not message.conversation_id or not message.content for message in messages):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Conversation ID and content are required.")
+
+    ids = create_messages(session=session, messages=messages)
+    return BulkMessagesResponse(ids=ids)
+
+
 @router.get("/messages/{conversationId}", response_model=list[Messages])
 def get_messages_by_conversation_id_route(
     conversationId: str,
@@ -34,7 +52,7 @@ def get_messages_by_conversation_id_route(
     messages = get_messages_by_conversation_id(session=session, conversation_id=conversationId)
     if not messages:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No messages found for this conversation.")
-    return messages
+    return json_list_response(messages, Messages)
 
 @router.delete("/messages/{conversationId}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_messages_by_conversation_id(
@@ -44,12 +62,8 @@ def delete_messages_by_conversation_id(
     """
     Delete all messages for a specific conversation.
     """
-    messages = get_messages_by_conversation_id(session=session, conversation_id=conversationId)
-    if not messages:
+    deleted = delete_message_by_conversation_id(session=session, conversation_id=conversationId)
+    if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No messages found for this conversation.")
-    
-    for message in messages:
-        session.delete(message)
-    
-    session.commit()
-    return {"detail": "All messages deleted successfully."} 
+
+    return {"detail": "All messages deleted successfully."}
@@ -0,0 +1,85 @@
+"""
+Single-flight request coalescing.
+Concurrent callers asking for the same key share one execution of the work:
+the first caller runs it, the others block until its result (or exception)
+is available. Nothing is cached once the call completes.
+
+KeyedLock is the counterpart for work that must not be shared: callers with
+the same key run one after another, each with its own arguments.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
+
+from app import metrics
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn() for key unless a call for the same key is already in flight,
+        in which case wait for that call and return its outcome.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            metrics.inc("singleflight_coalesced_total", flight=self.name)
+            call.done.wait()
+        else:
+            metrics.inc("singleflight_executed_total", flight=self.name)
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class KeyedLock:
+    """One lock per key, created on first use and dropped once no caller holds or waits for it."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._locks: Dict[str, List[Any]] = {}  # key -> [lock, holders and waiters]
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        with self._lock:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        if entry[1] > 1:
+            metrics.inc("keyed_lock_waits_total", lock=self.name)
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[key]
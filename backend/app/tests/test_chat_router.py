@@ -0,0 +1,47 @@
+import pytest
+
+from app.chat_router import AGENT, FOLLOWUP, GREETING, route_message
+
+HISTORY = [
+    {"content": "What is retrieval-augmented generation?", "isBot": False},
+    {"content": "RAG combines a retriever with a generator ...", "isBot": True},
+]
+
+
+@pytest.mark.parametrize("message", ["hi", "Hello there", "thanks!", "bye", "thanks so much for the help"])
+def test_greetings(message):
+    assert route_message(message) == GREETING
+
+
+@pytest.mark.parametrize("message", ["hello what is RLHF", "hi, explain transformers", "hey summarize LoRA"])
+def test_greeting_followed_by_a_question_goes_to_agent(message):
+    assert route_message(message) == AGENT
+
+
+@pytest.mark.parametrize("message", ["hey, find LLM papers", "hi, any recent papers on RAG"])
+def test_greeting_with_research_request_goes_to_agent(message):
+    assert route_message(message, HISTORY) == AGENT
+
+
+@pytest.mark.parametrize(
+    "message",
+    ["explain that more simply", "what does this mean?", "can you rephrase", "tl;dr", "elaborate on it"],
+)
+def test_followups(message):
+    assert route_message(message, HISTORY) == FOLLOWUP
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "is it true that attention is quadratic?",
+        "how does this compare to fine-tuning on domain data?",
+        "what about that other model, mamba?",
+    ],
+)
+def test_bare_anaphora_goes_to_agent(message):
+    assert route_message(message, HISTORY) == AGENT
+
+
+def test_followup_needs_history():
+    assert route_message("explain that more simply") == AGENT
@@ -0,0 +1,215 @@
+"""
+Bulk harvester against a local fixture feed server: paging, checkpoint/resume
+and feeds with malformed entries. Nothing is downloaded from arXiv and nothing
+is embedded; index_batch is replaced by a recorder.
+"""
+
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+import pytest
+
+from app import arxiv_rag
+from app.arxiv_rag import ArxivRAG
+from app.config import local_settings
+from app.initalize_db import harvest_arxiv
+from app.ratelimit import CircuitBreaker, TokenBucket
+
+QUERY = "cat:cs.LG"
+
+
+class FixtureFeed:
+    """Paged Atom feed of `total` entries; some entries can be malformed and some offsets can fail."""
+
+    def __init__(self, total: int, missing_pdf=(), missing_title=(), fail_at=()):
+        self.total = total
+        self.missing_pdf = set(missing_pdf)
+        self.missing_title = set(missing_title)
+        self.fail_at = set(fail_at)
+        self.requests = []
+        self.page_sizes = []
+
+    def entry(self, index: int, base_url: str) -> str:
+        arxiv_id = f"2401.{index:05d}v1"
+        pdf_link = "" if index in self.missing_pdf else f'<link title="pdf" href="{base_url}/pdf/{arxiv_id}" rel="related"/>'
+        title = "" if index in self.missing_title else f"<title>Paper {index}</title>"
+        return f"""
+  <entry>
+    <id>{base_url}/abs/{arxiv_id}</id>
+    <published>2024-01-01T00:00:00Z</published>
+    {title}
+    <summary>{escape(f"Summary of paper {index}")}</summary>
+    <author><name>Author {index}</name></author>
+    <arxiv:primary_category term="cs.LG"/>
+    <category term="cs.LG"/>
+    {pdf_link}
+  </entry>"""
+
+    def page(self, start: int, max_results: int, base_url: str) -> str:
+        entries = "".join(self.entry(i, base_url) for i in range(start, min(start + max_results, self.total)))
+        return f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:arxiv="http://arxiv.org/schemas/atom">
+  <title>fixture</title>{entries}
+</feed>"""
+
+
+@pytest.fixture
+def feed_server():
+    feeds = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            feed = feeds["feed"]
+            params = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+            start, max_results = int(params["start"][0]), int(params["max_results"][0])
+            feed.requests.append((params["search_query"][0], start))
+            feed.page_sizes.append(max_results)
+            if start in feed.fail_at:
+                feed.fail_at.discard(start)
+                self.send_error(503)
+                return
+            body = feed.page(start, max_results, base_url).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/atom+xml")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def serve(feed: FixtureFeed) -> FixtureFeed:
+        feeds["feed"] = feed
+        return feed
+
+    original_url = local_settings.ARXIV_API_URL
+    local_settings.ARXIV_API_URL = f"{base_url}/api/query"
+    try:
+        yield serve
+    finally:
+        local_settings.ARXIV_API_URL = original_url
+        server.shutdown()
+        server.server_close()
+
+
+class FixtureRAG(ArxivRAG):
+    """ArxivRAG without a vector store: nothing is indexed yet and PDFs are not downloaded."""
+
+    def __init__(self):
+        self.max_results = 10
+
+    def is_already_indexed(self, pdf_url):
+        return False
+
+    def extract_arxiv_pdf_text(self, pdf_url):
+        return f"Full text of {pdf_url}"
+
+
+@pytest.fixture
+def indexed(monkeypatch):
+    papers = []
+    lock = threading.Lock()
+
+    def record_batch(rag, batch):
+        with lock:
+            papers.extend(paper["title"] for paper in batch)
+        return len(batch)
+
+    monkeypatch.setattr(harvest_arxiv, "index_batch", record_batch)
+    monkeypatch.setattr(arxiv_rag, "_arxiv_bucket", TokenBucket("test_arxiv_api", rate=1000, capacity=1000))
+    monkeypatch.setattr(arxiv_rag, "_arxiv_breaker", CircuitBreaker("test_arxiv_api", failure_threshold=5, reset_timeout=60))
+    return papers
+
+
+def harvest(checkpoint_path, checkpoint=None, page_size=10, max_papers=None):
+    checkpoint = harvest_arxiv.load_checkpoint(str(checkpoint_path)) if checkpoint is None else checkpoint
+    with harvest_arxiv.ThreadPoolExecutor(max_workers=2) as pool:
+        harvest_arxiv.harvest_query(
+            FixtureRAG(), pool, QUERY, checkpoint, str(checkpoint_path),
+            page_size=page_size, max_papers=max_papers, papers_per_batch=3,
+        )
+    return checkpoint
+
+
+def test_pages_through_the_whole_feed(tmp_path, feed_server, indexed):
+    feed = feed_server(FixtureFeed(total=25))
+
+    checkpoint = harvest(tmp_path / "checkpoint.json")
+
+    assert [start for _, start in feed.requests] == [0, 10, 20]
+    assert sorted(indexed) == sorted(f"Paper {i}" for i in range(25))
+    assert checkpoint[QUERY] == {"start": 25, "indexed": 25, "done": True}
+    assert harvest_arxiv.load_checkpoint(str(tmp_path / "checkpoint.json")) == checkpoint
+
+
+def test_stops_at_max_papers(tmp_path, feed_server, indexed):
+    feed = feed_server(FixtureFeed(total=50))
+
+    checkpoint = harvest(tmp_path / "checkpoint.json", max_papers=20)
+
+    assert [start for _, start in feed.requests] == [0, 10]
+    assert len(indexed) == 20
+    assert checkpoint[QUERY]["done"]
+
+
+def test_last_page_asks_only_for_the_rest_of_max_papers(tmp_path, feed_server, indexed):
+    feed = feed_server(FixtureFeed(total=50))
+
+    checkpoint = harvest(tmp_path / "checkpoint.json", max_papers=25)
+
+    assert [start for _, start in feed.requests] == [0, 10, 20]
+    assert feed.page_sizes == [10, 10, 5]
+    assert sorted(indexed) == sorted(f"Paper {i}" for i in range(25))
+    assert checkpoint[QUERY] == {"start": 25, "indexed": 25, "done": True}
+
+
+def test_malformed_entries_do_not_shift_offsets_or_end_the_harvest(tmp_path, feed_server, indexed):
+    # Full pages that still contain entries the parser drops
+    feed = feed_server(FixtureFeed(total=30, missing_pdf={3, 14}, missing_title={7}))
+
+    checkpoint = harvest(tmp_path / "checkpoint.json")
+
+    assert [start for _, start in feed.requests] == [0, 10, 20, 30]
+    assert sorted(indexed) == sorted(f"Paper {i}" for i in range(30) if i not in {3, 7, 14})
+    assert checkpoint[QUERY] == {"start": 30, "indexed": 27, "done": True}
+
+
+def test_resumes_from_the_checkpoint_after_a_failure(tmp_path, feed_server, indexed):
+    checkpoint_path = tmp_path / "checkpoint.json"
+    feed = feed_server(FixtureFeed(total=25, fail_at={10}))
+
+    with pytest.raises(Exception, match="Failed to fetch from arXiv"):
+        harvest(checkpoint_path)
+    assert harvest_arxiv.load_checkpoint(str(checkpoint_path))[QUERY] == {"start": 10, "indexed": 10, "done": False}
+
+    # A new run reads the checkpoint and continues at the failed page
+    checkpoint = harvest(checkpoint_path)
+
+    assert [start for _, start in feed.requests] == [0, 10, 10, 20]
+    assert sorted(indexed) == sorted(f"Paper {i}" for i in range(25))
+    assert checkpoint[QUERY] == {"start": 25, "indexed": 25, "done": True}
+
+
+def test_skips_finished_queries(tmp_path, feed_server, indexed):
+    feed = feed_server(FixtureFeed(total=25))
+    checkpoint = {QUERY: {"start": 25, "indexed": 25, "done": True}}
+
+    harvest(tmp_path / "checkpoint.json", checkpoint=checkpoint)
+
+    assert feed.requests == []
+    assert indexed == []
+
+
+def test_build_search_query_limits_the_submission_dates():
+    assert harvest_arxiv.build_search_query("cs.LG", None, None) == "cat:cs.LG"
+    assert (
+        harvest_arxiv.build_search_query("hep-th", "1999-01-01", "2006-12-31")
+        == "cat:hep-th AND submittedDate:[199901010000 TO 200612312359]"
+    )
@@ -0,0 +1,63 @@
+"""
+Coalesced tool calls: requests waiting on an identical in-flight question get
+its answer and also see the papers it fetched in their indexing progress.
+"""
+
+import threading
+import time
+
+from app import paper_progress
+from app.arxiv_rag import get_lazy_load_and_query
+from app.config import local_settings
+
+
+class ColdRAG:
+    """Empty collection; the arXiv fetch blocks until released so callers overlap."""
+
+    def __init__(self):
+        self.fetch_started = threading.Event()
+        self.release_fetch = threading.Event()
+        self.fetches = 0
+
+    def vector_store_has_documents(self, user_question):
+        return False
+
+    def fetch_arxiv_feed(self, query):
+        self.fetches += 1
+        self.fetch_started.set()
+        self.release_fetch.wait(timeout=5)
+        return "<feed/>"
+
+    def parse_arxiv_feed(self, feed, full_text=True):
+        return [{"title": "Paper 1"}, {"title": "Paper 2"}]
+
+    def index_progressively(self, entries):
+        return ["2401.00001", "2401.00002"], ["summary 1", "summary 2"]
+
+
+def test_waiting_callers_record_the_papers_fetched_by_the_shared_call(monkeypatch):
+    monkeypatch.setattr(local_settings, "PROGRESSIVE_INDEXING", True)
+    monkeypatch.setattr(local_settings, "PREFETCH_ENABLED", False)
+    rag = ColdRAG()
+    tool = get_lazy_load_and_query(llm=object(), get_rag=lambda: rag)
+    results = {}
+
+    def ask(name):
+        papers = []
+        with paper_progress.collect_papers(papers):
+            answer = tool("transformers for time series")
+        results[name] = (answer, papers)
+
+    leader = threading.Thread(target=ask, args=("leader",))
+    leader.start()
+    assert rag.fetch_started.wait(timeout=5)
+    waiter = threading.Thread(target=ask, args=("waiter",))
+    waiter.start()
+    time.sleep(0.1)
+    rag.release_fetch.set()
+    leader.join(timeout=5)
+    waiter.join(timeout=5)
+
+    assert rag.fetches == 1
+    expected = (["summary 1", "summary 2"], ["2401.00001", "2401.00002"])
+    assert results == {"leader": expected, "waiter": expected}
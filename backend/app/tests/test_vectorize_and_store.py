@@ -0,0 +1,73 @@
+"""
+Concurrent writes of one paper through ArxivRAG.vectorize_and_store. The
+embedding and the vector store are replaced by a recorder that holds the
+first write open until the second one has arrived.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+from app.arxiv_rag import ArxivRAG
+
+
+class RecordingRAG(ArxivRAG):
+    """Records every _vectorize_and_store call; the first one blocks until released."""
+
+    def __init__(self):
+        self.stored = []
+        self.active = 0
+        self.max_active = 0
+        self.first_started = threading.Event()
+        self.release_first = threading.Event()
+        self._lock = threading.Lock()
+
+    def _vectorize_and_store(self, nodes):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        if not self.first_started.is_set():
+            self.first_started.set()
+            self.release_first.wait(timeout=5)
+        with self._lock:
+            self.stored.append([node.text for node in nodes])
+            self.active -= 1
+
+
+def paper_nodes(arxiv_id, version, texts):
+    return [SimpleNamespace(text=text, metadata={"arxiv_id": arxiv_id, "version": version}) for text in texts]
+
+
+def test_overlapping_writes_of_one_paper_are_all_stored_in_turn():
+    rag = RecordingRAG()
+    first = threading.Thread(target=rag.vectorize_and_store, args=(paper_nodes("2401.00001", 1, ["abstract"]),))
+    second = threading.Thread(
+        target=rag.vectorize_and_store, args=(paper_nodes("2401.00001", 2, ["chunk 0", "chunk 1"]),)
+    )
+
+    first.start()
+    assert rag.first_started.wait(timeout=5)
+    second.start()
+    time.sleep(0.1)
+    # The second write waits for the first instead of running alongside or being dropped
+    assert rag.stored == []
+    rag.release_first.set()
+    first.join(timeout=5)
+    second.join(timeout=5)
+
+    assert rag.stored == [["abstract"], ["chunk 0", "chunk 1"]]
+    assert rag.max_active == 1
+
+
+def test_different_papers_are_written_concurrently():
+    rag = RecordingRAG()
+    first = threading.Thread(target=rag.vectorize_and_store, args=(paper_nodes("2401.00001", 1, ["a"]),))
+    first.start()
+    assert rag.first_started.wait(timeout=5)
+
+    rag.vectorize_and_store(paper_nodes("2401.00002", 1, ["b"]))
+
+    assert rag.stored == [["b"]]
+    rag.release_first.set()
+    first.join(timeout=5)
+    assert rag.stored == [["b"], ["a"]]
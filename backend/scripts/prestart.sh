@@ -16,5 +16,8 @@ fi
 # Run migrations
 alembic upgrade head
 
+# Fill message counts and previews of conversations created before they existed
+python app/initalize_db/backfill_conversation_stats.py
+
 # Create initial data in DB
 python app/initalize_db/initial_data.py
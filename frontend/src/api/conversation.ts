@@ -42,7 +42,9 @@ export const getConversationsByUserId = async (userId: string): Promise<GetConve
             title: convo.title,
             userId: convo.user_id,
             createdAt: convo.created_at,
-            updatedAt: convo.updated_at
+            updatedAt: convo.updated_at,
+            messageCount: convo.message_count,
+            lastMessagePreview: convo.last_message_preview
         })) : [];
         
         console.log("Transformed conversation data:", transformedData);
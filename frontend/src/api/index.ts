@@ -1,2 +1,2 @@
 export { useGetConverstionById, useCreateConversation, useDeleteConversation } from "./conversation";
-export { useGetMessages, useCreateMessage } from "./messages";
\ No newline at end of file
+export { useGetMessages, useCreateMessage, useChatSocket } from "./messages";
\ No newline at end of file
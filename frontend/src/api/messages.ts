@@ -1,3 +1,4 @@
+import { useCallback, useEffect, useRef, useState } from 'react';
 import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query';
 import { Message } from "../interfaces";
 
@@ -298,4 +299,138 @@ export const useCreateMessage = () => {
             console.error("Error creating message:", error);
         }
     });
-};
\ No newline at end of file
+};
+
+// WebSocket chat channel (backend: app/chat_session.py). The server keeps the
+// conversation history and persists both sides of each turn, so a turn is one
+// small frame instead of a /messages POST, a /chat POST with the full history
+// and a second /messages POST.
+const WS_BASE = API_BASE.replace(/^http/, 'ws');
+
+type IndexingProgress = {
+    papers: Record<string, string>;
+    full_text_ready: boolean;
+};
+
+type ChatFrame =
+    | { type: 'ready'; history: number }
+    | { type: 'start'; turn: number }
+    | { type: 'delta'; turn: number; text: string }
+    | { type: 'done'; turn: number; response: string; indexing?: IndexingProgress }
+    | { type: 'cancelled'; turn: number }
+    | ({ type: 'indexing' } & IndexingProgress)
+    | { type: 'error'; message: string };
+
+export const useChatSocket = (conversationId: string | number | undefined) => {
+    const queryClient = useQueryClient();
+    const socketRef = useRef<WebSocket | null>(null);
+    // Optimistic user message not yet accepted by the server (no 'start' frame yet)
+    const pendingRef = useRef<string | null>(null);
+    const turnActiveRef = useRef(false);
+    const [isConnected, setIsConnected] = useState(false);
+    const [isGenerating, setIsGenerating] = useState(false);
+
+    useEffect(() => {
+        if (!conversationId) return;
+        const queryKey = ["messages", conversationId];
+        const streamingId = `streaming-${conversationId}`;
+        let streamed = "";
+
+        // Turns are written into the query cache directly instead of refetching the conversation
+        const setBotMessage = (id: string, content: string | null) => {
+            queryClient.setQueryData<Message[]>(queryKey, (old = []) => {
+                const others = old.filter((msg) => msg.id !== streamingId);
+                if (content === null) return others;
+                return [...others, {
+                    id,
+                    conversationId: String(conversationId),
+                    content,
+                    isBot: true,
+                    createdAt: new Date().toISOString(),
+                }];
+            });
+        };
+
+        const socket = new WebSocket(`${WS_BASE}/chat/ws/${conversationId}`);
+        socketRef.current = socket;
+        socket.onopen = () => setIsConnected(true);
+        socket.onclose = () => {
+            setIsConnected(false);
+            setIsGenerating(false);
+            pendingRef.current = null;
+            turnActiveRef.current = false;
+        };
+        socket.onmessage = (event) => {
+            const frame = JSON.parse(event.data) as ChatFrame;
+            switch (frame.type) {
+                case 'start':
+                    streamed = "";
+                    pendingRef.current = null;
+                    turnActiveRef.current = true;
+                    setIsGenerating(true);
+                    break;
+                case 'delta':
+                    streamed += frame.text;
+                    setBotMessage(streamingId, streamed);
+                    break;
+                case 'done':
+                    setBotMessage(`bot-${frame.turn}-${Date.now()}`, frame.response);
+                    turnActiveRef.current = false;
+                    setIsGenerating(false);
+                    break;
+                case 'cancelled':
+                    setBotMessage(streamingId, null);
+                    turnActiveRef.current = false;
+                    setIsGenerating(false);
+                    break;
+                case 'indexing':
+                    console.log("Full-text retrieval ready for papers:", Object.keys(frame.papers));
+                    break;
+                case 'error': {
+                    console.error("Chat socket error:", frame.message);
+                    // The server rejected the message: it will never be answered or persisted
+                    const rejectedId = pendingRef.current;
+                    if (rejectedId) {
+                        pendingRef.current = null;
+                        queryClient.setQueryData<Message[]>(queryKey, (old = []) => old.filter((msg) => msg.id !== rejectedId));
+                        setIsGenerating(turnActiveRef.current);
+                    }
+                    break;
+                }
+            }
+        };
+
+        return () => {
+            socket.close();
+            socketRef.current = null;
+        };
+    }, [conversationId, queryClient]);
+
+    // Returns false when the socket is not open, so the caller can fall back to HTTP.
+    // Callers must not send while isGenerating: the server answers one turn at a time.
+    const sendMessage = useCallback((content: string): boolean => {
+        const socket = socketRef.current;
+        if (!socket || socket.readyState !== WebSocket.OPEN) return false;
+        const id = `user-${Date.now()}`;
+        pendingRef.current = id;
+        setIsGenerating(true);
+        queryClient.setQueryData<Message[]>(["messages", conversationId], (old = []) => [...old, {
+            id,
+            conversationId: String(conversationId),
+            content,
+            isBot: false,
+            createdAt: new Date().toISOString(),
+        }]);
+        socket.send(JSON.stringify({ type: 'message', content }));
+        return true;
+    }, [conversationId, queryClient]);
+
+    const cancel = useCallback(() => {
+        const socket = socketRef.current;
+        if (socket && socket.readyState === WebSocket.OPEN) {
+            socket.send(JSON.stringify({ type: 'cancel' }));
+        }
+    }, []);
+
+    return { isConnected, isGenerating, sendMessage, cancel };
+};
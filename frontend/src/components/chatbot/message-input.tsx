@@ -2,6 +2,8 @@ import { useState, useRef, useEffect } from "react";
 
 interface MessageInputProps {
   onSendMessage: (content: string) => void;
+  onStop?: () => void;
+  isGenerating?: boolean;
   disabled?: boolean;
   placeholder?: string;
 }
@@ -13,12 +15,13 @@ const suggestedPrompts = [
   "📱 Mobile responsiveness"
 ];
 
-export default function MessageInput({ onSendMessage, disabled, placeholder }: MessageInputProps) {
+export default function MessageInput({ onSendMessage, onStop, isGenerating, disabled, placeholder }: MessageInputProps) {
   const [message, setMessage] = useState("");
   const textareaRef = useRef<HTMLTextAreaElement>(null);
 
   const handleSubmit = () => {
-    if (message.trim() && !disabled) {
+    // Typing ahead is fine, sending waits until the current reply is finished or stopped
+    if (message.trim() && !disabled && !isGenerating) {
       onSendMessage(message.trim());
       setMessage("");
       if (textareaRef.current) {
@@ -112,15 +115,27 @@ export default function MessageInput({ onSendMessage, disabled, placeholder }: M
                 </div>
               </div>
             </div>
+            {isGenerating && onStop ? (
+            <button
+              onClick={onStop}
+              title="Stop generating"
+              className="bg-gray-800 hover:bg-gray-900 text-white p-3 rounded-2xl transition-all duration-200 hover:shadow-lg"
+            >
+              <svg className="w-4 h-4" fill="currentColor" viewBox="0 0 24 24">
+                <rect x="6" y="6" width="12" height="12" rx="2" />
+              </svg>
+            </button>
+            ) : (
             <button
               onClick={handleSubmit}
-              disabled={disabled || !message.trim()}
+              disabled={disabled || isGenerating || !message.trim()}
               className="bg-blue-600 hover:bg-blue-700 text-white p-3 rounded-2xl transition-all duration-200 hover:shadow-lg hover:-translate-y-0.5 disabled:opacity-50 disabled:cursor-not-allowed disabled:transform-none disabled:shadow-none"
             >
               <svg className="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24" style={{ transform: 'rotate(90deg)' }}>
                 <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M12 19l9 2-9-18-9 18 9-2zm0 0v-8" />
               </svg>
             </button>
+            )}
           </div>
         </div>
 
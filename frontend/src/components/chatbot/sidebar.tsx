@@ -195,6 +195,9 @@ export default function Sidebar({ isOpen, onClose, currentConversation, onConver
                         )}
                       </button>
                     </div>
+                    {conversation.lastMessagePreview && (
+                      <p className="mt-1 pl-5 text-xs text-gray-500 truncate">{conversation.lastMessagePreview}</p>
+                    )}
                   </button>
                 ))
               )}
@@ -1,7 +1,7 @@
 import { useState, useEffect } from "react";
 import { Conversation } from "../interfaces";
 import { useQueryClient } from "@tanstack/react-query";
-import { useGetConverstionById, useGetMessages, useCreateMessage } from "../api";
+import { useGetConverstionById, useGetMessages, useCreateMessage, useChatSocket } from "../api";
 import { useAdminUser } from "../api/users";
 
 export function useChatbot() {
@@ -82,6 +82,7 @@ export function useChatbot() {
   }, [messagesError, currentConversation?.id]);
 
   const createMessageMutation = useCreateMessage();
+  const chatSocket = useChatSocket(currentConversation?.id);
 
   // Handle message creation error
   useEffect(() => {
@@ -116,6 +117,17 @@ export function useChatbot() {
       setError("Cannot send message: No active conversation");
       return;
     }
+
+    // One turn at a time; the running one can be stopped with cancelGeneration
+    if (chatSocket.isGenerating) {
+      return;
+    }
+
+    // WebSocket channel when connected; the HTTP flow below is the fallback
+    if (chatSocket.sendMessage(content)) {
+      setError(null);
+      return;
+    }
     
     createMessageMutation.mutate({
       conversationId: currentConversation.id,
@@ -131,8 +143,10 @@ export function useChatbot() {
     setCurrentConversation,
     messages,
     isLoading,
-    isTyping,
+    isTyping: isTyping || chatSocket.isGenerating,
+    isGenerating: chatSocket.isGenerating,
     sendMessage,
+    cancelGeneration: chatSocket.cancel,
     error,
     userId,
   };
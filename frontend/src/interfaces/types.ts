@@ -3,6 +3,8 @@ export type Conversation = {
   title: string;
   createdAt: string;
   updatedAt: string;
+  messageCount?: number;
+  lastMessagePreview?: string | null;
 };
 
 export type Message = {
@@ -11,7 +11,9 @@ export default function Chatbot() {
     messages, 
     isLoading, 
     isTyping, 
+    isGenerating,
     sendMessage,
+    cancelGeneration,
     setCurrentConversation,
     error
   } = useChatbot();
@@ -109,6 +111,8 @@ export default function Chatbot() {
         {/* Message Input */}
         <MessageInput 
           onSendMessage={sendMessage}
+          onStop={cancelGeneration}
+          isGenerating={isGenerating}
           disabled={isInputDisabled}
           placeholder={error ? "Please fix connection errors before sending messages" : "Type a message..."}
         />